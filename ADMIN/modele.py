@@ -1,15 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import hashlib
 from datetime import datetime, time, timedelta
+from time import monotonic, sleep
 import os
+import sys
+import threading
 from dotenv import load_dotenv
+from flask import g, has_app_context
 
 # Charger les variables d'environnement
 load_dotenv()
 
+# Rendre importable le paquet shared (code commun avec l'application utilisateur)
+REPOSITORY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.append(REPOSITORY_ROOT)
+
+from shared.poster_store import get_poster_store, content_hash as compute_content_hash
+from shared.poster_derivatives import schedule_derivatives
+from shared.booking_summary import refresh_booking_summaries, delete_booking_summary
+from shared.seatmap import row_label, build_grid, serialize_layout
+
 # Connexion à la BDD - Configuration depuis .env
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "82.66.24.184"),
@@ -22,20 +36,137 @@ DB_CONFIG = {
     "pool_name": "cinemacousas_pool"
 }
 
+# Attente maximale d'une connexion libre quand le pool est épuisé (secondes)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+# Instructions qui ne modifient pas la base (les autres laissent une transaction à valider)
+READ_ONLY_STATEMENTS = ('SELECT', 'SHOW')
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """Crée le pool de connexions à la première utilisation (DB_POOL_SIZE connexions)"""
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            _connection_pool = pooling.MySQLConnectionPool(**DB_CONFIG)
+        return _connection_pool
+
+def checkout_connection():
+    """
+    Prend une connexion du pool, en attendant jusqu'à DB_POOL_TIMEOUT qu'une se libère
+    Le pool vérifie chaque connexion (ping) avant de la rendre et la reconnecte si elle a été coupée
+    """
+    pool = get_connection_pool()
+    deadline = monotonic() + DB_POOL_TIMEOUT
+    
+    while True:
+        try:
+            return pool.get_connection()
+        except PoolError:
+            if monotonic() >= deadline:
+                raise
+            sleep(0.05)
+
+class RequestCursor:
+    """Curseur de la connexion d'une requête, qui note les écritures pas encore validées"""
+    
+    def __init__(self, cursor, request_connection):
+        self._cursor = cursor
+        self._request_connection = request_connection
+    
+    def execute(self, operation, *args, **kwargs):
+        if not operation.lstrip().upper().startswith(READ_ONLY_STATEMENTS):
+            self._request_connection.has_pending_writes = True
+        return self._cursor.execute(operation, *args, **kwargs)
+    
+    def executemany(self, *args, **kwargs):
+        self._request_connection.has_pending_writes = True
+        return self._cursor.executemany(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+
+class RequestConnection:
+    """
+    Connexion partagée par toutes les fonctions appelées pendant une requête
+    
+    Les fonctions l'utilisent comme une connexion ordinaire : close() ne la rend pas au pool
+    mais, quand la fonction la plus externe a terminé, annule les écritures qu'elle n'a pas
+    validées (une fonction qui échoue ne doit pas laisser son travail à la suivante).
+    La connexion retourne au pool à la fin de la requête (release_request_connection).
+    """
+    
+    def __init__(self, connection):
+        self._connection = connection
+        self.depth = 0
+        self.has_pending_writes = False
+    
+    def cursor(self, *args, **kwargs):
+        return RequestCursor(self._connection.cursor(*args, **kwargs), self)
+    
+    def commit(self):
+        self._connection.commit()
+        self.has_pending_writes = False
+    
+    def rollback(self):
+        self._connection.rollback()
+        self.has_pending_writes = False
+    
+    def is_connected(self):
+        # Déjà vérifiée par le pool au début de la requête, inutile de la pinger à chaque fonction
+        return True
+    
+    def close(self):
+        self.depth -= 1
+        if self.depth <= 0 and self.has_pending_writes:
+            self.rollback()
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def get_request_connection():
+    """Retourne la connexion de la requête en cours, prise du pool au premier appel"""
+    request_connection = g.get('_db_connection')
+    if request_connection is None:
+        request_connection = RequestConnection(checkout_connection())
+        g._db_connection = request_connection
+    request_connection.depth += 1
+    return request_connection
+
+def release_request_connection(exception=None):
+    """Rend la connexion de la requête au pool, en annulant toute transaction inachevée"""
+    request_connection = g.pop('_db_connection', None)
+    if request_connection is None:
+        return
+    
+    connection = request_connection._connection
+    try:
+        if connection.is_connected() and connection.in_transaction:
+            connection.rollback()
+    except Error as e:
+        print(f"Erreur lors de l'annulation de la transaction de la requête: {e}")
+    finally:
+        connection.close()
+
+def init_db_request_scope(app):
+    """Rend la connexion de chaque requête au pool à la fin de la requête"""
+    app.teardown_appcontext(release_request_connection)
+
 def get_db_connection():
-    """Établit et retourne une connexion à la base de données"""
+    """
+    Retourne une connexion à la base de données, prise du pool
+    Pendant une requête Flask, toutes les fonctions (y compris celles appelées par d'autres)
+    partagent la même connexion ; ailleurs chaque appel prend sa propre connexion du pool
+    """
     try:
-        # Configuration simple sans pool pour éviter les problèmes
-        config = {
-            "host": os.getenv("DB_HOST", "82.66.24.184"),
-            "port": int(os.getenv("DB_PORT", 3305)),
-            "user": os.getenv("DB_USER", "cinemacousas"),
-            "password": os.getenv("DB_PASSWORD", "password"),
-            "database": os.getenv("DB_NAME", "Cinemacousas")
-        }
-        connection = mysql.connector.connect(**config)
-        if connection.is_connected():
-            return connection
+        if has_app_context():
+            return get_request_connection()
+        return checkout_connection()
     except Error as e:
         print(f"Erreur lors de la connexion à MySQL: {e}")
         return None
@@ -44,6 +175,44 @@ def hash_password(password):
     """Hash un mot de passe avec SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
+def bump_catalog_version(cursor):
+    """
+    Incrémente la version du catalogue (films, séances, affiches)
+    L'application utilisateur invalide son cache des séances quand cette version change
+    """
+    try:
+        cursor.execute("""
+            INSERT INTO cache_version (name, version) VALUES ('catalog', 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+    except Error as e:
+        # La table peut ne pas encore exister : le cache côté utilisateur est alors désactivé
+        print(f"Impossible d'incrémenter la version du catalogue: {e}")
+
+def bump_occupancy_version(cursor, showing_id):
+    """
+    Incrémente la version d'occupation des sièges d'une séance
+    L'application utilisateur s'en sert pour invalider son plan de salle en cache
+    """
+    try:
+        cursor.execute("""
+            UPDATE showing SET occupancy_version = occupancy_version + 1 WHERE id = %s
+        """, (showing_id,))
+    except Error as e:
+        print(f"Impossible d'incrémenter la version d'occupation de la séance {showing_id}: {e}")
+
+def bump_layout_version(cursor, room_id):
+    """
+    Incrémente la version du plan d'une salle (sièges, types de sièges)
+    L'application utilisateur invalide son plan de salle en cache quand cette version change
+    """
+    try:
+        cursor.execute("""
+            UPDATE room SET layout_version = layout_version + 1 WHERE id = %s
+        """, (room_id,))
+    except Error as e:
+        print(f"Impossible d'incrémenter la version du plan de la salle {room_id}: {e}")
+
 def parse_time_safely(date_str, time_input):
     """
     Parse une heure de manière robuste en gérant différents formats et types
@@ -88,7 +257,7 @@ def parse_time_safely(date_str, time_input):
 # ===== FONCTIONS POUR LES FILMS =====
 
 def get_all_movies():
-    """Récupère tous les films"""
+    """Récupère tous les films, avec l'id et l'empreinte (content_hash) de leur affiche principale"""
     connection = get_db_connection()
     
     if connection is None:
@@ -96,7 +265,12 @@ def get_all_movies():
         
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM movie ORDER BY name")
+        cursor.execute("""
+            SELECT m.*, mp.id AS poster_id, mp.content_hash AS poster_hash
+            FROM movie m
+            LEFT JOIN movieposter mp ON mp.movie_id = m.id AND mp.is_primary = TRUE
+            ORDER BY m.name
+        """)
         movies = cursor.fetchall()
         return movies
         
@@ -145,6 +319,7 @@ def add_movie(name, duration, director=None, cast=None, synopsis=None):
             INSERT INTO movie (name, duration, director, cast, synopsis) 
             VALUES (%s, %s, %s, %s, %s)
         """, (name, duration, director, cast, synopsis))
+        bump_catalog_version(cursor)
         connection.commit()
         
         return True, f"Film '{name}' ajouté avec succès"
@@ -172,9 +347,21 @@ def update_movie(movie_id, name, duration, director, cast, synopsis):
             SET name = %s, duration = %s, director = %s, cast = %s, synopsis = %s
             WHERE id = %s
         """, (name, duration, director, cast, synopsis, movie_id))
+        updated_rows = cursor.rowcount
+        
+        # La durée a pu changer : recalculer la fin des séances du film
+        cursor.execute("""
+            UPDATE showing 
+            SET ends_at = starts_at + INTERVAL %s MINUTE
+            WHERE movie_id = %s
+        """, (duration, movie_id))
+        
+        # Nom du film recopié dans le résumé des réservations
+        cursor.execute("UPDATE booking_summary SET movie_name = %s WHERE movie_id = %s", (name, movie_id))
+        bump_catalog_version(cursor)
         connection.commit()
         
-        if cursor.rowcount > 0:
+        if updated_rows > 0:
             return True, f"Film '{name}' mis à jour avec succès"
         else:
             return False, "Film non trouvé"
@@ -203,10 +390,18 @@ def delete_movie(movie_id):
         if result and result[0] > 0:
             return False, "Impossible de supprimer ce film car il a des séances programmées"
         
+        # Les affiches sont supprimées en cascade, leurs fichiers ensuite
+        cursor.execute("SELECT content_hash FROM movieposter WHERE movie_id = %s", (movie_id,))
+        poster_hashes = [row[0] for row in cursor.fetchall()]
+        
         cursor.execute("DELETE FROM movie WHERE id = %s", (movie_id,))
+        deleted_rows = cursor.rowcount
+        bump_catalog_version(cursor)
         connection.commit()
         
-        if cursor.rowcount > 0:
+        remove_unused_poster_files(connection, cursor, poster_hashes)
+        
+        if deleted_rows > 0:
             return True, "Film supprimé avec succès"
         else:
             return False, "Film non trouvé"
@@ -243,6 +438,34 @@ def get_all_rooms():
             cursor.close()
             connection.close()
 
+# Nombre maximal de sièges insérés par requête INSERT multi-lignes
+SEAT_INSERT_BATCH_SIZE = 500
+
+def room_seat_positions(nb_rows, nb_columns):
+    """Positions (rangée, colonne) des sièges d'une salle de nb_rows rangées et nb_columns colonnes"""
+    return [
+        (row_label(row_number), seat_column)
+        for row_number in range(1, nb_rows + 1)
+        for seat_column in range(1, nb_columns + 1)
+    ]
+
+def insert_seats(cursor, room_id, positions, seat_type='normal'):
+    """
+    Crée les sièges d'une salle aux positions (rangée, colonne) données
+    Une requête INSERT multi-lignes par lot de SEAT_INSERT_BATCH_SIZE sièges au lieu d'une par siège
+    Retourne le nombre de sièges créés
+    """
+    for start in range(0, len(positions), SEAT_INSERT_BATCH_SIZE):
+        batch = positions[start:start + SEAT_INSERT_BATCH_SIZE]
+        values = []
+        for seat_row, seat_column in batch:
+            values.extend([seat_type, room_id, seat_row, seat_column])
+        cursor.execute(f"""
+            INSERT INTO seat (type, room_id, seat_row, seat_column)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(batch))}
+        """, values)
+    return len(positions)
+
 def add_room(name, nb_rows, nb_columns):
     """Ajoute une nouvelle salle et crée automatiquement les sièges"""
     connection = get_db_connection()
@@ -259,16 +482,7 @@ def add_room(name, nb_rows, nb_columns):
         room_id = cursor.lastrowid
         
         # Créer les sièges pour la nouvelle salle
-        seats_created = 0
-        for row_number in range(1, nb_rows + 1):
-            row_letter = chr(64 + row_number)  # A, B, C, etc.
-            
-            for seat_column in range(1, nb_columns + 1):
-                cursor.execute("""
-                    INSERT INTO seat (type, room_id, seat_row, seat_column) 
-                    VALUES ('normal', %s, %s, %s)
-                """, (room_id, row_letter, seat_column))
-                seats_created += 1
+        seats_created = insert_seats(cursor, room_id, room_seat_positions(nb_rows, nb_columns))
         
         connection.commit()
         
@@ -283,7 +497,12 @@ def add_room(name, nb_rows, nb_columns):
             connection.close()
 
 def update_room(room_id, name, nb_rows, nb_columns):
-    """Met à jour une salle - permet de changer les dimensions seulement si la salle n'est pas utilisée"""
+    """
+    Met à jour une salle
+    Un changement de dimensions n'ajoute ou ne supprime que les rangées et colonnes concernées :
+    les sièges conservés gardent leur id et leur type. Il est refusé si un siège à supprimer
+    a des réservations.
+    """
     connection = get_db_connection()
     
     if connection is None:
@@ -304,41 +523,53 @@ def update_room(room_id, name, nb_rows, nb_columns):
         # Vérifier si les dimensions changent
         dimensions_changed = (nb_rows != current_rows or nb_columns != current_columns)
         
+        seats_created = seats_removed = 0
         if dimensions_changed:
-            # Vérifier si la salle est utilisée dans des séances
-            if is_room_used_in_showings(room_id):
-                return False, "Impossible de modifier les dimensions de cette salle car elle est utilisée dans des séances. Supprimez d'abord toutes les séances associées."
-            
-            # Si les dimensions changent, il faut recréer tous les sièges
-            # Supprimer tous les sièges existants
-            cursor.execute("DELETE FROM seat WHERE room_id = %s", (room_id,))
-            
-            # Mettre à jour la salle avec les nouvelles dimensions
-            cursor.execute("UPDATE room SET name = %s, nb_rows = %s, nb_columns = %s WHERE id = %s", 
-                         (name, nb_rows, nb_columns, room_id))
+            # Comparer les sièges existants avec ceux des nouvelles dimensions
+            target_positions = room_seat_positions(nb_rows, nb_columns)
+            target_set = set(target_positions)
+            cursor.execute("SELECT id, seat_row, seat_column FROM seat WHERE room_id = %s", (room_id,))
+            kept_positions = set()
+            removed_seat_ids = []
+            for seat_id, seat_row, seat_column in cursor.fetchall():
+                if (seat_row, seat_column) in target_set:
+                    kept_positions.add((seat_row, seat_column))
+                else:
+                    removed_seat_ids.append(seat_id)
             
-            # Recréer les sièges avec les nouvelles dimensions
-            seats_created = 0
-            for row_num in range(1, nb_rows + 1):
-                row_letter = chr(ord('A') + row_num - 1)
-                for seat_column in range(1, nb_columns + 1):
-                    cursor.execute("""
-                        INSERT INTO seat (type, room_id, seat_row, seat_column) 
-                        VALUES ('normal', %s, %s, %s)
-                    """, (room_id, row_letter, seat_column))
-                    seats_created += 1
+            if removed_seat_ids:
+                placeholders = ', '.join(['%s'] * len(removed_seat_ids))
+                cursor.execute(f"SELECT COUNT(*) FROM seatreservation WHERE seat_id IN ({placeholders})", removed_seat_ids)
+                if cursor.fetchone()[0] > 0:
+                    return False, "Impossible de réduire cette salle car des sièges à supprimer ont des réservations. Annulez d'abord ces réservations."
+                
+                # Les sièges en cours de sélection disparaissent avec leurs blocages
+                cursor.execute(f"DELETE FROM seathold WHERE seat_id IN ({placeholders})", removed_seat_ids)
+                cursor.execute(f"DELETE FROM seat WHERE id IN ({placeholders})", removed_seat_ids)
+                seats_removed = len(removed_seat_ids)
             
+            seats_created = insert_seats(
+                cursor, room_id, [position for position in target_positions if position not in kept_positions]
+            )
+        
+        cursor.execute("UPDATE room SET name = %s, nb_rows = %s, nb_columns = %s WHERE id = %s", 
+                     (name, nb_rows, nb_columns, room_id))
+        updated_rows = cursor.rowcount
+        
+        # Nom de la salle recopié dans le résumé des réservations
+        cursor.execute("UPDATE booking_summary SET room_name = %s WHERE room_id = %s", (name, room_id))
+        
+        if dimensions_changed:
+            bump_layout_version(cursor, room_id)
             connection.commit()
-            return True, f"Salle '{name}' mise à jour avec succès (dimensions changées: {seats_created} sièges recréés)"
+            return True, f"Salle '{name}' mise à jour avec succès (dimensions changées: {seats_created} sièges ajoutés, {seats_removed} supprimés)"
+        
+        connection.commit()
+        
+        if updated_rows > 0:
+            return True, f"Salle '{name}' mise à jour avec succès"
         else:
-            # Seul le nom change, mise à jour simple
-            cursor.execute("UPDATE room SET name = %s WHERE id = %s", (name, room_id))
-            connection.commit()
-            
-            if cursor.rowcount > 0:
-                return True, f"Salle '{name}' mise à jour avec succès"
-            else:
-                return False, "Aucune modification effectuée"
+            return False, "Aucune modification effectuée"
         
     except Error as e:
         return False, f"Erreur lors de la mise à jour de la salle: {e}"
@@ -401,9 +632,15 @@ def update_seat_type(seat_id, new_type):
             return False, "Impossible de modifier le type de siège : la salle a des séances avec des réservations"
         
         cursor.execute("UPDATE seat SET type = %s WHERE id = %s", (new_type, seat_id))
+        updated_rows = cursor.rowcount
+        
+        cursor.execute("SELECT room_id FROM seat WHERE id = %s", (seat_id,))
+        seat = cursor.fetchone()
+        if seat:
+            bump_layout_version(cursor, seat[0])
         connection.commit()
         
-        if cursor.rowcount > 0:
+        if updated_rows > 0:
             return True, f"Type de siège mis à jour: {new_type}"
         else:
             return False, "Siège non trouvé"
@@ -417,7 +654,10 @@ def update_seat_type(seat_id, new_type):
             connection.close()
 
 def get_room_seats_grid(room_id):
-    """Récupère tous les sièges d'une salle organisés en grille"""
+    """
+    Récupère tous les sièges d'une salle organisés en grille
+    La grille est sérialisée au format compact de shared/seatmap.py (types et ids des sièges)
+    """
     connection = get_db_connection()
     
     if connection is None:
@@ -437,25 +677,13 @@ def get_room_seats_grid(room_id):
         cursor.execute("""
             SELECT id, seat_row, seat_column, type
             FROM seat 
-            WHERE room_id = %s 
-            ORDER BY seat_row, seat_column
+            WHERE room_id = %s
         """, (room_id,))
         seats = cursor.fetchall()
         
-        # Organiser en grille
-        grid = {}
-        for seat in seats:
-            row = seat['seat_row']
-            if row not in grid:
-                grid[row] = {}
-            grid[row][seat['seat_column']] = {
-                'id': seat['id'],
-                'type': seat['type']
-            }
-        
         return {
             'room': room,
-            'grid': grid
+            'layout': serialize_layout(room['nb_rows'], room['nb_columns'], seats)
         }
         
     except Error as e:
@@ -496,64 +724,6 @@ def get_seat_by_id(seat_id):
 
 # ===== FONCTIONS POUR LES SÉANCES =====
 
-def get_all_showings():
-    """Récupère toutes les séances avec les informations des films et salles"""
-    connection = get_db_connection()
-    
-    if connection is None:
-        return None
-        
-    try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT s.*, m.name as movie_name, m.duration, r.name as room_name
-            FROM showing s
-            JOIN movie m ON s.movie_id = m.id
-            JOIN room r ON s.room_id = r.id
-            ORDER BY s.date, s.starttime
-        """)
-        showings = cursor.fetchall()
-        return showings
-        
-    except Error as e:
-        print(f"Erreur lors de la récupération des séances: {e}")
-        return None
-        
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
-
-def get_showings_today():
-    """Récupère les séances d'aujourd'hui"""
-    connection = get_db_connection()
-    
-    if connection is None:
-        return None
-        
-    try:
-        cursor = connection.cursor(dictionary=True)
-        today = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute("""
-            SELECT s.*, m.name as movie_name, m.duration, r.name as room_name
-            FROM showing s
-            JOIN movie m ON s.movie_id = m.id
-            JOIN room r ON s.room_id = r.id
-            WHERE DATE(s.date) = %s
-            ORDER BY s.starttime
-        """, (today,))
-        showings = cursor.fetchall()
-        return showings
-        
-    except Error as e:
-        print(f"Erreur lors de la récupération des séances: {e}")
-        return None
-        
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
-
 def get_showings_by_movie(movie_id):
     """Récupère toutes les séances d'un film spécifique"""
     connection = get_db_connection()
@@ -681,25 +851,13 @@ def get_showing_seats_grid(showing_id):
             FROM seat s
             LEFT JOIN seatreservation sr ON s.id = sr.seat_id AND sr.showing_id = %s
             WHERE s.room_id = %s
-            ORDER BY s.seat_row, s.seat_column
         """, (showing_id, room['id']))
         seats = cursor.fetchall()
         
-        # Créer la grille
-        grid = []
-        for row_num in range(1, room['nb_rows'] + 1):
-            row_letter = chr(64 + row_num)  # A, B, C, etc.
-            grid_row = []
-            for col in range(1, room['nb_columns'] + 1):
-                # Trouver le siège correspondant
-                seat = next((seat for seat in seats 
-                           if seat['seat_row'] == row_letter and seat['seat_column'] == col), None)
-                grid_row.append(seat)
-            grid.append(grid_row)
-        
+        # Créer la grille (chaque siège est placé directement dans sa case)
         return {
             'room': room,
-            'grid': grid
+            'grid': build_grid(room['nb_rows'], room['nb_columns'], seats)
         }
         
     except Error as e:
@@ -765,6 +923,10 @@ def book_seats(showing_id, seat_ids, user_id):
                 VALUES (%s, %s, %s)
             """, (customer_id, showing_id, seat['id']))
         
+        bump_occupancy_version(cursor, showing_id)
+        
+        # Ligne de la réservation dans la liste d'administration
+        refresh_booking_summaries(cursor, 'booking_id', booking_id)
         connection.commit()
         
         # Préparer les données de retour
@@ -849,6 +1011,10 @@ def book_seats_with_spectators(showing_id, seat_ids, spectators_data, user_id, t
                     VALUES (%s, %s, %s)
                 """, (customer_id, showing_id, seat_id))
         
+        bump_occupancy_version(cursor, showing_id)
+        
+        # Ligne de la réservation dans la liste d'administration
+        refresh_booking_summaries(cursor, 'booking_id', booking_id)
         connection.commit()
         
         # Récupérer les informations de la séance pour la confirmation
@@ -995,58 +1161,14 @@ def get_booking_details(booking_id, user_id):
             cursor.close()
             connection.close()
 
-def get_all_bookings():
-    """Récupère toutes les réservations pour l'administration"""
-    connection = get_db_connection()
-    
-    if connection is None:
-        return None
-        
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT b.id as booking_id, b.price,
-                   s.id as showing_id, s.date, s.starttime,
-                   m.name as movie_name,
-                   r.name as room_name,
-                   a.username, a.email,
-                   COUNT(sr.seat_id) as seat_count,
-                   GROUP_CONCAT(CONCAT(st.seat_row, st.seat_column) ORDER BY st.seat_row, st.seat_column) as seats
-            FROM booking b
-            JOIN showing s ON b.showing_id = s.id
-            JOIN movie m ON s.movie_id = m.id
-            JOIN room r ON s.room_id = r.id
-            JOIN account a ON b.account_id = a.id
-            JOIN seatreservation sr ON sr.showing_id = s.id
-            JOIN customer c ON sr.customer_id = c.id AND c.booking_id = b.id
-            JOIN seat st ON sr.seat_id = st.id
-            GROUP BY b.id, s.id, m.id, r.id, a.id
-            ORDER BY b.id DESC
-        """)
-        
-        bookings = cursor.fetchall()
-        
-        # Convertir le prix et formater les données
-        for booking in bookings:
-            booking['price_euros'] = float(booking['price']) if booking['price'] else 0.0
-            booking['time'] = str(booking['starttime'])
-            # Convertir la liste de places en array
-            if booking['seats']:
-                booking['seats_list'] = booking['seats'].split(',')
-            else:
-                booking['seats_list'] = []
-        
-        return bookings
-        
-    except Error as e:
-        print(f"Erreur lors de la récupération des réservations: {e}")
-        return None
-        
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+def format_booking_summary(booking):
+    """Ajoute à une ligne de booking_summary les champs affichés : prix en euros, date, heure et liste des places"""
+    booking['price_euros'] = float(booking['price']) if booking['price'] else 0.0
+    starts_at = booking['starts_at']
+    booking['date'] = starts_at.date() if starts_at else None
+    booking['time'] = starts_at.strftime('%H:%M:%S') if starts_at else ''
+    booking['seats_list'] = booking['seat_labels'].split(',') if booking['seat_labels'] else []
+    return booking
 
 def cancel_booking(booking_id):
     """Annule une réservation (supprime toutes les données associées)"""
@@ -1059,7 +1181,7 @@ def cancel_booking(booking_id):
         cursor = connection.cursor(dictionary=True)
         
         # Vérifier que la réservation existe
-        cursor.execute("SELECT id FROM booking WHERE id = %s", (booking_id,))
+        cursor.execute("SELECT id, showing_id FROM booking WHERE id = %s", (booking_id,))
         booking = cursor.fetchone()
         
         if not booking:
@@ -1075,9 +1197,22 @@ def cancel_booking(booking_id):
         # Supprimer les clients
         cursor.execute("DELETE FROM customer WHERE booking_id = %s", (booking_id,))
         
+        # Supprimer la réservation de la liste d'administration
+        delete_booking_summary(cursor, booking_id)
+        
+        # Ne plus envoyer les billets de la réservation (un envoi en cours ne pourra plus modifier la ligne)
+        cursor.execute("""
+            UPDATE ticket_outbox
+            SET status = 'dead', last_error = 'Booking cancelled', claim_token = NULL, locked_until = NULL
+            WHERE booking_id = %s AND status IN ('pending', 'sending')
+        """, (booking_id,))
+        
         # Supprimer la réservation principale
         cursor.execute("DELETE FROM booking WHERE id = %s", (booking_id,))
         
+        # Les sièges libérés doivent réapparaître côté utilisateur
+        bump_occupancy_version(cursor, booking['showing_id'])
+        
         connection.commit()
         
         return True, "Réservation annulée avec succès"
@@ -1109,6 +1244,13 @@ def add_showing(date, starttime, baseprice, room_id, movie_id):
         
         movie_duration = movie_result[1]  # durée en minutes
         
+        # Bornes horaires de la séance (utilisées pour filtrer les séances terminées)
+        try:
+            starts_at = parse_time_safely(date, starttime)
+        except ValueError as e:
+            return False, str(e)
+        ends_at = starts_at + timedelta(minutes=movie_duration)
+        
         # Vérifier que la salle existe
         cursor.execute("SELECT id FROM room WHERE id = %s", (room_id,))
         if not cursor.fetchone():
@@ -1126,11 +1268,8 @@ def add_showing(date, starttime, baseprice, room_id, movie_id):
         existing_showings = cursor.fetchall()
         
         if existing_showings:
-            from datetime import datetime, timedelta
-            
-            # Convertir la nouvelle heure de début
-            new_start = parse_time_safely(date, starttime)
-            new_end = new_start + timedelta(minutes=movie_duration)
+            new_start = starts_at
+            new_end = ends_at
             
             for existing in existing_showings:
                 existing_start = parse_time_safely(date, existing[1])
@@ -1149,10 +1288,11 @@ def add_showing(date, starttime, baseprice, room_id, movie_id):
         
         # Ajouter la séance
         cursor.execute("""
-            INSERT INTO showing (date, starttime, baseprice, room_id, movie_id)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (date, starttime, baseprice, room_id, movie_id))
+            INSERT INTO showing (date, starttime, baseprice, room_id, movie_id, starts_at, ends_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (date, starttime, baseprice, room_id, movie_id, starts_at, ends_at))
         
+        bump_catalog_version(cursor)
         connection.commit()
         return True, "Séance ajoutée avec succès"
         
@@ -1188,6 +1328,13 @@ def update_showing(showing_id, date, starttime, baseprice, room_id, movie_id):
         
         movie_duration = movie_result[1]  # durée en minutes
         
+        # Bornes horaires de la séance (utilisées pour filtrer les séances terminées)
+        try:
+            starts_at = parse_time_safely(date, starttime)
+        except ValueError as e:
+            return False, str(e)
+        ends_at = starts_at + timedelta(minutes=movie_duration)
+        
         # Vérifier que la salle existe
         cursor.execute("SELECT id FROM room WHERE id = %s", (room_id,))
         if not cursor.fetchone():
@@ -1205,11 +1352,8 @@ def update_showing(showing_id, date, starttime, baseprice, room_id, movie_id):
         existing_showings = cursor.fetchall()
         
         if existing_showings:
-            from datetime import datetime, timedelta
-            
-            # Convertir la nouvelle heure de début
-            new_start = parse_time_safely(date, starttime)
-            new_end = new_start + timedelta(minutes=movie_duration)
+            new_start = starts_at
+            new_end = ends_at
             
             for existing in existing_showings:
                 existing_start = parse_time_safely(date, existing[1])
@@ -1229,10 +1373,15 @@ def update_showing(showing_id, date, starttime, baseprice, room_id, movie_id):
         # Mettre à jour la séance
         cursor.execute("""
             UPDATE showing 
-            SET date = %s, starttime = %s, baseprice = %s, room_id = %s, movie_id = %s
+            SET date = %s, starttime = %s, baseprice = %s, room_id = %s, movie_id = %s,
+                starts_at = %s, ends_at = %s
             WHERE id = %s
-        """, (date, starttime, baseprice, room_id, movie_id, showing_id))
+        """, (date, starttime, baseprice, room_id, movie_id, starts_at, ends_at, showing_id))
+        
+        # Film, salle et horaire sont recopiés dans le résumé des réservations de la séance
+        refresh_booking_summaries(cursor, 'showing_id', showing_id)
         
+        bump_catalog_version(cursor)
         connection.commit()
         return True, "Séance mise à jour avec succès"
         
@@ -1269,6 +1418,7 @@ def delete_showing(showing_id):
         # Supprimer la séance
         cursor.execute("DELETE FROM showing WHERE id = %s", (showing_id,))
         
+        bump_catalog_version(cursor)
         connection.commit()
         return True, "Séance supprimée avec succès"
         
@@ -1281,10 +1431,190 @@ def delete_showing(showing_id):
             cursor.close()
             connection.close()
 
+# ===== LISTES PAGINÉES (API D'ADMINISTRATION) =====
+
+# Taille de page par défaut et maximale des listes paginées
+LISTING_PAGE_SIZE = 50
+LISTING_MAX_PAGE_SIZE = 200
+
+def build_listing_filters(filters, table):
+    """
+    Construit les conditions SQL communes aux listes de séances et de réservations
+    filters peut contenir date_from, date_to (dates incluses), movie_id, room_id,
+    account_id et account (début du nom d'utilisateur ou de l'email) ; les conditions
+    portent sur l'alias table : s (showing) ou bs (booking_summary, seul à avoir les
+    colonnes du compte)
+    """
+    conditions = []
+    params = []
+    
+    if filters.get('date_from'):
+        conditions.append(f"{table}.starts_at >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        conditions.append(f"{table}.starts_at < %s")
+        params.append(filters['date_to'] + timedelta(days=1))
+    if filters.get('movie_id'):
+        conditions.append(f"{table}.movie_id = %s")
+        params.append(filters['movie_id'])
+    if filters.get('room_id'):
+        conditions.append(f"{table}.room_id = %s")
+        params.append(filters['room_id'])
+    if filters.get('account_id'):
+        conditions.append(f"{table}.account_id = %s")
+        params.append(filters['account_id'])
+    if filters.get('account'):
+        conditions.append(f"({table}.username LIKE %s OR {table}.account_email LIKE %s)")
+        prefix = filters['account'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        params.extend([prefix, prefix])
+    
+    return conditions, params
+
+def get_showings_page(filters, after=None, limit=LISTING_PAGE_SIZE):
+    """
+    Récupère une page de séances triées par horaire, filtrées (voir build_listing_filters)
+    Pagination par clé (keyset) : after est le couple (starts_at, id) de la dernière séance
+    de la page précédente, le coût d'une page ne dépend donc pas de la taille de l'historique
+    Retourne (séances, curseur de la page suivante ou None)
+    """
+    connection = get_db_connection()
+    
+    if connection is None:
+        return None, None
+        
+    try:
+        cursor = connection.cursor(dictionary=True)
+        conditions, params = build_listing_filters(filters, 's')
+        if after:
+            # Écrit sans constructeur de ligne, que MySQL n'utilise pas comme plage d'index
+            conditions.append("(s.starts_at > %s OR (s.starts_at = %s AND s.id > %s))")
+            params.extend([after[0], after[0], after[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        cursor.execute(f"""
+            SELECT s.*, m.name as movie_name, m.duration, r.name as room_name
+            FROM showing s
+            JOIN movie m ON s.movie_id = m.id
+            JOIN room r ON s.room_id = r.id
+            {where}
+            ORDER BY s.starts_at, s.id
+            LIMIT %s
+        """, (*params, limit + 1))
+        showings = cursor.fetchall()
+        
+        # Une ligne de plus que demandé indique qu'il existe une page suivante
+        next_after = None
+        if len(showings) > limit:
+            showings = showings[:limit]
+            next_after = (showings[-1]['starts_at'], showings[-1]['id'])
+        return showings, next_after
+        
+    except Error as e:
+        print(f"Erreur lors de la récupération des séances: {e}")
+        return None, None
+        
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_bookings_page(filters, before=None, limit=LISTING_PAGE_SIZE):
+    """
+    Récupère une page de réservations, de la plus récente à la plus ancienne, filtrées
+    (voir build_listing_filters) ; before est l'id de la dernière réservation de la page précédente
+    Lit uniquement la table booking_summary (une ligne par réservation, places comprises)
+    Retourne (réservations, curseur de la page suivante ou None)
+    """
+    connection = get_db_connection()
+    
+    if connection is None:
+        return None, None
+        
+    try:
+        cursor = connection.cursor(dictionary=True)
+        conditions, params = build_listing_filters(filters, 'bs')
+        if before:
+            conditions.append("bs.booking_id < %s")
+            params.append(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        cursor.execute(f"""
+            SELECT bs.booking_id, bs.price, bs.showing_id, bs.starts_at,
+                   bs.movie_name, bs.room_name,
+                   bs.username, bs.account_email as email,
+                   bs.seat_count, bs.seat_labels
+            FROM booking_summary bs
+            {where}
+            ORDER BY bs.booking_id DESC
+            LIMIT %s
+        """, (*params, limit + 1))
+        bookings = cursor.fetchall()
+        
+        next_before = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            next_before = bookings[-1]['booking_id']
+        
+        for booking in bookings:
+            format_booking_summary(booking)
+        
+        return bookings, next_before
+        
+    except Error as e:
+        print(f"Erreur lors de la récupération des réservations: {e}")
+        return None, None
+        
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_bookings_stats(filters):
+    """Calcule les totaux des réservations filtrées : nombre, places, chiffre d'affaires, réservations du jour"""
+    connection = get_db_connection()
+    
+    if connection is None:
+        return None
+        
+    try:
+        cursor = connection.cursor(dictionary=True)
+        conditions, params = build_listing_filters(filters, 'bs')
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        today = datetime.now().date()
+        
+        cursor.execute(f"""
+            SELECT COUNT(*) as booking_count,
+                   COALESCE(SUM(bs.price), 0) as revenue,
+                   COALESCE(SUM(bs.starts_at >= %s AND bs.starts_at < %s), 0) as today_count,
+                   COALESCE(SUM(bs.seat_count), 0) as seat_count
+            FROM booking_summary bs
+            {where}
+        """, (today, today + timedelta(days=1), *params))
+        stats = cursor.fetchone()
+        
+        return {
+            'booking_count': int(stats['booking_count']),
+            'seat_count': int(stats['seat_count']),
+            'revenue': float(stats['revenue']),
+            'today_count': int(stats['today_count'])
+        }
+        
+    except Error as e:
+        print(f"Erreur lors du calcul des statistiques des réservations: {e}")
+        return None
+        
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
 # ===== FONCTIONS POUR LES AFFICHES DE FILMS =====
 
 def get_movie_poster(movie_id):
-    """Récupère l'affiche principale d'un film"""
+    """
+    Récupère l'affiche principale d'un film (métadonnées et empreinte du fichier)
+    L'image elle-même n'est renvoyée que pour les affiches pas encore exportées vers le stockage de fichiers
+    """
     connection = get_db_connection()
     
     if connection is None:
@@ -1293,7 +1623,8 @@ def get_movie_poster(movie_id):
     try:
         cursor = connection.cursor(dictionary=True)
         cursor.execute("""
-            SELECT image, name, mime_type, file_size
+            SELECT content_hash, name, mime_type, file_size,
+                   CASE WHEN content_hash IS NULL THEN image END AS image
             FROM movieposter 
             WHERE movie_id = %s AND is_primary = TRUE
             LIMIT 1
@@ -1311,8 +1642,53 @@ def get_movie_poster(movie_id):
             cursor.close()
             connection.close()
 
+# Attente maximale (en secondes) du verrou d'un fichier d'affiche
+POSTER_FILE_LOCK_TIMEOUT = 10
+
+def poster_file_lock_name(content_hash):
+    """Nom du verrou MySQL (GET_LOCK, 64 caractères au plus) d'un fichier d'affiche"""
+    return f"poster:{content_hash[:56]}"
+
+def acquire_poster_file_lock(cursor, content_hash):
+    """
+    Prend le verrou d'un fichier d'affiche, partagé par toutes les connexions
+    Il sérialise l'enregistrement d'une affiche (écriture du fichier jusqu'au commit de sa ligne)
+    et la suppression du fichier quand il n'est plus référencé
+    Retourne False si le verrou n'a pas pu être obtenu à temps
+    """
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (poster_file_lock_name(content_hash), POSTER_FILE_LOCK_TIMEOUT))
+    return cursor.fetchone()[0] == 1
+
+def release_poster_file_lock(cursor, content_hash):
+    """Rend le verrou d'un fichier d'affiche"""
+    cursor.execute("SELECT RELEASE_LOCK(%s)", (poster_file_lock_name(content_hash),))
+    cursor.fetchone()
+
+def remove_unused_poster_files(connection, cursor, content_hashes):
+    """
+    Supprime du stockage les fichiers d'affiche qui ne sont plus référencés
+    À appeler après le commit, un même fichier pouvant être partagé par plusieurs affiches identiques
+    Le nombre de références est relu sous le verrou du fichier, pour ne pas supprimer le fichier
+    d'un enregistrement de la même image en cours ; sans verrou, le fichier est conservé
+    """
+    for content_hash in set(filter(None, content_hashes)):
+        if not acquire_poster_file_lock(cursor, content_hash):
+            continue
+        try:
+            # Nouvelle transaction : lire les lignes validées avant la prise du verrou
+            connection.commit()
+            cursor.execute("SELECT COUNT(*) FROM movieposter WHERE content_hash = %s", (content_hash,))
+            if cursor.fetchone()[0] == 0:
+                get_poster_store().delete(content_hash)
+        finally:
+            release_poster_file_lock(cursor, content_hash)
+
 def save_movie_poster(movie_id, filename, mime_type, image_data):
-    """Sauvegarde ou met à jour l'affiche d'un film"""
+    """
+    Sauvegarde ou met à jour l'affiche d'un film
+    L'image est écrite dans le stockage de fichiers, la base ne garde que ses métadonnées
+    Les miniatures sont générées ensuite en arrière-plan (shared/poster_derivatives.py)
+    """
     connection = get_db_connection()
     
     if connection is None:
@@ -1321,17 +1697,42 @@ def save_movie_poster(movie_id, filename, mime_type, image_data):
     try:
         cursor = connection.cursor()
         
-        # Supprimer l'affiche existante s'il y en a une
-        cursor.execute("DELETE FROM movieposter WHERE movie_id = %s", (movie_id,))
+        # Le verrou du fichier est gardé jusqu'au commit de la ligne qui le référence,
+        # pour qu'une suppression concurrente de la même image ne retire pas le fichier entre-temps
+        content_hash = compute_content_hash(image_data)
+        if not acquire_poster_file_lock(cursor, content_hash):
+            return False, "Erreur lors de la sauvegarde: l'affiche est en cours de modification, réessayez"
+        
+        try:
+            # Écrire le fichier avant la ligne qui le référence
+            try:
+                get_poster_store().put(image_data)
+            except OSError as e:
+                print(f"Erreur lors de l'écriture du fichier de l'affiche: {e}")
+                return False, f"Erreur lors de la sauvegarde: {str(e)}"
+            
+            # Supprimer l'affiche existante s'il y en a une
+            cursor.execute("SELECT content_hash FROM movieposter WHERE movie_id = %s", (movie_id,))
+            old_hashes = [row[0] for row in cursor.fetchall()]
+            cursor.execute("DELETE FROM movieposter WHERE movie_id = %s", (movie_id,))
+            
+            # Insérer la nouvelle affiche
+            file_size = len(image_data)
+            cursor.execute("""
+                INSERT INTO movieposter (movie_id, name, mime_type, content_hash, file_size, is_primary)
+                VALUES (%s, %s, %s, %s, %s, TRUE)
+            """, (movie_id, filename, mime_type, content_hash, file_size))
+            
+            bump_catalog_version(cursor)
+            connection.commit()
+        finally:
+            release_poster_file_lock(cursor, content_hash)
         
-        # Insérer la nouvelle affiche
-        file_size = len(image_data)
-        cursor.execute("""
-            INSERT INTO movieposter (movie_id, name, mime_type, image, file_size, is_primary)
-            VALUES (%s, %s, %s, %s, %s, TRUE)
-        """, (movie_id, filename, mime_type, image_data, file_size))
+        remove_unused_poster_files(connection, cursor, old_hashes)
         
-        connection.commit()
+        # Miniatures (carte, détail) en WebP et JPEG, générées en arrière-plan
+        if content_hash not in old_hashes:
+            schedule_derivatives(get_poster_store(), content_hash)
         return True, "Affiche téléchargée avec succès"
         
     except Error as e:
@@ -1351,19 +1752,21 @@ def delete_movie_poster(movie_id):
         return False, "Erreur de connexion à la base de données"
         
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         
         # Vérifier s'il y a une affiche à supprimer
-        cursor.execute("SELECT COUNT(*) as count FROM movieposter WHERE movie_id = %s", (movie_id,))
-        result = cursor.fetchone()
+        cursor.execute("SELECT content_hash FROM movieposter WHERE movie_id = %s", (movie_id,))
+        old_hashes = [row[0] for row in cursor.fetchall()]
         
-        if result['count'] == 0:
+        if not old_hashes:
             return False, "Aucune affiche à supprimer"
         
         # Supprimer l'affiche
         cursor.execute("DELETE FROM movieposter WHERE movie_id = %s", (movie_id,))
+        bump_catalog_version(cursor)
         connection.commit()
         
+        remove_unused_poster_files(connection, cursor, old_hashes)
         return True, "Affiche supprimée avec succès"
         
     except Error as e:
@@ -1379,28 +1782,6 @@ def delete_movie_poster(movie_id):
 
 # ===== FONCTIONS UTILITAIRES DE VALIDATION =====
 
-def is_room_used_in_showings(room_id):
-    """Vérifie si une salle est utilisée dans des séances"""
-    connection = get_db_connection()
-    
-    if connection is None:
-        return False
-        
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT COUNT(*) FROM showing WHERE room_id = %s", (room_id,))
-        count = cursor.fetchone()[0]
-        return count > 0
-        
-    except Error as e:
-        print(f"Erreur lors de la vérification d'utilisation de la salle: {e}")
-        return False
-        
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
-
 def has_room_bookings_for_seat(seat_id):
     """Vérifie si la salle contenant un siège a des séances avec des réservations"""
     connection = get_db_connection()
@@ -5,12 +5,13 @@ Cinemacousas - Version Administration uniquement
 Interface d'administration pour la gestion du cinéma
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash, Response
+from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash, Response, send_file
 from flask_cors import CORS
 import modele  # Import du module pour la gestion de la base de données
+from shared.poster_store import content_hash
 import importlib
-from datetime import datetime, date
-import time
+from datetime import datetime, date, timedelta
+from decimal import Decimal
 import os
 from dotenv import load_dotenv
 
@@ -23,6 +24,9 @@ importlib.reload(modele)
 app = Flask(__name__)
 CORS(app)
 
+# Une seule connexion du pool par requête, partagée par toutes les fonctions de modele
+modele.init_db_request_scope(app)
+
 # Configuration depuis les variables d'environnement
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_POSTER_SIZE_MB', 5)) * 1024 * 1024  # Taille max en bytes
@@ -36,17 +40,19 @@ POSTER_CACHE_SHORT_MAX_AGE = int(os.getenv('POSTER_CACHE_SHORT_MAX_AGE', 300))
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD_REQUIRED = os.getenv('ADMIN_PASSWORD_REQUIRED', 'False').lower() == 'true'
 
-# Cache timestamp pour le cache-busting des affiches
-POSTER_CACHE_TIMESTAMP = str(int(time.time()))
-
-def get_poster_url_with_cache_busting(movie_id):
-    """Génère une URL d'affiche avec paramètre de cache-busting"""
-    return url_for('movie_poster', movie_id=movie_id, v=POSTER_CACHE_TIMESTAMP)
+def get_poster_url(movie):
+    """
+    Génère l'URL de l'affiche d'un film, versionnée par l'empreinte de son contenu
+    Chaque affiche a sa propre URL : en remplacer une ne change pas celles des autres
+    """
+    if not movie.get('poster_id'):
+        return url_for('static', filename='img/default-poster.svg')
+    return url_for('movie_poster', movie_id=movie['id'], v=movie.get('poster_hash'))
 
 # Rendre la fonction disponible dans les templates
 @app.context_processor
 def utility_processor():
-    return dict(get_poster_url_with_cache_busting=get_poster_url_with_cache_busting)
+    return dict(get_poster_url=get_poster_url)
 
 # Ajouter des fonctions helper pour les templates
 @app.template_global()
@@ -69,24 +75,49 @@ def movie_poster(movie_id):
         # Retourner une image par défaut ou une erreur 404
         return Response("Affiche non trouvée", status=404)
     
-    # Vérifier si c'est une requête avec cache-busting
-    version = request.args.get('v', '')
+    # ETag fort : l'empreinte du contenu (calculée à la volée pour les affiches pas encore exportées)
+    etag = poster['content_hash'] or content_hash(poster['image'])
     
-    # Cache plus court pour permettre les mises à jour
+    # Une URL versionnée par l'empreinte actuelle ne change jamais de contenu
     cache_control = f'public, max-age={POSTER_CACHE_SHORT_MAX_AGE}'  # Cache configuré
-    if version:
-        # Si version spécifiée, cache plus long mais avec ETag
-        cache_control = f'public, max-age={POSTER_CACHE_MAX_AGE}'  # Cache configuré
-    
-    return Response(
-        poster['image'],
-        mimetype=poster['mime_type'],
-        headers={
-            'Content-Disposition': f'inline; filename="{poster["name"]}"',
-            'Cache-Control': cache_control,
-            'ETag': f'"{movie_id}-{len(poster["image"])}"'  # ETag basé sur l'ID et la taille
-        }
-    )
+    if request.args.get('v') == etag:
+        cache_control = f'public, max-age={POSTER_CACHE_MAX_AGE}, immutable'  # Cache configuré
+    
+    # Revalidation : 304 sans lire le fichier
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+    
+    if poster['content_hash'] is None:
+        # Affiche pas encore exportée vers le stockage de fichiers
+        response = Response(
+            poster['image'],
+            mimetype=poster['mime_type'],
+            headers={
+                'Content-Disposition': f'inline; filename="{poster["name"]}"',
+                'Cache-Control': cache_control
+            }
+        )
+        response.set_etag(etag)
+        return response
+    
+    # Fichier envoyé directement par le serveur (sendfile si disponible), avec support des Range
+    try:
+        response = send_file(
+            modele.get_poster_store().path(poster['content_hash']),
+            mimetype=poster['mime_type'],
+            download_name=poster['name'],
+            as_attachment=False,
+            conditional=True,
+            etag=etag
+        )
+    except FileNotFoundError:
+        return Response("Fichier de l'affiche introuvable", status=404)
+    
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 # ===== ROUTES D'AUTHENTIFICATION SIMPLIFIÉE =====
 
@@ -130,14 +161,13 @@ def admin_dashboard():
         flash('Accès administrateur requis', 'error')
         return redirect(url_for('login_form'))
     
+    # Les séances et les réservations sont chargées par la page via /api/showings et /api/bookings
     movies = modele.get_all_movies()
     rooms = modele.get_all_rooms()
-    showings = modele.get_all_showings()
-    bookings = modele.get_all_bookings()
     
     today = date.today()
     
-    return render_template('admin.html', movies=movies, rooms=rooms, showings=showings, bookings=bookings, today=today)
+    return render_template('admin.html', movies=movies, rooms=rooms, today=today)
 
 @app.route('/admin/movie', methods=['POST'])
 def add_movie():
@@ -238,11 +268,6 @@ def upload_movie_poster(movie_id):
         # Sauvegarder l'affiche
         success, message = modele.save_movie_poster(movie_id, file.filename, file.content_type, file_content)
         
-        # Mettre à jour le timestamp du cache pour forcer le rafraîchissement
-        if success:
-            global POSTER_CACHE_TIMESTAMP
-            POSTER_CACHE_TIMESTAMP = str(int(time.time()))
-        
         flash(message, 'success' if success else 'error')
         
     except Exception as e:
@@ -258,11 +283,6 @@ def delete_movie_poster_route(movie_id):
     
     success, message = modele.delete_movie_poster(movie_id)
     
-    # Mettre à jour le timestamp du cache pour forcer le rafraîchissement
-    if success:
-        global POSTER_CACHE_TIMESTAMP
-        POSTER_CACHE_TIMESTAMP = str(int(time.time()))
-    
     flash(message, 'success' if success else 'error')
     return redirect(url_for('admin_dashboard'))
 
@@ -441,6 +461,98 @@ def update_seat_type(seat_id):
     success, message = modele.update_seat_type(seat_id, new_type)
     return jsonify({'success': success, 'message': message})
 
+def parse_listing_filters(allowed):
+    """Lit les filtres d'une liste paginée dans la query string (ValueError si l'un est invalide)"""
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        if name in allowed and request.args.get(name):
+            filters[name] = datetime.strptime(request.args[name], '%Y-%m-%d').date()
+    for name in ('movie_id', 'room_id', 'account_id'):
+        if name in allowed and request.args.get(name):
+            filters[name] = int(request.args[name])
+    if 'account' in allowed and request.args.get('account', '').strip():
+        filters['account'] = request.args['account'].strip()
+    return filters
+
+def parse_page_size():
+    """Lit la taille de page demandée, bornée à LISTING_MAX_PAGE_SIZE"""
+    limit = int(request.args.get('limit', modele.LISTING_PAGE_SIZE))
+    return max(1, min(limit, modele.LISTING_MAX_PAGE_SIZE))
+
+def to_json_row(row):
+    """Convertit une ligne de la base en dictionnaire sérialisable en JSON (dates ISO, heures HH:MM:SS)"""
+    result = {}
+    for key, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, timedelta):
+            total_seconds = int(value.total_seconds())
+            value = f"{total_seconds // 3600:02d}:{total_seconds % 3600 // 60:02d}:{total_seconds % 60:02d}"
+        elif isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (bytes, bytearray)):
+            continue
+        result[key] = value
+    return result
+
+@app.route('/api/showings')
+def api_showings():
+    """
+    API paginée des séances, triées par horaire
+    Filtres : date_from, date_to (AAAA-MM-JJ), movie_id, room_id ; pagination : limit, cursor
+    """
+    if 'is_admin' not in session:
+        return jsonify({'error': 'Accès non autorisé'}), 401
+    
+    try:
+        filters = parse_listing_filters({'date_from', 'date_to', 'movie_id', 'room_id'})
+        limit = parse_page_size()
+        after = None
+        if request.args.get('cursor'):
+            starts_at, showing_id = request.args['cursor'].rsplit(',', 1)
+            after = (datetime.fromisoformat(starts_at), int(showing_id))
+    except ValueError:
+        return jsonify({'error': 'Paramètres invalides'}), 400
+    
+    showings, next_after = modele.get_showings_page(filters, after, limit)
+    if showings is None:
+        return jsonify({'error': 'Erreur de base de données'}), 500
+    
+    return jsonify({
+        'showings': [to_json_row(showing) for showing in showings],
+        'next_cursor': f"{next_after[0].isoformat()},{next_after[1]}" if next_after else None
+    })
+
+@app.route('/api/bookings')
+def api_bookings():
+    """
+    API paginée des réservations, de la plus récente à la plus ancienne
+    Filtres : date_from, date_to (date de la séance), movie_id, room_id, account_id,
+    account (début du nom d'utilisateur ou de l'email) ; pagination : limit, cursor
+    La première page contient aussi les totaux des réservations filtrées
+    """
+    if 'is_admin' not in session:
+        return jsonify({'error': 'Accès non autorisé'}), 401
+    
+    try:
+        filters = parse_listing_filters({'date_from', 'date_to', 'movie_id', 'room_id', 'account_id', 'account'})
+        limit = parse_page_size()
+        before = int(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return jsonify({'error': 'Paramètres invalides'}), 400
+    
+    bookings, next_before = modele.get_bookings_page(filters, before, limit)
+    if bookings is None:
+        return jsonify({'error': 'Erreur de base de données'}), 500
+    
+    result = {
+        'bookings': [to_json_row(booking) for booking in bookings],
+        'next_cursor': str(next_before) if next_before else None
+    }
+    if before is None:
+        result['stats'] = modele.get_bookings_stats(filters)
+    return jsonify(result)
+
 # Point d'entrée du programme
 if __name__ == "__main__":
     # Configuration depuis les variables d'environnement
@@ -39,9 +39,20 @@ document.addEventListener('DOMContentLoaded', function() {
     
     function generateSeatsGrid(data) {
         console.log('Données des sièges:', data);
-        const { room, grid } = data;
+        const { layout } = data;
         seatsGrid.innerHTML = '';
         
+        // Format compact (shared/seatmap.py) : un caractère de type par case, rangée par rangée,
+        // et les ids des sièges en séries d'ids consécutifs
+        const seatTypes = { n: 'normal', p: 'pmr', s: 'stair', e: 'empty' };
+        const seatIds = [];
+        layout.id_runs.forEach(([firstId, count]) => {
+            for (let offset = 0; offset < count; offset++) {
+                seatIds.push(firstId + offset);
+            }
+        });
+        let nextSeat = 0;
+        
         // Ajouter la ligne d'en-têtes de colonnes
         const headerRow = document.createElement('div');
         headerRow.className = 'column-headers-row';
@@ -52,7 +63,7 @@ document.addEventListener('DOMContentLoaded', function() {
         headerRow.appendChild(headerSpacer);
         
         // En-têtes de colonnes (1, 2, 3, ...)
-        for (let colIndex = 1; colIndex <= room.nb_columns; colIndex++) {
+        for (let colIndex = 1; colIndex <= layout.columns; colIndex++) {
             const headerDiv = document.createElement('div');
             headerDiv.className = 'column-header';
             headerDiv.textContent = colIndex;
@@ -61,9 +72,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         seatsGrid.appendChild(headerRow);
         
-        // Générer les rangées (A, B, C, ...)
-        for (let rowIndex = 1; rowIndex <= room.nb_rows; rowIndex++) {
-            const rowLetter = String.fromCharCode(64 + rowIndex);
+        // Générer les rangées (A, B, C, ..., Z, AA, AB, ...)
+        for (let rowIndex = 0; rowIndex < layout.rows; rowIndex++) {
+            const rowLetter = layout.row_labels[rowIndex];
             const rowDiv = document.createElement('div');
             rowDiv.className = 'seats-row';
             
@@ -74,18 +85,19 @@ document.addEventListener('DOMContentLoaded', function() {
             rowDiv.appendChild(rowLabel);
             
             // Sièges de la rangée
-            for (let colIndex = 1; colIndex <= room.nb_columns; colIndex++) {
+            for (let colIndex = 0; colIndex < layout.columns; colIndex++) {
                 const seatDiv = document.createElement('div');
                 seatDiv.className = 'seat-admin';
                 // Supprimer l'affichage du numéro
                 // seatDiv.textContent = colIndex;
                 
                 // Récupérer les données du siège
-                const seatData = grid[rowLetter] && grid[rowLetter][colIndex];
-                if (seatData) {
-                    seatDiv.classList.add(seatData.type);
-                    seatDiv.dataset.seatId = seatData.id;
-                    seatDiv.dataset.currentType = seatData.type;
+                const typeCode = layout.types[rowIndex * layout.columns + colIndex];
+                if (typeCode !== '.') {
+                    const seatType = seatTypes[typeCode];
+                    seatDiv.classList.add(seatType);
+                    seatDiv.dataset.seatId = seatIds[nextSeat++];
+                    seatDiv.dataset.currentType = seatType;
                     
                     // Gestionnaire de clic pour changer le type
                     seatDiv.addEventListener('click', function() {
@@ -179,4 +191,193 @@ document.addEventListener('DOMContentLoaded', function() {
             }, 1000);
         });
     });
+
+
+    // Listes paginées des séances et des réservations, chargées page par page depuis l'API
+    function escapeHtml(value) {
+        return String(value ?? '').replace(/[&<>"']/g, char => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        })[char]);
+    }
+
+    function formatDate(isoDate) {
+        if (!isoDate) return '';
+        const [year, month, day] = isoDate.slice(0, 10).split('-');
+        return `${day}/${month}/${year}`;
+    }
+
+    function formatPrice(euros) {
+        return `${Number(euros).toFixed(2)}€`;
+    }
+
+    function createListing({ name, url, filtersForm, tableBody, moreButton, renderRow, onFirstPage }) {
+        let cursor = null;
+        let loading = false;
+        // Numéro de requête, pour ignorer les réponses d'un filtre remplacé entre-temps
+        let generation = 0;
+
+        async function loadPage(reset) {
+            if (loading && !reset) return;
+            const current = reset ? ++generation : generation;
+            if (reset) cursor = null;
+            loading = true;
+            moreButton.disabled = true;
+
+            const params = new URLSearchParams();
+            new FormData(filtersForm).forEach((value, key) => {
+                if (value) params.append(key, value);
+            });
+            if (cursor) params.append('cursor', cursor);
+
+            try {
+                const response = await fetch(`${url}?${params}`);
+                const data = await response.json();
+                if (current !== generation) return;
+
+                if (data.error) {
+                    tableBody.innerHTML = `<tr><td colspan="7" class="text-center text-danger">${escapeHtml(data.error)}</td></tr>`;
+                    moreButton.classList.add('d-none');
+                    return;
+                }
+
+                const rows = data[name];
+                if (reset) {
+                    tableBody.innerHTML = rows.length ? '' :
+                        '<tr><td colspan="7" class="text-center text-muted">Aucun résultat</td></tr>';
+                    if (onFirstPage) onFirstPage(data);
+                }
+                tableBody.insertAdjacentHTML('beforeend', rows.map(renderRow).join(''));
+
+                cursor = data.next_cursor;
+                moreButton.classList.toggle('d-none', !cursor);
+            } catch (error) {
+                console.error('Erreur:', error);
+                if (current === generation) {
+                    alert('Erreur lors du chargement de la liste');
+                }
+            } finally {
+                if (current === generation) {
+                    loading = false;
+                    moreButton.disabled = false;
+                }
+            }
+        }
+
+        moreButton.addEventListener('click', () => loadPage(false));
+
+        // Recharger la première page quand un filtre change (avec un délai pour la saisie)
+        let filterTimer = null;
+        filtersForm.addEventListener('submit', event => event.preventDefault());
+        filtersForm.addEventListener('input', () => {
+            clearTimeout(filterTimer);
+            filterTimer = setTimeout(() => loadPage(true), 300);
+        });
+
+        loadPage(true);
+    }
+
+    const showingsById = new Map();
+    const editShowingModal = document.getElementById('editShowingModal');
+
+    function renderShowingRow(showing) {
+        showingsById.set(String(showing.id), showing);
+        return `
+            <tr>
+                <td>${showing.id}</td>
+                <td>${formatDate(showing.date)}</td>
+                <td>${escapeHtml(showing.starttime)}</td>
+                <td>${escapeHtml(showing.movie_name)}</td>
+                <td>${escapeHtml(showing.room_name)}</td>
+                <td>${formatPrice(showing.baseprice / 100)}</td>
+                <td class="actions-inline">
+                    <button type="button" class="btn btn-sm btn-warning me-1" data-bs-toggle="modal" data-bs-target="#editShowingModal" data-showing-id="${showing.id}">
+                        <span class="material-symbols-outlined">edit</span>
+                    </button>
+                    <form method="POST" action="/admin/showing/${showing.id}/delete" class="inline-form">
+                        <button type="submit" class="btn btn-sm btn-danger" onclick="return confirm('Êtes-vous sûr de vouloir supprimer cette séance ?')">
+                            <span class="material-symbols-outlined">delete</span>
+                        </button>
+                    </form>
+                </td>
+            </tr>`;
+    }
+
+    // Remplir la modale d'édition avec la séance du bouton cliqué
+    editShowingModal.addEventListener('show.bs.modal', function(event) {
+        const showing = showingsById.get(event.relatedTarget.dataset.showingId);
+        const form = this.querySelector('form');
+        form.action = `/admin/showing/${showing.id}/update`;
+        form.elements.date.value = showing.date.slice(0, 10);
+        form.elements.starttime.value = showing.starttime.slice(0, 5);
+        form.elements.baseprice.value = (showing.baseprice / 100).toFixed(2);
+        form.elements.room_id.value = showing.room_id;
+        form.elements.movie_id.value = showing.movie_id;
+        this.querySelector('[data-field="movie_name"]').textContent = showing.movie_name;
+    });
+
+    function renderBookingRow(booking) {
+        const seats = booking.seats_list
+            .map(seat => `<span class="badge bg-light text-dark me-1">${escapeHtml(seat)}</span>`)
+            .join('');
+        return `
+            <tr>
+                <td><strong>#${booking.booking_id}</strong></td>
+                <td>
+                    <div class="fw-bold">${escapeHtml(booking.username)}</div>
+                    <small class="text-muted">${escapeHtml(booking.email)}</small>
+                </td>
+                <td>${escapeHtml(booking.movie_name)}</td>
+                <td>
+                    <div>${formatDate(booking.date)}</div>
+                    <small class="text-muted">${escapeHtml(booking.time)} - ${escapeHtml(booking.room_name)}</small>
+                </td>
+                <td>
+                    <span class="badge bg-info">${booking.seat_count} place(s)</span>
+                    <div class="mt-1">${seats}</div>
+                </td>
+                <td>
+                    <strong class="text-success">${formatPrice(booking.price_euros)}</strong>
+                </td>
+                <td>
+                    <form method="POST" action="/admin/booking/${booking.booking_id}/cancel" class="inline-form">
+                        <button type="submit" class="btn btn-sm btn-danger"
+                                onclick="return confirm('Êtes-vous sûr de vouloir annuler cette réservation ? Cette action est irréversible.')">
+                            <span class="material-symbols-outlined">delete</span>
+                        </button>
+                    </form>
+                </td>
+            </tr>`;
+    }
+
+    // Statistiques calculées sur toutes les réservations filtrées, renvoyées avec la première page
+    function showBookingsStats(data) {
+        const stats = data.stats;
+        if (!stats) return;
+        const statsBlock = document.getElementById('bookings-stats');
+        document.getElementById('bookings-count').textContent = `${stats.booking_count} réservation(s)`;
+        statsBlock.querySelector('[data-stat="booking_count"]').textContent = stats.booking_count;
+        statsBlock.querySelector('[data-stat="seat_count"]').textContent = stats.seat_count;
+        statsBlock.querySelector('[data-stat="revenue"]').textContent = formatPrice(stats.revenue);
+        statsBlock.querySelector('[data-stat="today_count"]').textContent = stats.today_count;
+        statsBlock.classList.toggle('d-none', stats.booking_count === 0);
+    }
+
+    createListing({
+        name: 'showings',
+        url: '/api/showings',
+        filtersForm: document.getElementById('showings-filters'),
+        tableBody: document.getElementById('showings-body'),
+        moreButton: document.getElementById('showings-more'),
+        renderRow: renderShowingRow
+    });
+
+    createListing({
+        name: 'bookings',
+        url: '/api/bookings',
+        filtersForm: document.getElementById('bookings-filters'),
+        tableBody: document.getElementById('bookings-body'),
+        moreButton: document.getElementById('bookings-more'),
+        renderRow: renderBookingRow,
+        onFirstPage: showBookingsStats
+    });
 });
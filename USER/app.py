@@ -1,27 +1,36 @@
+import base64
+import secrets
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort, send_file, make_response
+from werkzeug.exceptions import ServiceUnavailable
 from src.config import get_config
 from src.session_manager import init_session_manager
-from src.middleware import init_middleware, login_required, logout_required, booking_login_required
+from src.middleware import init_middleware, login_required, logout_required, booking_login_required, get_current_user
 from src.error_handlers import init_error_handlers
 from src.logging_config import init_logging
-from src.pdf_generator import create_pdf_generator
-from src.email_service import send_booking_confirmation_email
+from src.pdf_generator import build_booking_pdf_data, booking_pdf_key, get_booking_pdf, get_single_ticket_pdf
+from src.pdf_pool import init_pdf_pool, PDFRenderBusy
+from src.ticket_delivery import init_ticket_delivery, notify_ticket_delivery
+from src.posters import get_poster, get_poster_file, get_poster_derivative, get_poster_cache_control
+from src.session_tokens import issue_session_token, revoke_session, refresh_session_token, rotate_session_token
 from src.database import (
+    init_db_request_scope,
     test_database_connection,
-    create_session_token,
-    invalidate_session_token,
-    validate_session_token,
     get_movies_with_showings_by_date,
     get_showing_by_id,
     get_seats_for_showing,
+    get_showing_seats_by_ids,
+    get_showing_occupancy,
     get_booking_by_id,
     get_customers_for_booking,
+    get_booking_id_for_customer,
+    get_ticket_delivery_status,
     get_bookings_by_account_id,
     create_complete_booking_secure,
-    check_seats_availability,
+    hold_seats,
+    release_seat_holds,
+    get_held_seat_ids,
     get_age_pricing,
     calculate_booking_price,
-    get_user_by_id,
     add_account,
     modify_account_profile,
     modify_account_password,
@@ -29,9 +38,7 @@ from src.database import (
     validate_signup_identifiers,
     validate_signup_passwords,
     validate_login_data,
-    is_showing_expired,
-    get_movie_poster,
-    get_poster_image_data
+    is_showing_expired
 )
 
 # Get configuration
@@ -43,8 +50,11 @@ app.config['DEBUG'] = config.DEBUG
 
 # Initialize components
 init_logging(app)
+init_db_request_scope(app)
+init_pdf_pool(app)  # Forks the render workers, so before any background thread starts
 init_middleware(app)
 init_session_manager(app)
+init_ticket_delivery(app)
 init_error_handlers(app)
 
 # Test database connection
@@ -117,10 +127,6 @@ def movies():
         if movies_list is None:  # Database error occurred
             flash('Server unavailable, please try again later.', 'error')
             movies_list = []  # Show empty list instead of crashing
-        else:
-            # Add poster information for each movie
-            for movie in movies_list:
-                movie['poster'] = get_movie_poster(movie['id'])
                 
     except Exception as e:
         flash('Server unavailable, please try again later.', 'error')
@@ -144,23 +150,49 @@ def movies():
     return response
 
 @app.route('/poster/<int:poster_id>')
-def serve_poster(poster_id):
-    """Serve movie poster images from database"""
+@app.route('/poster/<int:poster_id>/<size>.<image_format>')
+def serve_poster(poster_id, size=None, image_format=None):
+    """Serve movie poster images (or a resized derivative), answering revalidations with 304 without reading the image"""
     try:
-        poster_data = get_poster_image_data(poster_id)
-        if not poster_data:
+        poster = get_poster(poster_id)
+        if not poster:
             abort(404)
         
-        from flask import Response
-        return Response(
-            poster_data['image_data'],
-            mimetype=poster_data['mime_type'],
-            headers={
-                'Cache-Control': 'public, max-age=86400',  # Cache for 24 hours
-                'Content-Type': poster_data['mime_type']
-            }
-        )
+        cache_control = get_poster_cache_control(poster, request.args.get('v'))
+        
+        # Derivative ETags derive from the original's, so a 304 needs no image either
+        etag = poster['etag'] if size is None else f"{poster['etag']}.{size}.{image_format}"
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        
+        if size is None:
+            mime_type, image_data, path = get_poster_file(poster)
+        else:
+            try:
+                etag, mime_type, image_data, path = get_poster_derivative(poster, size, image_format)
+            except ValueError:
+                abort(404)
+        
+        if image_data is None:
+            # Streamed from disk by the server (sendfile when available), with Range support
+            response = send_file(path, mimetype=mime_type, conditional=True, etag=etag)
+        else:
+            # Hot poster served from memory
+            response = make_response(image_data)
+            response.headers['Content-Type'] = mime_type
+            response.set_etag(etag)
+            response = response.make_conditional(request, accept_ranges=True, complete_length=len(image_data))
+        
+        response.headers['Cache-Control'] = cache_control
+        return response
     except Exception as e:
+        from werkzeug.exceptions import HTTPException
+        if isinstance(e, HTTPException):
+            raise e
+        
         print(f"Error serving poster {poster_id}: {e}")
         abort(404)
 
@@ -180,7 +212,7 @@ def login():
                 user = login_result['user']
                 ip_address = request.remote_addr
                 user_agent = request.headers.get('User-Agent')
-                session_token = create_session_token(user['id'], ip_address, user_agent)
+                session_token = issue_session_token(user['id'], ip_address, user_agent)
                 
                 if session_token:
                     # Store session info in Flask session
@@ -219,9 +251,13 @@ def logout():
     # Store the referrer URL before clearing the session (only if it's not an auth page)
     redirect_url = request.referrer if request.referrer and not is_auth_page(request.referrer) else None
     
-    # Invalidate the session token in the database
+    # Revoke the session token
     if 'session_token' in session:
-        invalidate_session_token(session['session_token'])
+        revoke_session(session['session_token'])
+    
+    # Free the seats held by an unfinished booking
+    if 'seat_hold_key' in session:
+        release_seat_holds(session['seat_hold_key'])
     
     # Clear the session
     session.clear()
@@ -264,7 +300,7 @@ def signup():
                 # Log the user in automatically after successful signup
                 ip_address = request.remote_addr
                 user_agent = request.headers.get('User-Agent')
-                session_token = create_session_token(user['id'], ip_address, user_agent)
+                session_token = issue_session_token(user['id'], ip_address, user_agent)
                 
                 if session_token:
                     # Store session info in Flask session
@@ -344,17 +380,12 @@ def get_cancel_redirect():
 def profile():
     """User profile page - requires authentication"""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
+        # Account already loaded by the session validation of this request
+        user = get_current_user()
+        if not user:
             flash('Session error. Please log in again.', 'error')
             return redirect(url_for('login'))
         
-        # Get user information from database
-        user = get_user_by_id(user_id)
-        if not user:
-            flash('User information not found.', 'error')
-            return redirect(url_for('index'))
-        
         return render_template('profile.html', user=user)
     except Exception as e:
         flash('Server unavailable, please try again later.', 'error')
@@ -366,16 +397,12 @@ def profile():
 def settings():
     """User settings page - requires authentication"""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
+        # Account already loaded by the session validation of this request
+        user = get_current_user()
+        if not user:
             flash('Session error. Please log in again.', 'error')
             return redirect(url_for('login'))
-        
-        # Get user information from database
-        user = get_user_by_id(user_id)
-        if not user:
-            flash('User information not found.', 'error')
-            return redirect(url_for('index'))
+        user_id = user['id']
         
         if request.method == 'POST':
             # Handle form submissions
@@ -433,6 +460,9 @@ def settings():
                     if username != session.get('username'):
                         session['username'] = username
                     
+                    # Signed tokens carry the profile, issue one with the new data
+                    session['session_token'] = refresh_session_token(session['session_token'])
+                    
                     flash('Profile updated successfully!', 'success')
                     # Redirect to refresh the page with updated data
                     return redirect(url_for('settings'))
@@ -465,6 +495,16 @@ def settings():
                 result = modify_account_password(user_id, current_password, new_password)
                 
                 if result and result['success']:
+                    # Signed tokens: revoke the other sessions of the account and keep this one
+                    new_session_token = rotate_session_token(
+                        session['session_token'], request.remote_addr, request.headers.get('User-Agent')
+                    )
+                    if not new_session_token:
+                        session.clear()
+                        flash('Password updated successfully! Please log in again.', 'success')
+                        return redirect(url_for('login'))
+                    session['session_token'] = new_session_token
+                    
                     flash('Password updated successfully!', 'success')
                     # Redirect to refresh the page
                     return redirect(url_for('settings'))
@@ -501,9 +541,18 @@ def showing_seats(showing_id):
             flash('Unable to load seats. Please try again.', 'error')
             return redirect(url_for('movies'))
         
+        # Seats held by this session stay selectable when coming back to the seat map
+        held_seat_ids = []
+        if session.get('seat_hold_key'):
+            held_seat_ids = get_held_seat_ids(showing_id, session['seat_hold_key'])
+            for seat in seats:
+                if seat['id'] in held_seat_ids:
+                    seat['is_occupied'] = False
+        
         return render_template('showing_seats.html', 
                              showing=showing, 
-                             seats=seats)
+                             seats=seats,
+                             held_seat_ids=held_seat_ids)
     
     except Exception as e:
         # Re-raise HTTP exceptions to let Flask handle them properly
@@ -515,6 +564,36 @@ def showing_seats(showing_id):
         print(f"Showing seats error: {e}")
         return redirect(url_for('movies'))
 
+@app.route('/api/showing/<int:showing_id>/occupancy')
+def showing_occupancy(showing_id):
+    """Seat occupancy of a showing as a base64 bitset
+    
+    Bit i & 7 of byte i >> 3 is set when the i-th seat of the room (ordered by
+    row then column) is reserved. The ETag follows the room layout and showing occupancy versions.
+    """
+    occupancy = get_showing_occupancy(showing_id)
+    if occupancy is None:
+        abort(404)
+    
+    response = jsonify({
+        'showing_id': showing_id,
+        'version': occupancy['version'],
+        'seat_count': occupancy['seat_count'],
+        'occupancy': base64.b64encode(occupancy['bits']).decode('ascii')
+    })
+    response.set_etag(f"{showing_id}-{occupancy['layout_version']}-{occupancy['version']}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/booking/cancel')
+@booking_login_required
+def booking_cancel():
+    """Leave the booking in progress and free the seats it holds"""
+    hold_key = session.pop('seat_hold_key', None)
+    if hold_key:
+        release_seat_holds(hold_key)
+    return redirect(url_for('movies'))
+
 @app.route('/booking/spectators', methods=['POST'])
 @booking_login_required
 def booking_spectators():
@@ -535,11 +614,6 @@ def booking_spectators():
             flash('Invalid seat selection.', 'error')
             return redirect(url_for('movies'))
         
-        # Verify seats are still available
-        if not check_seats_availability(selected_seats, showing_id):
-            flash('Some selected seats are no longer available.', 'error')
-            return redirect(url_for('showing_seats', showing_id=showing_id))
-        
         # Get showing info
         showing = get_showing_by_id(showing_id)
         
@@ -552,9 +626,16 @@ def booking_spectators():
             flash('This showing has already finished or does not exist.', 'error')
             abort(404)
         
+        # Hold the seats for this session until the booking is confirmed
+        if 'seat_hold_key' not in session:
+            session['seat_hold_key'] = secrets.token_urlsafe(16)
+        hold_result = hold_seats(showing['id'], selected_seats, session['seat_hold_key'])
+        if not hold_result or not hold_result['success']:
+            flash('Some selected seats are no longer available.', 'error')
+            return redirect(url_for('showing_seats', showing_id=showing_id))
+        
         # Get seat details for the selected seats
-        all_seats = get_seats_for_showing(showing_id)
-        selected_seat_details = [seat for seat in all_seats if seat['id'] in selected_seats]
+        selected_seat_details = get_showing_seats_by_ids(showing_id, selected_seats)
         
         # Get logged-in user information for prefilling booker details
         from flask import g
@@ -566,7 +647,8 @@ def booking_spectators():
                              showing=showing,
                              selected_seats=selected_seat_details,
                              num_spectators=len(selected_seats),
-                             current_user=current_user)
+                             current_user=current_user,
+                             hold_expires_at=hold_result['expires_at'])
     
     except Exception as e:
         # Re-raise HTTP exceptions to let Flask handle them properly
@@ -680,8 +762,8 @@ def booking_confirm():
             return redirect(url_for('movies'))
         
         # Get seat information to determine PMR status
-        all_seats = get_seats_for_showing(showing_id)
-        seat_info_map = {seat['id']: seat for seat in all_seats}
+        selected_seat_info = get_showing_seats_by_ids(showing_id, selected_seat_ids)
+        seat_info_map = {seat['id']: seat for seat in selected_seat_info}
         
         for i in range(num_spectators):
             # Calculate age from birth date
@@ -735,79 +817,15 @@ def booking_confirm():
         }
         
         # Use the secure booking function that calculates prices server-side
-        booking_result = create_complete_booking_secure(showing_id, account_id, spectators, selected_seat_ids, booker_info)
+        booking_result = create_complete_booking_secure(showing_id, account_id, spectators, selected_seat_ids, booker_info,
+                                                        hold_key=session.get('seat_hold_key'))
         
         if booking_result and booking_result.get('success'):
             booking_id = booking_result['booking_id']
             
-            # Send confirmation email with PDF attachment
-            try:
-                # Get complete booking data for email
-                booking_data = get_booking_by_id(booking_id)
-                customers = get_customers_for_booking(booking_id)
-                
-                if booking_data and customers:
-                    # Add customer count to booking data
-                    booking_data['num_spectators'] = len(customers)
-                    
-                    # Get proper booker information using correct field names
-                    booker_name = f"{booking_data.get('booker_first_name', '')} {booking_data.get('booker_last_name', '')}".strip()
-                    booker_email_data = booking_data.get('booker_email', '')
-                    
-                    # Final fallback
-                    if not booker_name:
-                        booker_name = "Anonymous User"
-                    if not booker_email_data:
-                        booker_email_data = "N/A"
-                    
-                    # Convert booking and customers to dictionaries for PDF generator (same as website routes)
-                    booking_data_pdf = {
-                        'id': booking_data['id'],
-                        'movie_name': booking_data['movie_name'],
-                        'room_name': booking_data['room_name'],
-                        'date': booking_data['date'],
-                        'starttime': booking_data['starttime'],
-                        'duration': booking_data['duration'],
-                        'price': booking_data['price'],
-                        'booker_name': booker_name,
-                        'booker_email': booker_email_data
-                    }
-                    
-                    tickets_data = []
-                    for customer in customers:
-                        tickets_data.append({
-                            'id': customer.get('id', 'N/A'),
-                            'seat_number': f"{customer.get('seat_row', '')}{customer.get('seat_column', '')}",
-                            'seat_type': customer.get('seat_type', 'Standard'),
-                            'price': booking_data['price'] / len(customers) if customers else 0  # Divide total price
-                        })
-                    
-                    # Generate PDF content for email attachment
-                    pdf_generator = create_pdf_generator()
-                    pdf_buffer = pdf_generator.generate_booking_pdf(booking_data_pdf, tickets_data)
-                    
-                    # Extract bytes from BytesIO buffer
-                    pdf_content = pdf_buffer.getvalue()
-                    
-                    # Send email with PDF attachment
-                    booker_full_name = f"{booker_first_name} {booker_last_name}"
-                    email_sent = send_booking_confirmation_email(
-                        booking_data=booking_data_pdf,
-                        pdf_content=pdf_content,
-                        booker_email=booker_email,
-                        booker_name=booker_full_name
-                    )
-                    
-                    if email_sent:
-                        flash('Booking confirmed successfully! A confirmation email with your tickets has been sent.', 'success')
-                    else:
-                        flash('Booking confirmed successfully! However, we could not send the confirmation email. You can download your tickets below.', 'warning')
-                else:
-                    flash('Booking confirmed successfully! You can download your tickets below.', 'success')
-                    
-            except Exception as email_error:
-                print(f"Failed to send confirmation email: {email_error}")
-                flash('Booking confirmed successfully! However, we could not send the confirmation email. You can download your tickets below.', 'warning')
+            # The ticket email was queued with the booking, the delivery workers send it
+            notify_ticket_delivery()
+            flash('Booking confirmed successfully! Your tickets will be sent to you by email shortly.', 'success')
             
             return redirect(url_for('booking_tickets', booking_id=booking_id))
         else:
@@ -839,9 +857,13 @@ def booking_tickets(booking_id):
         # Get customers/spectators for this booking
         customers = get_customers_for_booking(booking_id)
         
+        # Status of the ticket email queued with the booking
+        delivery = get_ticket_delivery_status(booking_id)
+        
         return render_template('booking_tickets.html', 
                              booking=booking, 
-                             customers=customers)
+                             customers=customers,
+                             delivery=delivery)
     
     except Exception as e:
         flash('Server unavailable, please try again later.', 'error')
@@ -865,71 +887,30 @@ def download_booking_pdf(booking_id):
         # Get customers/spectators for this booking
         customers = get_customers_for_booking(booking_id)
         
-        # Get proper booker information using correct field names
-        from flask import g
-        booker_name = f"{booking.get('booker_first_name', '')} {booking.get('booker_last_name', '')}".strip()
-        booker_email = booking.get('booker_email', '')
-        
-        # Fall back to current user if booking doesn't have booker info
-        if not booker_name and hasattr(g, 'current_user') and g.current_user:
-            booker_name = f"{g.current_user.get('first_name', '')} {g.current_user.get('last_name', '')}".strip()
-            if not booker_email:
-                booker_email = g.current_user.get('email', '')
-        
-        # Final fallback
-        if not booker_name:
-            booker_name = "Anonymous User"
-        if not booker_email:
-            booker_email = "N/A"
-        
         # Convert booking and customers to dictionaries for PDF generator
-        booking_data = {
-            'id': booking['id'],
-            'movie_name': booking['movie_name'],
-            'room_name': booking['room_name'],
-            'date': booking['date'],
-            'starttime': booking['starttime'],
-            'duration': booking['duration'],
-            'price': booking['price'],
-            'booker_name': booker_name,
-            'booker_email': booker_email
-        }
+        booking_data, tickets_data = build_booking_pdf_data(booking, customers, fallback_user=get_current_user())
+        booker_name = booking_data['booker_name']
         
-        tickets_data = []
-        for customer in customers:
-            tickets_data.append({
-                'id': customer.get('id', 'N/A'),
-                'seat_number': f"{customer.get('seat_row', '')}{customer.get('seat_column', '')}",
-                'seat_type': customer.get('seat_type', 'Standard'),
-                'price': booking['price'] / len(customers) if customers else 0  # Divide total price
-            })
-        
-        # Check if booking is expired
-        from datetime import datetime, date, timedelta
-        is_expired = False
-        try:
-            booking_date = booking['date']
-            if isinstance(booking_date, str):
-                booking_date = datetime.strptime(booking_date, '%Y-%m-%d').date()
-            elif hasattr(booking_date, 'date'):
-                booking_date = booking_date.date()
-            
-            booking_datetime = datetime.combine(booking_date, datetime.min.time()) + timedelta(seconds=booking['starttime'])
-            is_expired = booking_datetime < datetime.now()
-        except:
-            pass
+        # The key is a hash of the PDF inputs, so a revalidation is answered without rendering
+        pdf_key = booking_pdf_key(booking_data, tickets_data)
+        if request.if_none_match.contains(pdf_key):
+            response = make_response('', 304)
+            response.set_etag(pdf_key)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
         
-        # Generate PDF
-        pdf_generator = create_pdf_generator()
-        pdf_buffer = pdf_generator.generate_booking_pdf(booking_data, tickets_data, include_expired=is_expired)
+        # Generate PDF (or reuse the cached one while its content is unchanged)
+        pdf_key, pdf_content = get_booking_pdf(booking_data, tickets_data, key=pdf_key)
         
         # Create safe filename from booker name
         safe_name = "".join(c for c in booker_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
         safe_name = safe_name.replace(' ', '_') if safe_name else "User"
         
         # Create response
-        response = make_response(pdf_buffer.getvalue())
+        response = make_response(pdf_content)
         response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(pdf_key)
         
         if print_mode:
             # For printing: display inline with username in title
@@ -938,8 +919,11 @@ def download_booking_pdf(booking_id):
             # For downloading: force download with username in filename
             response.headers['Content-Disposition'] = f'attachment; filename="{safe_name}_Tickets_Booking_{booking_id}.pdf"'
         
-        return response
+        return response.make_conditional(request)
         
+    except PDFRenderBusy as e:
+        # Render pool saturated: answer "try again" rather than queueing the request
+        raise ServiceUnavailable(description=str(e), retry_after=e.retry_after)
     except Exception as e:
         flash('Unable to generate PDF. Please try again later.', 'error')
         print(f"PDF generation error: {e}")
@@ -950,15 +934,31 @@ def download_booking_pdf(booking_id):
 def download_single_ticket_pdf(customer_id):
     """Download a single ticket as PDF"""
     try:
-        # Get customer/ticket details - we need to get this from booking
-        # For now, redirect to full booking PDF
-        # This would need a separate database function to get customer by ID
-        flash('Single ticket PDF not implemented yet. Download full booking instead.', 'info')
+        booking_id = get_booking_id_for_customer(customer_id)
+        booking = get_booking_by_id(booking_id) if booking_id else None
+        if not booking:
+            flash('Ticket not found.', 'error')
+            return redirect(url_for('my_tickets'))
         
-        # We'd need the booking_id to redirect properly
-        # For now, redirect to my-tickets
-        return redirect(url_for('my_tickets'))
+        # Ticket prices are shares of the booking price, so convert the whole booking
+        customers = get_customers_for_booking(booking_id)
+        booking_data, tickets_data = build_booking_pdf_data(booking, customers, fallback_user=get_current_user())
+        ticket_data = next((ticket for ticket in tickets_data if ticket['id'] == customer_id), None)
+        if not ticket_data:
+            flash('Ticket not found.', 'error')
+            return redirect(url_for('booking_tickets', booking_id=booking_id))
         
+        pdf_content = get_single_ticket_pdf(ticket_data, booking_data)
+        
+        response = make_response(pdf_content)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['Content-Disposition'] = f'attachment; filename="Ticket_{customer_id}_Booking_{booking_id}.pdf"'
+        return response
+        
+    except PDFRenderBusy as e:
+        # Render pool saturated: answer "try again" rather than queueing the request
+        raise ServiceUnavailable(description=str(e), retry_after=e.retry_after)
     except Exception as e:
         flash('Unable to generate ticket PDF. Please try again later.', 'error')
         print(f"Single ticket PDF error: {e}")
@@ -978,76 +978,38 @@ def print_booking_tickets(booking_id):
         # Get customers/spectators for this booking
         customers = get_customers_for_booking(booking_id)
         
-        # Get proper booker information using correct field names
-        from flask import g
-        booker_name = f"{booking.get('booker_first_name', '')} {booking.get('booker_last_name', '')}".strip()
-        booker_email = booking.get('booker_email', '')
-        
-        # Fall back to current user if booking doesn't have booker info
-        if not booker_name and hasattr(g, 'current_user') and g.current_user:
-            booker_name = f"{g.current_user.get('first_name', '')} {g.current_user.get('last_name', '')}".strip()
-            if not booker_email:
-                booker_email = g.current_user.get('email', '')
-        
-        # Final fallback
-        if not booker_name:
-            booker_name = "Anonymous User"
-        if not booker_email:
-            booker_email = "N/A"
-        
         # Convert booking and customers to dictionaries for PDF generator
-        booking_data = {
-            'id': booking['id'],
-            'movie_name': booking['movie_name'],
-            'room_name': booking['room_name'],
-            'date': booking['date'],
-            'starttime': booking['starttime'],
-            'duration': booking['duration'],
-            'price': booking['price'],
-            'booker_name': booker_name,
-            'booker_email': booker_email
-        }
-        
-        tickets_data = []
-        for customer in customers:
-            tickets_data.append({
-                'id': customer.get('id', 'N/A'),
-                'seat_number': f"{customer.get('seat_row', '')}{customer.get('seat_column', '')}",
-                'seat_type': customer.get('seat_type', 'Standard'),
-                'price': booking['price'] / len(customers) if customers else 0  # Divide total price
-            })
+        booking_data, tickets_data = build_booking_pdf_data(booking, customers, fallback_user=get_current_user())
+        booker_name = booking_data['booker_name']
         
-        # Check if booking is expired
-        from datetime import datetime, date, timedelta
-        is_expired = False
-        try:
-            booking_date = booking['date']
-            if isinstance(booking_date, str):
-                booking_date = datetime.strptime(booking_date, '%Y-%m-%d').date()
-            elif hasattr(booking_date, 'date'):
-                booking_date = booking_date.date()
-            
-            booking_datetime = datetime.combine(booking_date, datetime.min.time()) + timedelta(seconds=booking['starttime'])
-            is_expired = booking_datetime < datetime.now()
-        except:
-            pass
+        # The key is a hash of the PDF inputs, so a revalidation is answered without rendering
+        pdf_key = booking_pdf_key(booking_data, tickets_data)
+        if request.if_none_match.contains(pdf_key):
+            response = make_response('', 304)
+            response.set_etag(pdf_key)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
         
-        # Generate PDF
-        pdf_generator = create_pdf_generator()
-        pdf_buffer = pdf_generator.generate_booking_pdf(booking_data, tickets_data, include_expired=is_expired)
+        # Generate PDF (or reuse the cached one while its content is unchanged)
+        pdf_key, pdf_content = get_booking_pdf(booking_data, tickets_data, key=pdf_key)
         
         # Create safe filename from booker name
         safe_name = "".join(c for c in booker_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
         safe_name = safe_name.replace(' ', '_') if safe_name else "User"
         
         # Return PDF for inline viewing (will trigger browser print)
-        response = make_response(pdf_buffer.getvalue())
+        response = make_response(pdf_content)
         response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(pdf_key)
         response.headers['Content-Disposition'] = f'inline; filename="{safe_name}_Tickets.pdf"'
         response.headers['X-Auto-Print'] = 'true'  # Custom header for our use
         
-        return response
+        return response.make_conditional(request)
         
+    except PDFRenderBusy as e:
+        # Render pool saturated: answer "try again" rather than queueing the request
+        raise ServiceUnavailable(description=str(e), retry_after=e.retry_after)
     except Exception as e:
         flash('Unable to generate PDF for printing. Please try again later.', 'error')
         print(f"PDF print error: {e}")
@@ -0,0 +1,85 @@
+"""
+Benchmark of seat grid building and serialization: per-cell linear scan vs shared/seatmap.py.
+
+Usage (from the USER directory):
+    python -m benchmarks.bench_seatmap
+    python -m benchmarks.bench_seatmap --repeat 10 --rooms 10x12 50x60
+"""
+
+import argparse
+import json
+import time
+import src.config  # Puts the repository root on sys.path
+from shared.seatmap import build_grid, row_label, serialize_layout, deserialize_layout
+
+
+def make_seats(nb_rows, nb_columns):
+    """Build the seats of a sample room as loaded from the seat table, with a few special seats."""
+    seat_types = ['normal'] * 8 + ['pmr', 'stair']
+    return [
+        {
+            'id': 1000 + (row_number - 1) * nb_columns + seat_column,
+            'type': seat_types[(row_number + seat_column) % len(seat_types)],
+            'seat_row': row_label(row_number),
+            'seat_column': seat_column
+        }
+        for row_number in range(1, nb_rows + 1)
+        for seat_column in range(1, nb_columns + 1)
+    ]
+
+
+def build_grid_scan(nb_rows, nb_columns, seats):
+    """The former admin grid builder: a linear scan of all the seats for every cell."""
+    grid = []
+    for row_number in range(1, nb_rows + 1):
+        label = row_label(row_number)
+        grid.append([
+            next((seat for seat in seats if seat['seat_row'] == label and seat['seat_column'] == column), None)
+            for column in range(1, nb_columns + 1)
+        ])
+    return grid
+
+
+def nested_grid(seats):
+    """The former admin API payload: {row: {column: {id, type}}}."""
+    grid = {}
+    for seat in seats:
+        grid.setdefault(seat['seat_row'], {})[seat['seat_column']] = {'id': seat['id'], 'type': seat['type']}
+    return grid
+
+
+def measure(func, repeat):
+    """Return the mean time of a function in milliseconds."""
+    func()  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seat grid benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+    parser.add_argument('--rooms', nargs='+', default=['10x12', '30x40', '50x60'], help='Room sizes as ROWSxCOLUMNS')
+    args = parser.parse_args(argv)
+
+    print(f"{'room':>7} {'scan ms':>9} {'indexed ms':>11} {'speedup':>8} {'nested KB':>10} {'compact KB':>11}")
+    for room in args.rooms:
+        nb_rows, nb_columns = (int(value) for value in room.lower().split('x'))
+        seats = make_seats(nb_rows, nb_columns)
+
+        layout = serialize_layout(nb_rows, nb_columns, seats)
+        assert build_grid(nb_rows, nb_columns, seats) == build_grid_scan(nb_rows, nb_columns, seats)
+        assert deserialize_layout(layout) == seats
+
+        scan_ms = measure(lambda: build_grid_scan(nb_rows, nb_columns, seats), args.repeat)
+        indexed_ms = measure(lambda: build_grid(nb_rows, nb_columns, seats), args.repeat)
+        nested_size = len(json.dumps(nested_grid(seats)))
+        compact_size = len(json.dumps(layout))
+
+        print(f"{room:>7} {scan_ms:>9.2f} {indexed_ms:>11.2f} {scan_ms / indexed_ms:>7.0f}x "
+              f"{nested_size / 1024:>10.1f} {compact_size / 1024:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
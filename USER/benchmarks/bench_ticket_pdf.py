@@ -0,0 +1,74 @@
+"""
+Benchmark of booking PDF generation: platypus generator vs canvas renderer.
+
+Usage (from the USER directory):
+    python -m benchmarks.bench_ticket_pdf
+    python -m benchmarks.bench_ticket_pdf --repeat 50 --tickets 1 10 50
+"""
+
+import argparse
+import datetime
+import time
+from src.pdf_generator import create_pdf_generator
+from src.ticket_renderer import ticket_renderer
+
+
+def make_booking(num_tickets):
+    """Build sample PDF generator input for a booking with num_tickets tickets."""
+    booking_data = {
+        'id': 1234,
+        'movie_name': 'Benchmark Movie',
+        'room_name': 'Salle 1',
+        'date': datetime.date.today() + datetime.timedelta(days=1),
+        'starttime': 20 * 3600 + 30 * 60,
+        'duration': 125,
+        'price': 9.5 * num_tickets,
+        'booker_name': 'Jane Doe',
+        'booker_email': 'jane.doe@example.com',
+        'num_spectators': num_tickets
+    }
+    tickets_data = [
+        {
+            'id': 5000 + index,
+            'seat_number': f"{chr(ord('A') + index // 20)}{index % 20 + 1}",
+            'seat_type': 'standard',
+            'price': 9.5
+        }
+        for index in range(num_tickets)
+    ]
+    return booking_data, tickets_data
+
+
+def measure(render, repeat):
+    """Return the mean time in milliseconds and the output size of a render function."""
+    size = len(render().getvalue())  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return (time.perf_counter() - start) * 1000 / repeat, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Booking PDF generation benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='Renders per measurement')
+    parser.add_argument('--tickets', type=int, nargs='+', default=[1, 10, 50], help='Ticket counts to measure')
+    args = parser.parse_args(argv)
+
+    print(f"{'tickets':>8} {'platypus ms':>12} {'canvas ms':>10} {'speedup':>8} {'platypus KB':>12} {'canvas KB':>10}")
+    for num_tickets in args.tickets:
+        booking_data, tickets_data = make_booking(num_tickets)
+
+        # The platypus path as served before: a new generator (and stylesheet) per request
+        platypus_ms, platypus_size = measure(
+            lambda: create_pdf_generator().generate_booking_pdf(booking_data, tickets_data), args.repeat
+        )
+        canvas_ms, canvas_size = measure(
+            lambda: ticket_renderer.render_booking(booking_data, tickets_data), args.repeat
+        )
+
+        print(f"{num_tickets:>8} {platypus_ms:>12.2f} {canvas_ms:>10.2f} {platypus_ms / canvas_ms:>7.1f}x "
+              f"{platypus_size / 1024:>12.1f} {canvas_size / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+-- Version counters used to invalidate in-process caches of the user website.
+-- The admin website bumps the 'catalog' row whenever movies, showings or posters change.
+CREATE TABLE IF NOT EXISTS cache_version (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO cache_version (name, version) VALUES ('catalog', 0);
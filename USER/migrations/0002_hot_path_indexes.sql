@@ -0,0 +1,19 @@
+-- Indexes for the hot paths of both websites.
+
+-- Showtime catalog by date (range predicate on date, then movie and start time)
+CREATE INDEX idx_showing_date_movie_starttime ON showing (date, movie_id, starttime);
+
+-- A seat can only be reserved once per showing, also used by the seat map lookups
+CREATE UNIQUE INDEX uq_seatreservation_showing_seat ON seatreservation (showing_id, seat_id);
+
+-- Session validation on every request
+CREATE INDEX idx_account_session_token ON account_session (session_token, is_active, expires_at);
+
+-- Spectators of a booking
+CREATE INDEX idx_customer_booking ON customer (booking_id);
+
+-- Bookings of an account (my tickets)
+CREATE INDEX idx_booking_account ON booking (account_id);
+
+-- Primary poster of a movie
+CREATE INDEX idx_movieposter_movie_primary ON movieposter (movie_id, is_primary);
@@ -0,0 +1,12 @@
+-- Persisted start and end time of each showing, maintained by the admin website.
+-- Lets both websites filter finished showings in SQL instead of in Python.
+ALTER TABLE showing
+    ADD COLUMN starts_at DATETIME NULL,
+    ADD COLUMN ends_at DATETIME NULL;
+
+UPDATE showing s
+JOIN movie m ON s.movie_id = m.id
+SET s.starts_at = TIMESTAMP(DATE(s.date), s.starttime),
+    s.ends_at = TIMESTAMP(DATE(s.date), s.starttime) + INTERVAL m.duration MINUTE;
+
+CREATE INDEX idx_showing_ends_at ON showing (ends_at);
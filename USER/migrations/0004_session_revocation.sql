@@ -0,0 +1,12 @@
+-- Revocations of signed session tokens (SESSION_TOKEN_MODE=signed).
+-- A row revokes either one token (jti) or every token of an account issued before revoked_before.
+-- Web workers sync new rows by id; rows are useless once expires_at has passed.
+CREATE TABLE IF NOT EXISTS session_revocation (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    jti VARCHAR(64) NULL,
+    account_id INT NULL,
+    revoked_before BIGINT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_session_revocation_expires_at (expires_at)
+);
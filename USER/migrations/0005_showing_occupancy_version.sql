@@ -0,0 +1,4 @@
+-- Version of the seat occupancy of each showing, bumped by every booking and cancellation.
+-- Used as the ETag of the occupancy API and to validate cached occupancy bitsets.
+ALTER TABLE showing
+    ADD COLUMN occupancy_version INT UNSIGNED NOT NULL DEFAULT 0;
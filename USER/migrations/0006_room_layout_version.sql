@@ -0,0 +1,4 @@
+-- Version of the seat layout of each room, bumped by the admin website on seat changes.
+-- Used to validate the room layouts cached by the user website.
+ALTER TABLE room
+    ADD COLUMN layout_version INT UNSIGNED NOT NULL DEFAULT 0;
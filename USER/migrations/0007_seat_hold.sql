@@ -0,0 +1,14 @@
+-- Short-lived seat holds taken between seat selection and booking confirmation.
+-- A seat is held by at most one session per showing; expired rows are swept
+-- periodically and otherwise ignored by availability checks.
+CREATE TABLE IF NOT EXISTS seathold (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    showing_id INT NOT NULL,
+    seat_id INT NOT NULL,
+    hold_key VARCHAR(64) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_seathold_showing_seat (showing_id, seat_id),
+    INDEX idx_seathold_hold_key (hold_key),
+    INDEX idx_seathold_expires_at (expires_at)
+);
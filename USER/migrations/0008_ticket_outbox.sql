@@ -0,0 +1,21 @@
+-- Outbox of ticket emails, written in the booking transaction and delivered by background workers.
+-- status: pending -> sending -> sent, or back to pending with a later next_attempt_at on failure,
+-- and dead once the maximum number of attempts is reached. A 'sending' row whose locked_until has
+-- passed belongs to a crashed worker and is claimed again.
+CREATE TABLE IF NOT EXISTS ticket_outbox (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    booking_id INT NOT NULL,
+    recipient_email VARCHAR(255) NOT NULL,
+    recipient_name VARCHAR(255) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claim_token VARCHAR(64) NULL,
+    locked_until DATETIME NULL,
+    last_error VARCHAR(512) NULL,
+    sent_at DATETIME NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_ticket_outbox_booking (booking_id),
+    INDEX idx_ticket_outbox_status_next_attempt (status, next_attempt_at),
+    INDEX idx_ticket_outbox_claim_token (claim_token)
+);
@@ -0,0 +1,8 @@
+-- Poster images move out of the database into the content-addressed poster
+-- store (shared/poster_store.py); rows keep their metadata and the SHA-256 of
+-- the file. Existing blobs are moved with:
+--     python -m src.database.migrations export-posters
+-- after which the image column is NULL.
+ALTER TABLE movieposter ADD COLUMN content_hash CHAR(64) NULL;
+ALTER TABLE movieposter MODIFY image LONGBLOB NULL;
+CREATE INDEX idx_movieposter_content_hash ON movieposter (content_hash);
@@ -0,0 +1,4 @@
+-- Indexes for the paginated admin listings.
+
+-- Showings ordered by start time, with a date range and a (starts_at, id) keyset cursor
+CREATE INDEX idx_showing_starts_at ON showing (starts_at);
@@ -0,0 +1,55 @@
+-- Denormalized read model of the bookings for the admin listings, one row per
+-- booking (see shared/booking_summary.py). It is maintained in the transactions
+-- that change bookings, showings, movies, rooms and accounts, and can be
+-- recomputed with:
+--     python -m src.database.migrations rebuild-booking-summary
+CREATE TABLE IF NOT EXISTS booking_summary (
+    booking_id INT NOT NULL PRIMARY KEY,
+    account_id INT NOT NULL,
+    showing_id INT NOT NULL,
+    movie_id INT NOT NULL,
+    room_id INT NOT NULL,
+    movie_name VARCHAR(255) NOT NULL,
+    room_name VARCHAR(255) NOT NULL,
+    starts_at DATETIME NULL,
+    price DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    username VARCHAR(255) NOT NULL,
+    account_email VARCHAR(255) NOT NULL,
+    booker_first_name VARCHAR(255) NULL,
+    booker_last_name VARCHAR(255) NULL,
+    booker_email VARCHAR(255) NULL,
+    seat_count INT NOT NULL DEFAULT 0,
+    seat_labels TEXT NOT NULL,
+    INDEX idx_booking_summary_account (account_id, booking_id),
+    INDEX idx_booking_summary_showing (showing_id),
+    INDEX idx_booking_summary_movie (movie_id, booking_id),
+    INDEX idx_booking_summary_room (room_id, booking_id),
+    INDEX idx_booking_summary_starts_at (starts_at),
+    INDEX idx_booking_summary_username (username),
+    INDEX idx_booking_summary_account_email (account_email),
+    CONSTRAINT fk_booking_summary_booking FOREIGN KEY (booking_id) REFERENCES booking (id) ON DELETE CASCADE
+);
+
+-- Initial content (the seat labels of a booking can exceed the default GROUP_CONCAT limit of 1024)
+SET SESSION group_concat_max_len = 65536;
+INSERT IGNORE INTO booking_summary (
+    booking_id, account_id, showing_id, movie_id, room_id,
+    movie_name, room_name, starts_at, price,
+    username, account_email, booker_first_name, booker_last_name, booker_email,
+    seat_count, seat_labels
+)
+SELECT b.id, b.account_id, b.showing_id, s.movie_id, s.room_id,
+       m.name, r.name, s.starts_at, b.price,
+       a.username, a.email, b.first_name, b.last_name, b.email,
+       COUNT(st.id),
+       COALESCE(GROUP_CONCAT(CONCAT(st.seat_row, st.seat_column)
+                             ORDER BY CHAR_LENGTH(st.seat_row), st.seat_row, st.seat_column SEPARATOR ','), '')
+FROM booking b
+JOIN showing s ON b.showing_id = s.id
+JOIN movie m ON s.movie_id = m.id
+JOIN room r ON s.room_id = r.id
+JOIN account a ON b.account_id = a.id
+LEFT JOIN customer c ON c.booking_id = b.id
+LEFT JOIN seatreservation sr ON sr.customer_id = c.id
+LEFT JOIN seat st ON sr.seat_id = st.id
+GROUP BY b.id;
@@ -0,0 +1,2 @@
+-- Rows past Z are labelled AA, AB, ... (see shared/seatmap.py): seat_row holds up to three letters.
+ALTER TABLE seat MODIFY seat_row VARCHAR(3) NOT NULL;
@@ -0,0 +1,4 @@
+-- Version of the sessions of each account, bumped on logout and on profile or password changes.
+-- Used to validate the sessions cached by every process of the user website.
+ALTER TABLE account
+    ADD COLUMN session_version INT UNSIGNED NOT NULL DEFAULT 0;
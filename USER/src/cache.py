@@ -0,0 +1,171 @@
+"""
+In-process caching utilities for the Cinema application.
+Provides a thread-safe LRU cache bounded by entry count and approximate memory size,
+and a variant whose entries also expire after a time-to-live.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Roughly estimate the memory footprint of a value in bytes.
+
+    Walks dicts, lists and tuples recursively. This is not exact, it only
+    needs to be good enough to keep the cache under its memory bound.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an entry and a byte limit."""
+
+    def __init__(self, max_entries=128, max_bytes=None, sizeof=estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries if needed."""
+        size = self._sizeof(value) if self.max_bytes else 0
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Values larger than the whole budget are simply not cached
+            if self.max_bytes and size > self.max_bytes:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self._total_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove a key from the cache and return its value."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def discard_matching(self, predicate):
+        """Remove every entry whose value matches the predicate, return how many were removed."""
+        with self._lock:
+            matching_keys = [key for key, value in self._entries.items() if predicate(value)]
+            for key in matching_keys:
+                self._remove(key)
+            return len(matching_keys)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Return cache counters as a dictionary."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _remove(self, key):
+        """Remove a key without locking (caller must hold the lock)."""
+        value = self._entries.pop(key)
+        self._total_bytes -= self._sizes.pop(key, 0)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries expire a fixed number of seconds after being stored."""
+
+    def __init__(self, max_entries=128, ttl_seconds=60, max_bytes=None, sizeof=estimate_size,
+                 clock=time.monotonic):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, sizeof=sizeof)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key if it has not expired yet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value that expires after the cache time-to-live."""
+        super().set(key, (self._clock() + self.ttl_seconds, value))
+
+    def pop(self, key, default=None):
+        """Remove a key from the cache and return its value."""
+        entry = super().pop(key)
+        return default if entry is None else entry[1]
+
+    def discard_matching(self, predicate):
+        """Remove every entry whose value matches the predicate, return how many were removed."""
+        return super().discard_matching(lambda entry: predicate(entry[1]))
+
+    def stats(self):
+        """Return cache counters as a dictionary."""
+        stats = super().stats()
+        stats['expirations'] = self.expirations
+        return stats
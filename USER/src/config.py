@@ -4,11 +4,17 @@ Handles environment variables and application settings.
 """
 
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Make the repository-level shared package (code shared with the admin app) importable
+REPOSITORY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.append(REPOSITORY_ROOT)
+
 class Config:
     """Base configuration class."""
     
@@ -34,6 +40,19 @@ class Config:
     # Session Configuration
     SESSION_LIFETIME_HOURS = int(os.getenv('SESSION_LIFETIME_HOURS', 24))
     SESSION_CLEANUP_INTERVAL_HOURS = int(os.getenv('SESSION_CLEANUP_INTERVAL_HOURS', 1))
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', 1024))
+    SESSION_CACHE_TTL_SECONDS = float(os.getenv('SESSION_CACHE_TTL_SECONDS', 30))
+    
+    # Session Token Configuration
+    # 'database': opaque tokens checked against account_session on every request
+    # 'signed': HMAC-signed tokens verified in memory, revocations synced from session_revocation
+    SESSION_TOKEN_MODE = os.getenv('SESSION_TOKEN_MODE', 'database').lower()
+    SESSION_TOKEN_SECRET = os.getenv('SESSION_TOKEN_SECRET', SECRET_KEY)
+    SESSION_REVOCATION_SYNC_SECONDS = float(os.getenv('SESSION_REVOCATION_SYNC_SECONDS', 10))
+    
+    # Seat Hold Configuration
+    SEAT_HOLD_MINUTES = int(os.getenv('SEAT_HOLD_MINUTES', 10))
+    SEAT_HOLD_CLEANUP_INTERVAL_MINUTES = int(os.getenv('SEAT_HOLD_CLEANUP_INTERVAL_MINUTES', 2))
     
     # Security Configuration
     BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
@@ -45,6 +64,50 @@ class Config:
     EMAIL_USERNAME = os.getenv('EMAIL_USERNAME', '')
     EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
     EMAIL_FROM = os.getenv('EMAIL_FROM', '')
+    EMAIL_TIMEOUT_SECONDS = float(os.getenv('EMAIL_TIMEOUT_SECONDS', 30))
+    # Pooled SMTP sessions, reused between messages until idle for too long
+    EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 2))
+    EMAIL_SESSION_IDLE_SECONDS = float(os.getenv('EMAIL_SESSION_IDLE_SECONDS', 60))
+    EMAIL_SESSION_MAX_MESSAGES = int(os.getenv('EMAIL_SESSION_MAX_MESSAGES', 100))
+    
+    # Ticket Delivery Configuration (background email workers fed by the ticket_outbox table)
+    TICKET_DELIVERY_WORKERS = int(os.getenv('TICKET_DELIVERY_WORKERS', 2))
+    TICKET_DELIVERY_POLL_SECONDS = float(os.getenv('TICKET_DELIVERY_POLL_SECONDS', 5))
+    TICKET_DELIVERY_BATCH_SIZE = int(os.getenv('TICKET_DELIVERY_BATCH_SIZE', 5))
+    TICKET_DELIVERY_LEASE_SECONDS = int(os.getenv('TICKET_DELIVERY_LEASE_SECONDS', 300))
+    TICKET_DELIVERY_MAX_ATTEMPTS = int(os.getenv('TICKET_DELIVERY_MAX_ATTEMPTS', 6))
+    TICKET_DELIVERY_BACKOFF_SECONDS = int(os.getenv('TICKET_DELIVERY_BACKOFF_SECONDS', 30))
+    TICKET_DELIVERY_MAX_BACKOFF_SECONDS = int(os.getenv('TICKET_DELIVERY_MAX_BACKOFF_SECONDS', 3600))
+    
+    # Catalog Cache Configuration
+    CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 32))
+    CATALOG_CACHE_MAX_BYTES = int(os.getenv('CATALOG_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    CATALOG_VERSION_CHECK_SECONDS = float(os.getenv('CATALOG_VERSION_CHECK_SECONDS', 5))
+    
+    # Room Layout Cache Configuration
+    LAYOUT_CACHE_MAX_ENTRIES = int(os.getenv('LAYOUT_CACHE_MAX_ENTRIES', 64))
+    LAYOUT_CACHE_MAX_BYTES = int(os.getenv('LAYOUT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    
+    # Booking PDF Cache Configuration
+    PDF_CACHE_MAX_ENTRIES = int(os.getenv('PDF_CACHE_MAX_ENTRIES', 256))
+    PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # PDF Render Pool Configuration (0 workers renders in the request thread)
+    PDF_POOL_WORKERS = int(os.getenv('PDF_POOL_WORKERS', 2))
+    PDF_POOL_MAX_PENDING = int(os.getenv('PDF_POOL_MAX_PENDING', 8))
+    PDF_RENDER_TIMEOUT_SECONDS = int(os.getenv('PDF_RENDER_TIMEOUT_SECONDS', 20))
+    PDF_RETRY_AFTER_SECONDS = int(os.getenv('PDF_RETRY_AFTER_SECONDS', 5))
+    
+    # Poster Cache Configuration (file bytes of hot posters, other posters are streamed from disk)
+    POSTER_CACHE_MAX_ENTRIES = int(os.getenv('POSTER_CACHE_MAX_ENTRIES', 128))
+    POSTER_CACHE_MAX_BYTES = int(os.getenv('POSTER_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    POSTER_CACHE_HOT_REQUESTS = int(os.getenv('POSTER_CACHE_HOT_REQUESTS', 3))
+    POSTER_CACHE_MAX_FILE_BYTES = int(os.getenv('POSTER_CACHE_MAX_FILE_BYTES', 512 * 1024))
+    POSTER_MAX_AGE = int(os.getenv('POSTER_MAX_AGE', 365 * 24 * 3600))
+    
+    # Seat Occupancy Cache Configuration
+    OCCUPANCY_CACHE_MAX_ENTRIES = int(os.getenv('OCCUPANCY_CACHE_MAX_ENTRIES', 512))
+    OCCUPANCY_CACHE_MAX_BYTES = int(os.getenv('OCCUPANCY_CACHE_MAX_BYTES', 16 * 1024 * 1024))
     
     @classmethod
     def get_database_config(cls):
@@ -11,6 +11,9 @@ This package provides database connectivity and operations split into modules:
 # Import core database functionality
 from .database import (
     get_db_connection,
+    get_unit_of_work,
+    begin_transaction,
+    init_db_request_scope,
     test_database_connection,
     handle_db_errors,
     DB_CONFIG,
@@ -23,13 +26,26 @@ from .database_retrieve import (
     get_user_by_username,
     get_user_by_email,
     validate_session_token,
+    invalidate_cached_session,
+    invalidate_cached_sessions_for_account,
+    get_session_cache_stats,
+    get_session_revocations_since,
+    get_catalog_version,
     get_movies_with_showings_by_date,
     get_showing_by_id,
     get_seats_for_showing,
+    get_showing_seats_by_ids,
+    get_showing_occupancy,
+    is_seat_occupied,
+    apply_occupancy_change,
+    invalidate_occupancy,
+    get_held_seat_ids,
+    get_ticket_delivery_status,
     get_age_pricing,
     calculate_booking_price,
     get_booking_by_id,
     get_customers_for_booking,
+    get_booking_id_for_customer,
     get_bookings_by_account_id,
     is_showing_expired,
     get_movie_poster,
@@ -49,16 +65,27 @@ from .database_modify import (
     create_session_token,
     invalidate_session_token,
     cleanup_expired_sessions,
+    add_session_revocation,
+    cleanup_expired_revocations,
     add_account,
     modify_account_profile,
     modify_account_password,
     check_seats_availability,
-    create_complete_booking_secure
+    create_complete_booking_secure,
+    hold_seats,
+    release_seat_holds,
+    release_expired_seat_holds,
+    claim_ticket_deliveries,
+    mark_ticket_delivery_sent,
+    mark_ticket_delivery_failed
 )
 
 __all__ = [
     # Core database
     'get_db_connection',
+    'get_unit_of_work',
+    'begin_transaction',
+    'init_db_request_scope',
     'test_database_connection',
     'handle_db_errors',
     'DB_CONFIG',
@@ -69,13 +96,26 @@ __all__ = [
     'get_user_by_username',
     'get_user_by_email',
     'validate_session_token',
+    'invalidate_cached_session',
+    'invalidate_cached_sessions_for_account',
+    'get_session_cache_stats',
+    'get_session_revocations_since',
+    'get_catalog_version',
     'get_movies_with_showings_by_date',
     'get_showing_by_id',
     'get_seats_for_showing',
+    'get_showing_seats_by_ids',
+    'get_showing_occupancy',
+    'is_seat_occupied',
+    'apply_occupancy_change',
+    'invalidate_occupancy',
+    'get_held_seat_ids',
+    'get_ticket_delivery_status',
     'get_age_pricing',
     'calculate_booking_price',
     'get_booking_by_id',
     'get_customers_for_booking',
+    'get_booking_id_for_customer',
     'get_bookings_by_account_id',
     'is_showing_expired',
     'get_movie_poster',
@@ -91,9 +131,17 @@ __all__ = [
     'create_session_token',
     'invalidate_session_token',
     'cleanup_expired_sessions',
+    'add_session_revocation',
+    'cleanup_expired_revocations',
     'add_account',
     'modify_account_profile',
     'modify_account_password',
     'check_seats_availability',
-    'create_complete_booking_secure'
+    'create_complete_booking_secure',
+    'hold_seats',
+    'release_seat_holds',
+    'release_expired_seat_holds',
+    'claim_ticket_deliveries',
+    'mark_ticket_delivery_sent',
+    'mark_ticket_delivery_failed'
 ]
@@ -1,6 +1,7 @@
 import mysql.connector
 import logging
 from contextlib import contextmanager
+from flask import g, has_app_context
 from mysql.connector import pooling
 from ..config import get_config
 
@@ -41,14 +42,142 @@ except mysql.connector.Error as e:
     logger.error(f"Error creating connection pool: {e}")
     connection_pool = None
 
-@contextmanager
-def get_db_connection():
-    """Get a database connection from the pool with context manager"""
+def _checkout_connection():
+    """Take a connection out of the pool"""
     if connection_pool is None:
         # Fallback to direct connection if pool failed
-        conn = mysql.connector.connect(**DB_CONFIG)
-    else:
-        conn = connection_pool.get_connection()
+        return mysql.connector.connect(**DB_CONFIG)
+    return connection_pool.get_connection()
+
+class CountingCursor:
+    """Cursor wrapper counting the statements executed during a request"""
+    
+    def __init__(self, cursor, request_connection):
+        self._cursor = cursor
+        self._request_connection = request_connection
+    
+    def execute(self, *args, **kwargs):
+        self._request_connection.unit_of_work.query_count += 1
+        with self._request_connection.track_errors():
+            return self._cursor.execute(*args, **kwargs)
+    
+    def executemany(self, *args, **kwargs):
+        self._request_connection.unit_of_work.query_count += 1
+        with self._request_connection.track_errors():
+            return self._cursor.executemany(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+
+class RequestConnection:
+    """Connection shared by every database call of a request
+    
+    Wraps a pooled connection: cursors count their statements and close()
+    is a no-op, the connection goes back to the pool at request teardown.
+    
+    The pool checks the connection when it is taken out; after that it is
+    not pinged again (is_connected() costs a round trip). A database error
+    marks it broken instead, and the next database call of the request
+    takes a new connection.
+    """
+    
+    def __init__(self, conn, unit_of_work):
+        self._conn = conn
+        self.unit_of_work = unit_of_work
+        self.broken = False
+    
+    @contextmanager
+    def track_errors(self):
+        """Mark the connection broken when a database error is raised"""
+        try:
+            yield
+        except mysql.connector.Error:
+            self.broken = True
+            raise
+    
+    def cursor(self, *args, **kwargs):
+        with self.track_errors():
+            return CountingCursor(self._conn.cursor(*args, **kwargs), self)
+    
+    def commit(self):
+        with self.track_errors():
+            self._conn.commit()
+    
+    def rollback(self):
+        with self.track_errors():
+            self._conn.rollback()
+    
+    def is_connected(self):
+        return not self.broken
+    
+    def close(self):
+        pass
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+class UnitOfWork:
+    """Request-scoped database connection, acquired lazily and released at teardown"""
+    
+    def __init__(self):
+        self.connection = None
+        self.query_count = 0
+        self.checkouts = 0
+    
+    def get_connection(self):
+        """Return the request connection, taking it from the pool on first use"""
+        if self.connection is None or self.connection.broken:
+            self.release()
+            self.connection = RequestConnection(_checkout_connection(), self)
+            self.checkouts += 1
+        return self.connection
+    
+    def release(self):
+        """Roll back any unfinished transaction and give the connection back to the pool"""
+        if self.connection is None:
+            return
+        
+        conn = self.connection._conn
+        self.connection = None
+        try:
+            # in_transaction is tracked client-side, no round trip
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error as e:
+            logger.error(f"Error rolling back request connection: {e}")
+        finally:
+            conn.close()
+
+def get_unit_of_work():
+    """Return the unit of work of the current request, or None outside of a request"""
+    if not has_app_context():
+        return None
+    if '_db_unit_of_work' not in g:
+        g._db_unit_of_work = UnitOfWork()
+    return g._db_unit_of_work
+
+def begin_transaction(conn):
+    """Start a transaction on a connection that may be shared by the request
+    
+    Earlier reads of the request leave an implicit read transaction open
+    (autocommit is off), which is ended first.
+    """
+    if conn.in_transaction:
+        conn.rollback()
+    conn.start_transaction()
+
+@contextmanager
+def get_db_connection():
+    """Get a database connection with context manager
+    
+    Inside a Flask request every call shares the request connection,
+    elsewhere (background jobs, scripts) a connection is taken from the pool.
+    """
+    unit_of_work = get_unit_of_work()
+    conn = unit_of_work.get_connection() if unit_of_work else _checkout_connection()
     
     try:
         yield conn
@@ -59,6 +188,28 @@ def get_db_connection():
     finally:
         conn.close()
 
+def init_db_request_scope(app):
+    """Release the request connection at teardown and record query counts"""
+    
+    @app.after_request
+    def add_query_count_header(response):
+        unit_of_work = g.get('_db_unit_of_work')
+        if app.debug and unit_of_work is not None:
+            response.headers['X-DB-Queries'] = str(unit_of_work.query_count)
+        return response
+    
+    @app.teardown_appcontext
+    def release_db_connection(exception=None):
+        unit_of_work = g.pop('_db_unit_of_work', None)
+        if unit_of_work is None:
+            return
+        
+        unit_of_work.release()
+        logger.debug(
+            f"Request used {unit_of_work.query_count} queries "
+            f"over {unit_of_work.checkouts} connection checkout(s)"
+        )
+
 def test_database_connection():
     """Test database connection and return account count"""
     try:
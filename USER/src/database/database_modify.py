@@ -2,23 +2,36 @@ import mysql.connector
 import secrets
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
-from .database import get_db_connection, handle_db_errors, logger
+from .database import get_db_connection, handle_db_errors, begin_transaction, logger
+from .database_retrieve import (
+    invalidate_cached_session,
+    invalidate_cached_sessions_for_account,
+    apply_occupancy_change,
+    invalidate_occupancy,
+    quote_booking_price
+)
 from ..config import get_config
+from shared.booking_summary import refresh_booking_summaries
 
 # Get configuration
 config = get_config()
 
 @handle_db_errors(default_return=None)
-def create_session_token(account_id, ip_address=None, user_agent=None):
-    """Create a new session token in the database"""
+def create_session_token(account_id, ip_address=None, user_agent=None, session_token=None, expires_at=None):
+    """Create a new session token in the database
+    
+    An existing token id and expiry can be given to only record the session (signed tokens).
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
         try:
             # Generate a secure session token
-            session_token = secrets.token_urlsafe(32)
-            session_lifetime_hours = config.SESSION_LIFETIME_HOURS
-            expires_at = datetime.now() + timedelta(hours=session_lifetime_hours)
+            if session_token is None:
+                session_token = secrets.token_urlsafe(32)
+            if expires_at is None:
+                session_lifetime_hours = config.SESSION_LIFETIME_HOURS
+                expires_at = datetime.now() + timedelta(hours=session_lifetime_hours)
             
             cursor.execute("""
                 INSERT INTO account_session (account_id, session_token, expires_at, ip_address, user_agent)
@@ -42,7 +55,15 @@ def invalidate_session_token(session_token):
                 SET is_active = FALSE 
                 WHERE session_token = %s
             """, (session_token,))
+            # Drops the session from the caches of the other processes
+            cursor.execute("""
+                UPDATE account a
+                JOIN account_session s ON s.account_id = a.id
+                SET a.session_version = a.session_version + 1
+                WHERE s.session_token = %s
+            """, (session_token,))
             conn.commit()
+            invalidate_cached_session(session_token)
             return True
         finally:
             cursor.close()
@@ -66,6 +87,36 @@ def cleanup_expired_sessions():
         finally:
             cursor.close()
 
+@handle_db_errors(default_return=False)
+def add_session_revocation(expires_at, jti=None, account_id=None, revoked_before=None):
+    """Record the revocation of a signed session token, or of all tokens of an account issued until a timestamp (included)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                INSERT INTO session_revocation (jti, account_id, revoked_before, expires_at)
+                VALUES (%s, %s, %s, %s)
+            """, (jti, account_id, revoked_before, expires_at))
+            conn.commit()
+            return True
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=False)
+def cleanup_expired_revocations():
+    """Delete revocations whose tokens have expired anyway"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM session_revocation WHERE expires_at < %s", (datetime.now(),))
+            conn.commit()
+            logger.info(f"Cleaned up {cursor.rowcount} expired session revocations.")
+            return True
+        finally:
+            cursor.close()
+
 def add_account(first_name, last_name, email, username, password, birthday=None):
     """Create a new user account with full details"""
     try:
@@ -147,16 +198,25 @@ def modify_account_profile(user_id, first_name, last_name, email, username, birt
             # Update account information
             cursor.execute("""
                 UPDATE account 
-                SET first_name = %s, last_name = %s, email = %s, username = %s, birthday = %s, profile_modified_at = NOW()
+                SET first_name = %s, last_name = %s, email = %s, username = %s, birthday = %s, profile_modified_at = NOW(),
+                    session_version = session_version + 1
                 WHERE id = %s
             """, (first_name, last_name, email, username, birthday, user_id))
+            affected_rows = cursor.rowcount
+            
+            # The admin booking listing shows the username and email of the account
+            cursor.execute("""
+                UPDATE booking_summary SET username = %s, account_email = %s WHERE account_id = %s
+            """, (username, email, user_id))
             
             conn.commit()
-            affected_rows = cursor.rowcount
             
             if affected_rows == 0:
                 return {"success": False, "error": "User not found"}
             
+            # Cached sessions carry the old profile data
+            invalidate_cached_sessions_for_account(user_id)
+            
             # Return the updated user data
             cursor.execute("SELECT id, first_name, last_name, email, username, birthday FROM account WHERE id = %s", (user_id,))
             user_data = cursor.fetchone()
@@ -218,7 +278,7 @@ def modify_account_password(user_id, current_password, new_password):
             # Update password
             cursor.execute("""
                 UPDATE account 
-                SET password_hash = %s, password_modified_at = NOW()
+                SET password_hash = %s, password_modified_at = NOW(), session_version = session_version + 1
                 WHERE id = %s
             """, (new_password_hash, user_id))
             
@@ -230,6 +290,8 @@ def modify_account_password(user_id, current_password, new_password):
             if affected_rows == 0:
                 return {"success": False, "error": "Password update failed"}
             
+            invalidate_cached_sessions_for_account(user_id)
+            
             return {"success": True, "message": "Password updated successfully"}
             
     except mysql.connector.Error as e:
@@ -263,7 +325,126 @@ def check_seats_availability(seat_ids, showing_id):
             cursor.close()
 
 @handle_db_errors(default_return=None)
-def create_complete_booking_secure(showing_id, account_id, spectators, selected_seats, booker_info=None):
+def hold_seats(showing_id, seat_ids, hold_key):
+    """
+    Atomically hold seats of a showing for a session until the booking is confirmed
+    
+    Any previous hold of the same hold key is released first, so a session holds
+    at most one seat selection at a time.
+    
+    Returns:
+        Dictionary with success and expires_at, or success False with an error
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(minutes=config.SEAT_HOLD_MINUTES)
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            begin_transaction(conn)
+            
+            # Lock the showing row (also serializes with bookings) and publish the change to seat maps
+            cursor.execute("""
+                UPDATE showing SET occupancy_version = occupancy_version + 1 WHERE id = %s
+            """, (showing_id,))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return {'success': False, 'error': 'Showing not found'}
+            
+            # Release our previous holds and the expired holds of this showing
+            cursor.execute("""
+                DELETE FROM seathold
+                WHERE hold_key = %s OR (showing_id = %s AND expires_at <= %s)
+            """, (hold_key, showing_id, now))
+            
+            placeholders = ','.join(['%s'] * len(seat_ids))
+            cursor.execute(f"""
+                SELECT seat_id FROM seatreservation
+                WHERE showing_id = %s AND seat_id IN ({placeholders})
+                UNION ALL
+                SELECT seat_id FROM seathold
+                WHERE showing_id = %s AND seat_id IN ({placeholders})
+            """, [showing_id] + seat_ids + [showing_id] + seat_ids)
+            if cursor.fetchall():
+                conn.rollback()
+                return {'success': False, 'error': 'Some selected seats are no longer available'}
+            
+            cursor.executemany("""
+                INSERT INTO seathold (showing_id, seat_id, hold_key, expires_at)
+                VALUES (%s, %s, %s, %s)
+            """, [(showing_id, seat_id, hold_key, expires_at) for seat_id in seat_ids])
+            
+            conn.commit()
+            invalidate_occupancy(showing_id)
+            
+            return {'success': True, 'expires_at': expires_at}
+        
+        except mysql.connector.IntegrityError:
+            # Unique (showing_id, seat_id): another session held a seat first
+            conn.rollback()
+            return {'success': False, 'error': 'Some selected seats are no longer available'}
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=False)
+def release_seat_holds(hold_key):
+    """Release every seat held with a hold key"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            begin_transaction(conn)
+            
+            cursor.execute("SELECT DISTINCT showing_id FROM seathold WHERE hold_key = %s", (hold_key,))
+            showing_ids = [row[0] for row in cursor.fetchall()]
+            
+            if showing_ids:
+                cursor.execute("DELETE FROM seathold WHERE hold_key = %s", (hold_key,))
+                _bump_occupancy_versions(cursor, showing_ids)
+            
+            conn.commit()
+            for showing_id in showing_ids:
+                invalidate_occupancy(showing_id)
+            return True
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=False)
+def release_expired_seat_holds():
+    """Delete expired seat holds and publish the freed seats to seat maps"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            now = datetime.now()
+            begin_transaction(conn)
+            
+            cursor.execute("SELECT DISTINCT showing_id FROM seathold WHERE expires_at <= %s", (now,))
+            showing_ids = [row[0] for row in cursor.fetchall()]
+            
+            if showing_ids:
+                cursor.execute("DELETE FROM seathold WHERE expires_at <= %s", (now,))
+                released_holds = cursor.rowcount
+                _bump_occupancy_versions(cursor, showing_ids)
+                logger.info(f"Released {released_holds} expired seat holds.")
+            
+            conn.commit()
+            for showing_id in showing_ids:
+                invalidate_occupancy(showing_id)
+            return True
+        finally:
+            cursor.close()
+
+def _bump_occupancy_versions(cursor, showing_ids):
+    """Bump the occupancy version of several showings"""
+    placeholders = ','.join(['%s'] * len(showing_ids))
+    cursor.execute(f"""
+        UPDATE showing SET occupancy_version = occupancy_version + 1 WHERE id IN ({placeholders})
+    """, showing_ids)
+
+@handle_db_errors(default_return=None)
+def create_complete_booking_secure(showing_id, account_id, spectators, selected_seats, booker_info=None, hold_key=None):
     """
     Create a complete booking with server-side price calculation
     
@@ -273,46 +454,67 @@ def create_complete_booking_secure(showing_id, account_id, spectators, selected_
         spectators: List of spectator dictionaries with firstname, lastname, age
         selected_seats: List of seat IDs
         booker_info: Dictionary with booker first_name, last_name, email
+        hold_key: Hold key of the session, its seat holds are converted into reservations
+    
+    The ticket email to the booker is queued in the ticket_outbox table, and the booking_summary
+    row is written, in the same transaction.
     
     Returns:
         Dictionary with booking_id and calculated price info
     """
     
-    # First, calculate the price server-side
-    from .database_retrieve import calculate_booking_price
-    
-    price_info = calculate_booking_price(showing_id, spectators)
-    if not price_info:
-        return {'success': False, 'error': 'Could not calculate price'}
-    
     # Validate that number of spectators matches number of seats
-    if len(spectators) != len(selected_seats):
+    if not selected_seats or len(spectators) != len(selected_seats):
         return {'success': False, 'error': 'Number of spectators must match number of seats'}
     
+    # Everything below runs on one connection in one transaction
     with get_db_connection() as conn:
         cursor = conn.cursor(dictionary=True)
         
         try:
             # Start transaction
-            conn.start_transaction()
+            begin_transaction(conn)
             
-            # Verify seats are still available
+            # Bump the occupancy version first: the showing row lock serializes
+            # concurrent bookings of the same showing until commit
+            cursor.execute("""
+                UPDATE showing SET occupancy_version = occupancy_version + 1 WHERE id = %s
+            """, (showing_id,))
+            cursor.execute("SELECT occupancy_version, baseprice FROM showing WHERE id = %s", (showing_id,))
+            showing = cursor.fetchone()
+            if not showing:
+                conn.rollback()
+                return {'success': False, 'error': 'Could not calculate price'}
+            occupancy_version = showing['occupancy_version']
+            
+            # Verify seats are still available (not reserved, not held by another session)
             placeholders = ','.join(['%s'] * len(selected_seats))
             cursor.execute(f"""
                 SELECT seat_id FROM seatreservation 
                 WHERE showing_id = %s AND seat_id IN ({placeholders})
-            """, [showing_id] + selected_seats)
+                UNION ALL
+                SELECT seat_id FROM seathold
+                WHERE showing_id = %s AND seat_id IN ({placeholders})
+                AND hold_key != %s AND expires_at > %s
+            """, [showing_id] + selected_seats + [showing_id] + selected_seats + [hold_key or '', datetime.now()])
             
             occupied_seats = cursor.fetchall()
             if occupied_seats:
                 conn.rollback()
                 return {'success': False, 'error': 'Some seats are no longer available'}
             
+            # Calculate the price server-side, in the same transaction
+            price_info = quote_booking_price(cursor, showing['baseprice'], spectators)
+            if not price_info:
+                conn.rollback()
+                return {'success': False, 'error': 'Could not calculate price'}
+            
             # Use account_id = 1 for anonymous bookings if none provided
             if account_id is None:
                 account_id = 1
             
             # Ensure we have booker info for the booking table
+            deliver_tickets = bool(booker_info and booker_info.get('email'))
             if not booker_info:
                 # Use default values for anonymous bookings
                 booker_info = {
@@ -336,31 +538,67 @@ def create_complete_booking_secure(showing_id, account_id, spectators, selected_
             
             booking_id = cursor.lastrowid
             
-            # Create customer records and seat reservations
-            for i, (spectator, seat_id) in enumerate(zip(spectators, selected_seats)):
-                # Create customer record
-                cursor.execute("""
-                    INSERT INTO customer (firstname, lastname, age, pmr, booking_id)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
+            # Create customer records with a single multi-row insert
+            customer_rows = ', '.join(['(%s, %s, %s, %s, %s)'] * len(spectators))
+            customer_values = []
+            for spectator in spectators:
+                customer_values.extend([
                     spectator['firstname'],
                     spectator['lastname'],
                     int(spectator['age']),
                     spectator.get('pmr', 0),
                     booking_id
-                ))
-                
-                customer_id = cursor.lastrowid
-                
-                # Create seat reservation
+                ])
+            cursor.execute(f"""
+                INSERT INTO customer (firstname, lastname, age, pmr, booking_id)
+                VALUES {customer_rows}
+            """, customer_values)
+            
+            # Auto-increment ids follow the row order of the insert
+            cursor.execute("SELECT id FROM customer WHERE booking_id = %s ORDER BY id", (booking_id,))
+            customer_ids = [row['id'] for row in cursor.fetchall()]
+            
+            # Create seat reservations with a single multi-row insert
+            reservation_rows = ', '.join(['(%s, %s, %s)'] * len(customer_ids))
+            reservation_values = []
+            for customer_id, seat_id in zip(customer_ids, selected_seats):
+                reservation_values.extend([customer_id, showing_id, seat_id])
+            cursor.execute(f"""
+                INSERT INTO seatreservation (customer_id, showing_id, seat_id)
+                VALUES {reservation_rows}
+            """, reservation_values)
+            
+            # Summary row read by the admin booking listing
+            refresh_booking_summaries(cursor, 'booking_id', booking_id)
+            
+            # Queue the ticket email, delivered by the background workers after commit
+            if deliver_tickets:
                 cursor.execute("""
-                    INSERT INTO seatreservation (customer_id, showing_id, seat_id)
+                    INSERT INTO ticket_outbox (booking_id, recipient_email, recipient_name)
                     VALUES (%s, %s, %s)
-                """, (customer_id, showing_id, seat_id))
+                """, (
+                    booking_id,
+                    booker_info['email'],
+                    f"{booker_info['first_name']} {booker_info['last_name']}".strip()
+                ))
+            
+            # The holds of this session are now reservations
+            released_other_holds = False
+            if hold_key:
+                cursor.execute("SELECT seat_id FROM seathold WHERE hold_key = %s", (hold_key,))
+                released_other_holds = any(row['seat_id'] not in selected_seats for row in cursor.fetchall())
+                cursor.execute("DELETE FROM seathold WHERE hold_key = %s", (hold_key,))
             
             # Commit transaction
             conn.commit()
             
+            # Patch the cached occupancy bitset instead of recomputing it
+            # (held seats were already marked, released extra holds need a rebuild)
+            if released_other_holds:
+                invalidate_occupancy(showing_id)
+            else:
+                apply_occupancy_change(showing_id, selected_seats, occupancy_version)
+            
             return {
                 'success': True,
                 'booking_id': booking_id,
@@ -373,3 +611,119 @@ def create_complete_booking_secure(showing_id, account_id, spectators, selected_
             return {'success': False, 'error': 'Database error occurred'}
         finally:
             cursor.close()
+
+@handle_db_errors(default_return=[])
+def claim_ticket_deliveries(limit, lease_seconds):
+    """
+    Claim due ticket deliveries for a worker
+    
+    A single UPDATE marks the rows as sending with a fresh claim token, so
+    concurrent workers (in this or other processes) never claim the same row.
+    Rows left in sending by a crashed worker are claimed again once their
+    lease has expired. Due deliveries whose booking no longer exists are
+    dead-lettered instead of claimed.
+    
+    Returns:
+        List of claimed deliveries (id, booking_id, recipient_email, recipient_name, attempts, claim_token)
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        
+        try:
+            now = datetime.now()
+            claim_token = secrets.token_urlsafe(16)
+            
+            cursor.execute("""
+                UPDATE ticket_outbox o
+                LEFT JOIN booking b ON b.id = o.booking_id
+                SET o.status = 'dead', o.last_error = 'Booking cancelled', o.claim_token = NULL, o.locked_until = NULL
+                WHERE b.id IS NULL
+                  AND ((o.status = 'pending' AND o.next_attempt_at <= %s)
+                       OR (o.status = 'sending' AND o.locked_until <= %s))
+            """, (now, now))
+            
+            cursor.execute("""
+                UPDATE ticket_outbox
+                SET status = 'sending', claim_token = %s, locked_until = %s, attempts = attempts + 1
+                WHERE (status = 'pending' AND next_attempt_at <= %s)
+                   OR (status = 'sending' AND locked_until <= %s)
+                ORDER BY next_attempt_at
+                LIMIT %s
+            """, (claim_token, now + timedelta(seconds=lease_seconds), now, now, limit))
+            conn.commit()
+            
+            if cursor.rowcount == 0:
+                return []
+            
+            cursor.execute("""
+                SELECT id, booking_id, recipient_email, recipient_name, attempts, claim_token
+                FROM ticket_outbox
+                WHERE claim_token = %s
+            """, (claim_token,))
+            
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=False)
+def mark_ticket_delivery_sent(delivery_id, claim_token):
+    """
+    Mark a ticket delivery as sent
+    
+    Only while the worker still owns the claim: once the lease has expired the
+    row may belong to another worker, whose status is left untouched.
+    
+    Returns:
+        True if the row was updated
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE ticket_outbox
+                SET status = 'sent', sent_at = %s, claim_token = NULL, locked_until = NULL, last_error = NULL
+                WHERE id = %s AND claim_token = %s
+            """, (datetime.now(), delivery_id, claim_token))
+            
+            conn.commit()
+            if cursor.rowcount == 0:
+                logger.warning(f"Ticket delivery {delivery_id} was sent after its claim was lost, status left unchanged")
+                return False
+            return True
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=False)
+def mark_ticket_delivery_failed(delivery_id, claim_token, error, next_attempt_at=None):
+    """
+    Record a failed ticket delivery attempt, if the worker still owns the claim
+    
+    Args:
+        delivery_id: ID of the ticket_outbox row
+        claim_token: Claim token the row was claimed with
+        error: Error message of the attempt
+        next_attempt_at: When to retry, or None to dead-letter the delivery
+    
+    Returns:
+        True if the row was updated
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            status = 'pending' if next_attempt_at else 'dead'
+            cursor.execute("""
+                UPDATE ticket_outbox
+                SET status = %s, next_attempt_at = COALESCE(%s, next_attempt_at), last_error = %s,
+                    claim_token = NULL, locked_until = NULL
+                WHERE id = %s AND claim_token = %s
+            """, (status, next_attempt_at, str(error)[:512], delivery_id, claim_token))
+            
+            conn.commit()
+            if cursor.rowcount == 0:
+                logger.warning(f"Ticket delivery {delivery_id} failed after its claim was lost, status left unchanged")
+                return False
+            return True
+        finally:
+            cursor.close()
@@ -1,4 +1,40 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
 from .database import get_db_connection, handle_db_errors, logger
+from ..cache import LRUCache, TTLCache
+from ..config import get_config
+from shared.seatmap import seat_sort_key, sort_seats
+
+# Get configuration
+config = get_config()
+
+# Per-date schedule cache, validated against the catalog version
+catalog_cache = LRUCache(
+    max_entries=config.CATALOG_CACHE_MAX_ENTRIES,
+    max_bytes=config.CATALOG_CACHE_MAX_BYTES
+)
+_catalog_version_lock = threading.Lock()
+_catalog_version_state = {'version': None, 'checked_at': 0.0}
+
+# Seat layouts keyed by room id, validated against room.layout_version
+layout_cache = LRUCache(
+    max_entries=config.LAYOUT_CACHE_MAX_ENTRIES,
+    max_bytes=config.LAYOUT_CACHE_MAX_BYTES
+)
+
+# Seat occupancy bitsets keyed by showing id, validated against showing.occupancy_version
+occupancy_cache = LRUCache(
+    max_entries=config.OCCUPANCY_CACHE_MAX_ENTRIES,
+    max_bytes=config.OCCUPANCY_CACHE_MAX_BYTES
+)
+
+# Validated sessions keyed by token, kept for a short time to spare the auth query,
+# validated against account.session_version so other processes see logouts at once
+session_cache = TTLCache(
+    max_entries=config.SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.SESSION_CACHE_TTL_SECONDS
+)
 
 @handle_db_errors(default_return=None)
 def get_user_by_id(user_id):
@@ -39,15 +75,16 @@ def get_user_by_email(email):
         finally:
             cursor.close()
 
-@handle_db_errors(default_return=None)
-def validate_session_token(session_token):
-    """Validate if a session token is active and not expired"""
+def _load_session(session_token):
+    """Load an active and not expired session with its account from the database"""
     with get_db_connection() as conn:
         cursor = conn.cursor(dictionary=True)
         
         try:
             cursor.execute("""
-                SELECT s.*, a.username, a.email, a.first_name, a.last_name, a.birthday 
+                SELECT s.*, a.username, a.email, a.first_name, a.last_name, a.birthday,
+                       a.created_at AS account_created_at, a.password_modified_at, a.profile_modified_at,
+                       a.session_version
                 FROM account_session s
                 JOIN account a ON s.account_id = a.id
                 WHERE s.session_token = %s 
@@ -59,85 +96,210 @@ def validate_session_token(session_token):
         finally:
             cursor.close()
 
-@handle_db_errors(default_return=[])
-def get_movies_with_showings_by_date(target_date):
-    """Get movies that have non-expired showings on a specific date"""
+def _get_session_version(account_id):
+    """Get the session version of an account (primary key lookup)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT session_version FROM account WHERE id = %s", (account_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=None)
+def validate_session_token(session_token):
+    """Validate if a session token is active and not expired
+    
+    Valid sessions are cached for SESSION_CACHE_TTL_SECONDS. A cached session
+    is only used while its account's session_version is unchanged: logout and
+    account changes bump it, so they apply at once in every process.
+    """
+    session_data = session_cache.get(session_token)
+    if session_data is not None:
+        expires_at = session_data.get('expires_at')
+        if ((expires_at is None or expires_at > datetime.now())
+                and _get_session_version(session_data['account_id']) == session_data['session_version']):
+            return dict(session_data)
+        session_cache.pop(session_token)
+    
+    session_data = _load_session(session_token)
+    if session_data:
+        session_cache.set(session_token, session_data)
+        return dict(session_data)
+    
+    return session_data
+
+@handle_db_errors(default_return=None)
+def get_session_revocations_since(last_id):
+    """Get the signed session revocations recorded after a given id (sync watermark)"""
     with get_db_connection() as conn:
         cursor = conn.cursor(dictionary=True)
         
         try:
-            from datetime import datetime, timedelta
-            current_time = datetime.now()
+            cursor.execute("""
+                SELECT id, jti, account_id, revoked_before, expires_at
+                FROM session_revocation
+                WHERE id > %s AND expires_at > %s
+                ORDER BY id
+            """, (last_id, datetime.now()))
             
-            # Get movies that have showings on the target date
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+def invalidate_cached_session(session_token):
+    """Remove a session token from the validated sessions cache"""
+    session_cache.pop(session_token)
+
+def invalidate_cached_sessions_for_account(account_id):
+    """Remove every cached session of an account (after a profile or password change)"""
+    return session_cache.discard_matching(lambda session_data: session_data['account_id'] == account_id)
+
+def get_session_cache_stats():
+    """Get the hit/miss counters of the validated sessions cache"""
+    return session_cache.stats()
+
+@handle_db_errors(default_return=None)
+def get_catalog_version():
+    """Get the current catalog version (bumped by the admin app on every schedule change)"""
+    with _catalog_version_lock:
+        checked_at = _catalog_version_state['checked_at']
+        if (_catalog_version_state['version'] is not None
+                and time.monotonic() - checked_at < config.CATALOG_VERSION_CHECK_SECONDS):
+            return _catalog_version_state['version']
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT version FROM cache_version WHERE name = 'catalog'")
+            row = cursor.fetchone()
+            version = row[0] if row else 0
+        finally:
+            cursor.close()
+    
+    with _catalog_version_lock:
+        _catalog_version_state['version'] = version
+        _catalog_version_state['checked_at'] = time.monotonic()
+    
+    return version
+
+def _filter_current_showings(movies, current_time):
+    """Return copies of the cached movies keeping only showings that have not ended yet"""
+    current_movies = []
+    
+    for movie in movies:
+        valid_showings = []
+        for showing in movie['showings']:
+            if showing['_ends_at'] >= current_time:
+                valid_showing = dict(showing)
+                del valid_showing['_ends_at']
+                valid_showings.append(valid_showing)
+        
+        # Only include movie if it has at least one valid showing
+        if valid_showings:
+            current_movie = dict(movie)
+            current_movie['showings'] = valid_showings
+            if movie['poster'] is not None:
+                current_movie['poster'] = dict(movie['poster'])
+            current_movies.append(current_movie)
+    
+    return current_movies
+
+def _load_movies_with_showings_by_date(target_date):
+    """Load all movies with their not yet finished showings and primary poster on a specific date
+    
+    Everything is fetched in two round trips: one for the movies joined with
+    their showings, one for the primary posters of those movies.
+    """
+    # Range predicate on the date so the showing(date, ...) index can be used
+    day_start = date.fromisoformat(target_date)
+    day_end = day_start + timedelta(days=1)
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        
+        try:
             cursor.execute("""
-                SELECT DISTINCT m.* 
+                SELECT m.*, s.id AS showing_id, s.date AS showing_date, s.starttime AS showing_starttime,
+                       s.baseprice AS showing_baseprice, s.room_id AS showing_room_id,
+                       s.ends_at AS showing_ends_at
                 FROM movie m
                 INNER JOIN showing s ON m.id = s.movie_id
-                WHERE DATE(s.date) = %s
-                ORDER BY m.name
-            """, (target_date,))
-            movies = cursor.fetchall()
-            
-            # For each movie, get its non-expired showings for the target date
-            movies_with_valid_showings = []
-            
-            for movie in movies:
-                cursor.execute("""
-                    SELECT id, date, starttime, baseprice, room_id 
-                    FROM showing 
-                    WHERE movie_id = %s AND DATE(date) = %s
-                    ORDER BY starttime
-                """, (movie['id'], target_date))
-                all_showings = cursor.fetchall()
+                WHERE s.date >= %s AND s.date < %s AND s.ends_at >= %s
+                ORDER BY m.name, m.id, s.starttime
+            """, (day_start, day_end, datetime.now()))
+            rows = cursor.fetchall()
+            
+            # Group the showing rows under their movie, keeping the movie order
+            movies = []
+            movies_by_id = {}
+            for row in rows:
+                showing = {
+                    'id': row.pop('showing_id'),
+                    'date': row.pop('showing_date'),
+                    'starttime': row.pop('showing_starttime'),
+                    'baseprice': row.pop('showing_baseprice'),
+                    'room_id': row.pop('showing_room_id'),
+                    '_ends_at': row.pop('showing_ends_at')
+                }
                 
-                # Filter out expired showings using Python datetime calculations
-                valid_showings = []
+                movie = movies_by_id.get(row['id'])
+                if movie is None:
+                    movie = row
+                    movie['showings'] = []
+                    movie['poster'] = None
+                    movies_by_id[movie['id']] = movie
+                    movies.append(movie)
                 
-                for showing in all_showings:
-                    # Calculate show start time
-                    show_date = showing['date']
-                    start_time = showing['starttime']
-                    duration = movie['duration']
-                    
-                    # Convert starttime to seconds if it's a timedelta
-                    if hasattr(start_time, 'total_seconds'):
-                        start_seconds = int(start_time.total_seconds())
-                    else:
-                        start_seconds = int(start_time)
-                    
-                    # Calculate show start datetime
-                    start_hour = start_seconds // 3600
-                    start_minute = (start_seconds % 3600) // 60
-                    start_second = start_seconds % 60
-                    
-                    show_start = datetime.combine(show_date, datetime.min.time().replace(
-                        hour=start_hour, minute=start_minute, second=start_second
-                    ))
-                    
-                    # Calculate show end time
-                    show_end = show_start + timedelta(minutes=duration)
-                    
-                    # Only include showing if it hasn't ended yet
-                    if show_end >= current_time:
-                        # Convert timedelta objects to total seconds for JSON serialization
-                        if hasattr(showing['starttime'], 'total_seconds'):
-                            showing['starttime'] = showing['starttime'].total_seconds()
-                        valid_showings.append(showing)
+                # Convert starttime to seconds if it's a timedelta
+                if hasattr(showing['starttime'], 'total_seconds'):
+                    showing['starttime'] = showing['starttime'].total_seconds()
                 
-                # Only include movie if it has at least one valid showing
-                if valid_showings:
-                    movie['showings'] = valid_showings
-                    movies_with_valid_showings.append(movie)
-            
-            print(f"DEBUG: Movies with non-expired showings on {target_date}: {len(movies_with_valid_showings)}")
-            for movie in movies_with_valid_showings:
-                print(f"  - {movie['name']}: {len(movie['showings'])} showings")
+                movie['showings'].append(showing)
+            
+            if movies_by_id:
+                # Primary poster metadata (without image blob data) for all movies at once
+                placeholders = ', '.join(['%s'] * len(movies_by_id))
+                cursor.execute(f"""
+                    SELECT id, movie_id, name, mime_type, file_size, content_hash
+                    FROM movieposter
+                    WHERE movie_id IN ({placeholders}) AND is_primary = 1
+                    ORDER BY id
+                """, tuple(movies_by_id))
+                
+                for poster in cursor.fetchall():
+                    movie = movies_by_id[poster.pop('movie_id')]
+                    if movie['poster'] is None:
+                        movie['poster'] = poster
             
-            return movies_with_valid_showings
+            return movies
         finally:
             cursor.close()
 
+@handle_db_errors(default_return=[])
+def get_movies_with_showings_by_date(target_date):
+    """Get movies that have non-expired showings on a specific date, with their primary poster
+    
+    The full schedule of a date is cached per catalog version, expired showings
+    are filtered out on every read so cached entries never show finished screenings.
+    """
+    cache_key = str(target_date)
+    version = get_catalog_version()
+    
+    entry = catalog_cache.get(cache_key)
+    if entry is None or version is None or entry['version'] != version:
+        movies = _load_movies_with_showings_by_date(cache_key)
+        entry = {'version': version, 'movies': movies}
+        
+        # Without a known catalog version there is nothing to validate the entry against
+        if version is not None:
+            catalog_cache.set(cache_key, entry)
+    
+    return _filter_current_showings(entry['movies'], datetime.now())
+
 @handle_db_errors(default_return=None)
 def get_showing_by_id(showing_id):
     """Get showing details by ID with movie and room information"""
@@ -165,59 +327,168 @@ def get_showing_by_id(showing_id):
 
 
 def is_showing_expired(showing):
-    """Check if a showing has expired based on end time (start time + movie duration)
+    """Check if a showing has expired based on its persisted end time
     
     Args:
-        showing: A showing dictionary with date, starttime, and duration fields
+        showing: A showing dictionary with the ends_at field
         
     Returns:
         bool: True if the showing has expired (ended), False otherwise
     """
-    from datetime import datetime, timedelta
-    
-    if not showing:
+    if not showing or not showing.get('ends_at'):
+        # Without a known end time, consider expired to be safe
         return True
     
-    try:
-        current_time = datetime.now()
-        show_date = showing['date']
-        start_time = showing['starttime'] 
-        duration = showing['duration']
-        
-        # Convert starttime to seconds if it's a timedelta
-        if hasattr(start_time, 'total_seconds'):
-            start_seconds = int(start_time.total_seconds())
-        else:
-            start_seconds = int(start_time)
-        
-        # Calculate show start datetime
-        start_hour = start_seconds // 3600
-        start_minute = (start_seconds % 3600) // 60
-        start_second = start_seconds % 60
-        
-        show_start = datetime.combine(show_date, datetime.min.time().replace(
-            hour=start_hour, minute=start_minute, second=start_second
-        ))
-        
-        # Calculate show end time
-        show_end = show_start + timedelta(minutes=duration)
-        
-        # Return True if the show has ended
-        is_expired = show_end < current_time
+    return showing['ends_at'] < datetime.now()
+
+def _load_room_seats(cursor, room_id):
+    """Load the seats of a room in seat order (row number, column), the order used by occupancy bitsets
+    
+    Sorted in Python rather than by SQL, where row AA would sort between A and B.
+    """
+    cursor.execute("""
+        SELECT id, type, seat_row, seat_column
+        FROM seat
+        WHERE room_id = %s
+        ORDER BY id
+    """, (room_id,))
+    return sort_seats(cursor.fetchall())
+
+def _get_showing_versions(cursor, showing_id):
+    """Get the room of a showing with its layout and occupancy versions"""
+    cursor.execute("""
+        SELECT s.room_id, s.occupancy_version, r.layout_version
+        FROM showing s
+        JOIN room r ON s.room_id = r.id
+        WHERE s.id = %s
+    """, (showing_id,))
+    return cursor.fetchone()
+
+def _get_room_layout(cursor, room_id, layout_version):
+    """Get the seat layout of a room from the cache, reloading it when its version changed"""
+    layout = layout_cache.get(room_id)
+    if layout is None or layout['version'] != layout_version:
+        seats = tuple(_load_room_seats(cursor, room_id))
+        layout = {
+            'version': layout_version,
+            'seats': seats,
+            'seat_index': {seat['id']: index for index, seat in enumerate(seats)}
+        }
+        layout_cache.set(room_id, layout)
+    return layout
+
+def _build_occupancy(cursor, showing_id, room_id, version, layout):
+    """Build and cache the occupancy bitset of a showing from its seat reservations and active holds"""
+    now = datetime.now()
+    cursor.execute("""
+        SELECT seat_id, NULL AS expires_at FROM seatreservation WHERE showing_id = %s
+        UNION ALL
+        SELECT seat_id, expires_at FROM seathold WHERE showing_id = %s AND expires_at > %s
+    """, (showing_id, showing_id, now))
+    
+    seat_index = layout['seat_index']
+    bits = bytearray((len(layout['seats']) + 7) // 8)
+    valid_until = None
+    for taken_seat in cursor.fetchall():
+        index = seat_index.get(taken_seat['seat_id'])
+        if index is not None:
+            bits[index >> 3] |= 1 << (index & 7)
         
-        print(f"DEBUG: Checking expiration for showing {showing.get('id', 'unknown')}")
-        print(f"  Show start: {show_start}")
-        print(f"  Show end: {show_end}")
-        print(f"  Current time: {current_time}")
-        print(f"  Is expired: {is_expired}")
-        print("---")
+        # The bitset is outdated as soon as the first hold expires
+        if taken_seat['expires_at'] is not None and (valid_until is None or taken_seat['expires_at'] < valid_until):
+            valid_until = taken_seat['expires_at']
+    
+    occupancy = {
+        'version': version,
+        'room_id': room_id,
+        'layout_version': layout['version'],
+        'seat_count': len(layout['seats']),
+        'valid_until': valid_until,
+        'bits': bytes(bits)
+    }
+    occupancy_cache.set(showing_id, occupancy)
+    return occupancy
+
+def _get_occupancy(cursor, showing_id, showing, layout):
+    """Get the occupancy bitset of a showing from the cache, rebuilding it when outdated"""
+    occupancy = occupancy_cache.get(showing_id)
+    if (occupancy is None or occupancy['version'] != showing['occupancy_version']
+            or occupancy['layout_version'] != layout['version']
+            or (occupancy['valid_until'] is not None and occupancy['valid_until'] <= datetime.now())):
+        occupancy = _build_occupancy(cursor, showing_id, showing['room_id'],
+                                     showing['occupancy_version'], layout)
+    return occupancy
+
+def is_seat_occupied(occupancy, index):
+    """Check the bit of the index-th seat in an occupancy bitset"""
+    return bool(occupancy['bits'][index >> 3] & (1 << (index & 7)))
+
+@handle_db_errors(default_return=None)
+def get_showing_occupancy(showing_id):
+    """Get the seat occupancy of a showing as a bitset aligned to the room seat order
+    
+    Returns a dictionary with the occupancy and layout versions, the seat count
+    and the bits (bit i & 7 of byte i >> 3 is set when the i-th seat is reserved
+    or held), or None if the showing does not exist.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
         
-        return is_expired
+        try:
+            showing = _get_showing_versions(cursor, showing_id)
+            if not showing:
+                return None
+            
+            layout = _get_room_layout(cursor, showing['room_id'], showing['layout_version'])
+            return _get_occupancy(cursor, showing_id, showing, layout)
+        finally:
+            cursor.close()
+
+def invalidate_occupancy(showing_id):
+    """Drop the cached occupancy bitset of a showing (rebuilt on the next read)"""
+    occupancy_cache.pop(showing_id)
+
+@handle_db_errors(default_return=[])
+def get_held_seat_ids(showing_id, hold_key):
+    """Get the ids of the seats of a showing currently held with a given hold key"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
         
-    except Exception as e:
-        print(f"ERROR: Failed to check showing expiration: {e}")
-        # In case of error, consider expired to be safe
-        return True
+        try:
+            cursor.execute("""
+                SELECT seat_id FROM seathold
+                WHERE showing_id = %s AND hold_key = %s AND expires_at > %s
+            """, (showing_id, hold_key, datetime.now()))
+            
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+def apply_occupancy_change(showing_id, seat_ids, new_version):
+    """Mark seats as reserved in the cached bitset after a booking bumped the occupancy version
+    
+    The cached entry is only patched when it is exactly one version behind,
+    otherwise it is dropped and rebuilt on the next read.
+    """
+    occupancy = occupancy_cache.get(showing_id)
+    if occupancy is None:
+        return
+    
+    layout = layout_cache.get(occupancy['room_id'])
+    if (occupancy['version'] != new_version - 1 or layout is None
+            or layout['version'] != occupancy['layout_version']):
+        occupancy_cache.pop(showing_id)
+        return
+    
+    bits = bytearray(occupancy['bits'])
+    for seat_id in seat_ids:
+        index = layout['seat_index'].get(seat_id)
+        if index is None:
+            occupancy_cache.pop(showing_id)
+            return
+        bits[index >> 3] |= 1 << (index & 7)
+    
+    occupancy_cache.set(showing_id, dict(occupancy, version=new_version, bits=bytes(bits)))
 
 @handle_db_errors(default_return=[])
 def get_seats_for_showing(showing_id):
@@ -226,26 +497,38 @@ def get_seats_for_showing(showing_id):
         cursor = conn.cursor(dictionary=True)
         
         try:
-            # First get the room_id from the showing
-            cursor.execute("SELECT room_id FROM showing WHERE id = %s", (showing_id,))
-            showing = cursor.fetchone()
-            
+            showing = _get_showing_versions(cursor, showing_id)
             if not showing:
                 return []
             
-            room_id = showing['room_id']
+            # Static layout from the room cache, reservation status from the occupancy bitset
+            layout = _get_room_layout(cursor, showing['room_id'], showing['layout_version'])
+            occupancy = _get_occupancy(cursor, showing_id, showing, layout)
             
-            # Get all seats for this room with their reservation status
-            cursor.execute("""
-                SELECT s.id, s.type, s.seat_row, s.seat_column,
-                       CASE WHEN sr.seat_id IS NOT NULL THEN 1 ELSE 0 END as is_occupied
-                FROM seat s
-                LEFT JOIN seatreservation sr ON s.id = sr.seat_id AND sr.showing_id = %s
-                WHERE s.room_id = %s
-                ORDER BY s.seat_row, s.seat_column
-            """, (showing_id, room_id))
+            return [
+                dict(seat, is_occupied=1 if is_seat_occupied(occupancy, index) else 0)
+                for index, seat in enumerate(layout['seats'])
+            ]
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=[])
+def get_showing_seats_by_ids(showing_id, seat_ids):
+    """Get the layout (id, type, row, column) of some seats of a showing's room, in seat order
+    
+    Seats that do not belong to the showing's room are left out.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        
+        try:
+            showing = _get_showing_versions(cursor, showing_id)
+            if not showing:
+                return []
             
-            return cursor.fetchall()
+            layout = _get_room_layout(cursor, showing['room_id'], showing['layout_version'])
+            indexes = sorted(layout['seat_index'][seat_id] for seat_id in set(seat_ids) if seat_id in layout['seat_index'])
+            return [dict(layout['seats'][index]) for index in indexes]
         finally:
             cursor.close()
 
@@ -290,62 +573,77 @@ def calculate_booking_price(showing_id, spectators):
             showing = cursor.fetchone()
             if not showing:
                 return None
-                
-            # Convert base price from cents to euros
-            base_price_cents = float(showing['baseprice'])
-            base_price = base_price_cents / 100.0  # Convert cents to euros
-            
-            # Get age pricing rules
-            cursor.execute("""
-                SELECT id, name, agemin, agemax, factor
-                FROM ageprice
-                ORDER BY agemin
-            """)
-            
-            age_rules = cursor.fetchall()
-            
-            if not age_rules:
-                return None
-            
-            total_price = 0.0
-            price_breakdown = []
-            
-            # Calculate price for each spectator
-            for spectator in spectators:
-                age = int(spectator['age'])
-                
-                # Find appropriate age rule
-                applicable_rule = None
-                for rule in age_rules:
-                    if rule['agemin'] <= age <= rule['agemax']:
-                        applicable_rule = rule
-                        break
-                
-                if not applicable_rule:
-                    # Fallback to adult pricing if no rule matches
-                    applicable_rule = next((r for r in age_rules if r['name'] == 'Adulte'), age_rules[0])
-                
-                # Calculate price for this spectator (already in euros)
-                spectator_price = base_price * float(applicable_rule['factor'])
-                total_price += spectator_price
-                
-                price_breakdown.append({
-                    'age': age,
-                    'category': applicable_rule['name'],
-                    'factor': float(applicable_rule['factor']),
-                    'price': round(spectator_price, 2)
-                })
             
-            return {
-                'total_price': round(total_price, 2),
-                'base_price': base_price,
-                'spectator_count': len(spectators),
-                'price_breakdown': price_breakdown
-            }
+            return quote_booking_price(cursor, showing['baseprice'], spectators)
             
         finally:
             cursor.close()
 
+def quote_booking_price(cursor, base_price_cents, spectators):
+    """
+    Calculate the price of a booking on an open cursor
+    
+    Lets the booking transaction quote the price on its own connection.
+    
+    Args:
+        cursor: Dictionary cursor of the caller's connection
+        base_price_cents: Base price of the showing in cents
+        spectators: List of dictionaries with 'age' key
+    
+    Returns:
+        Dictionary with total_price and price_breakdown, or None without age pricing rules
+    """
+    # Convert base price from cents to euros
+    base_price = float(base_price_cents) / 100.0
+    
+    # Get age pricing rules
+    cursor.execute("""
+        SELECT id, name, agemin, agemax, factor
+        FROM ageprice
+        ORDER BY agemin
+    """)
+    
+    age_rules = cursor.fetchall()
+    
+    if not age_rules:
+        return None
+    
+    total_price = 0.0
+    price_breakdown = []
+    
+    # Calculate price for each spectator
+    for spectator in spectators:
+        age = int(spectator['age'])
+        
+        # Find appropriate age rule
+        applicable_rule = None
+        for rule in age_rules:
+            if rule['agemin'] <= age <= rule['agemax']:
+                applicable_rule = rule
+                break
+        
+        if not applicable_rule:
+            # Fallback to adult pricing if no rule matches
+            applicable_rule = next((r for r in age_rules if r['name'] == 'Adulte'), age_rules[0])
+        
+        # Calculate price for this spectator (already in euros)
+        spectator_price = base_price * float(applicable_rule['factor'])
+        total_price += spectator_price
+        
+        price_breakdown.append({
+            'age': age,
+            'category': applicable_rule['name'],
+            'factor': float(applicable_rule['factor']),
+            'price': round(spectator_price, 2)
+        })
+    
+    return {
+        'total_price': round(total_price, 2),
+        'base_price': base_price,
+        'spectator_count': len(spectators),
+        'price_breakdown': price_breakdown
+    }
+
 @handle_db_errors(default_return=None)
 def get_booking_by_id(booking_id):
     """Get booking details with showing and movie information"""
@@ -389,10 +687,41 @@ def get_customers_for_booking(booking_id):
                 JOIN seatreservation sr ON c.id = sr.customer_id
                 JOIN seat s ON sr.seat_id = s.id
                 WHERE c.booking_id = %s
-                ORDER BY s.seat_row, s.seat_column
             """, (booking_id,))
             
-            return cursor.fetchall()
+            return sorted(cursor.fetchall(), key=seat_sort_key)
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=None)
+def get_booking_id_for_customer(customer_id):
+    """Get the id of the booking a customer/ticket belongs to, or None if it doesn't exist"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT booking_id FROM customer WHERE id = %s", (customer_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+@handle_db_errors(default_return=None)
+def get_ticket_delivery_status(booking_id):
+    """Get the delivery status of the ticket email of a booking, or None if none was queued"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        
+        try:
+            cursor.execute("""
+                SELECT status, attempts, next_attempt_at, last_error, sent_at
+                FROM ticket_outbox
+                WHERE booking_id = %s
+                ORDER BY id DESC
+                LIMIT 1
+            """, (booking_id,))
+            
+            return cursor.fetchone()
         finally:
             cursor.close()
 
@@ -408,8 +737,9 @@ def get_bookings_by_account_id(account_id, expired=False):
         cursor = conn.cursor(dictionary=True)
         
         try:
-            # Get all bookings first, then filter in Python for accurate timezone handling
-            cursor.execute("""
+            # Expiry is decided on the persisted showing end time, against the application clock
+            expiry_condition = "s.ends_at < %s" if expired else "s.ends_at >= %s"
+            cursor.execute(f"""
                 SELECT b.id, b.price, b.account_id, b.showing_id,
                        s.date, s.starttime, s.baseprice,
                        m.name as movie_name, m.duration,
@@ -420,71 +750,19 @@ def get_bookings_by_account_id(account_id, expired=False):
                 JOIN movie m ON s.movie_id = m.id
                 JOIN room r ON s.room_id = r.id
                 LEFT JOIN customer c ON b.id = c.booking_id
-                WHERE b.account_id = %s
+                WHERE b.account_id = %s AND {expiry_condition}
                 GROUP BY b.id, b.price, b.account_id, b.showing_id, s.date, s.starttime, s.baseprice, m.name, m.duration, r.name
                 ORDER BY s.date DESC, s.starttime DESC
-            """, (account_id,))
-            
-            all_bookings = cursor.fetchall()
-            
-            # Filter bookings using Python datetime calculations for accuracy
-            from datetime import datetime, timedelta
-            current_time = datetime.now()
-            
-            print(f"DEBUG: Total bookings found: {len(all_bookings)}")
-            print(f"DEBUG: Current Python time: {current_time}")
-            
-            filtered_bookings = []
-            
-            for booking in all_bookings:
-                # Calculate show start time
-                show_date = booking['date']
-                start_time = booking['starttime']
-                duration = booking['duration']
-                
-                # Convert starttime to seconds if it's a timedelta
-                if hasattr(start_time, 'total_seconds'):
-                    start_seconds = int(start_time.total_seconds())
-                else:
-                    start_seconds = int(start_time)
-                
-                # Calculate show start datetime
-                start_hour = start_seconds // 3600
-                start_minute = (start_seconds % 3600) // 60
-                start_second = start_seconds % 60
-                
-                show_start = datetime.combine(show_date, datetime.min.time().replace(
-                    hour=start_hour, minute=start_minute, second=start_second
-                ))
-                
-                # Calculate show end time
-                show_end = show_start + timedelta(minutes=duration)
-                
-                # Determine if expired
-                is_expired = show_end < current_time
-                
-                print(f"DEBUG: Booking {booking['id']} - Movie: {booking['movie_name']}")
-                print(f"  Show date: {show_date}, Start time: {start_hour:02d}:{start_minute:02d}, Duration: {duration} min")
-                print(f"  Show start: {show_start}")
-                print(f"  Show end: {show_end}")
-                print(f"  Current time: {current_time}")
-                print(f"  Is expired: {is_expired}")
-                print("---")
-                
-                # Filter based on expired parameter
-                if expired and is_expired:
-                    filtered_bookings.append(booking)
-                elif not expired and not is_expired:
-                    filtered_bookings.append(booking)
+            """, (account_id, datetime.now()))
             
-            print(f"DEBUG: Filtered bookings ({'expired' if expired else 'current'}): {len(filtered_bookings)}")
+            bookings = cursor.fetchall()
             
             # Convert timedelta objects to total seconds for display
-            for booking in filtered_bookings:
+            for booking in bookings:
                 if hasattr(booking['starttime'], 'total_seconds'):
                     booking['starttime'] = booking['starttime'].total_seconds()
                     
-            return filtered_bookings
+            return bookings
         finally:
             cursor.close()
 
@@ -496,7 +774,7 @@ def get_movie_poster(movie_id):
         
         try:
             cursor.execute("""
-                SELECT id, name, mime_type, file_size
+                SELECT id, name, mime_type, file_size, content_hash
                 FROM movieposter 
                 WHERE movie_id = %s AND is_primary = 1
                 LIMIT 1
@@ -508,23 +786,21 @@ def get_movie_poster(movie_id):
 
 @handle_db_errors(default_return=None)
 def get_poster_image_data(poster_id):
-    """Get the actual image blob data for a poster"""
+    """Get what is needed to serve a poster: its content hash in the poster store and MIME type
+    
+    The image blob is only returned for posters not yet exported to the poster store.
+    """
     with get_db_connection() as conn:
-        cursor = conn.cursor()
+        cursor = conn.cursor(dictionary=True)
         
         try:
             cursor.execute("""
-                SELECT image, mime_type
+                SELECT content_hash, mime_type, name,
+                       CASE WHEN content_hash IS NULL THEN image END AS image_data
                 FROM movieposter 
                 WHERE id = %s
             """, (poster_id,))
             
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'image_data': result[0],
-                    'mime_type': result[1]
-                }
-            return None
+            return cursor.fetchone()
         finally:
             cursor.close()
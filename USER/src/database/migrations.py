@@ -0,0 +1,210 @@
+"""
+Schema migrations for the Cinema database.
+Applies the numbered SQL files of the USER/migrations directory in order and
+records each applied version in the schema_migrations table.
+
+Usage (from the USER directory):
+    python -m src.database.migrations status
+    python -m src.database.migrations apply
+    python -m src.database.migrations export-posters
+    python -m src.database.migrations rebuild-booking-summary
+"""
+
+import argparse
+import os
+import re
+import mysql.connector
+from mysql.connector import errorcode
+from .database import DB_CONFIG, logger
+from shared.poster_store import get_poster_store
+from shared.booking_summary import rebuild_booking_summaries
+
+# Directory holding the migration files (NNNN_description.sql)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_[\w-]+\.sql$')
+
+# Errors meaning the statement was already applied by hand (index or column already exists)
+IGNORED_ERRORS = (errorcode.ER_DUP_KEYNAME, errorcode.ER_DUP_FIELDNAME)
+
+def get_migration_connection():
+    """Open a dedicated connection for migrations
+
+    Warnings are not raised here, since idempotent DDL such as
+    CREATE TABLE IF NOT EXISTS legitimately emits notes.
+    """
+    return mysql.connector.connect(**dict(DB_CONFIG, raise_on_warnings=False))
+
+def list_migrations():
+    """Return the available migrations as a sorted list of (version, filename, path)"""
+    migrations = []
+
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append((match.group(1), filename, os.path.join(MIGRATIONS_DIR, filename)))
+
+    return sorted(migrations)
+
+def split_statements(sql):
+    """Split the content of a migration file into individual SQL statements"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def ensure_migrations_table(cursor):
+    """Create the table tracking applied migrations"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(16) NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def get_applied_versions(cursor):
+    """Return the set of already applied migration versions"""
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_migration(conn, cursor, version, filename, path):
+    """Apply a single migration file and record it
+
+    MySQL commits DDL implicitly, so a migration is not atomic: statements
+    that were already applied (duplicate index or column) are skipped, which
+    makes re-running a partially applied migration safe.
+    """
+    with open(path, encoding='utf-8') as migration_file:
+        statements = split_statements(migration_file.read())
+
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+            # Consume any result set so the connection stays usable
+            if cursor.with_rows:
+                cursor.fetchall()
+        except mysql.connector.Error as e:
+            if e.errno in IGNORED_ERRORS:
+                logger.warning(f"Migration {filename}: skipping already applied statement ({e.msg})")
+                continue
+            raise
+
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+        (version, filename)
+    )
+    conn.commit()
+
+def apply_migrations():
+    """Apply every pending migration in order, return the list of applied filenames"""
+    applied = []
+    conn = get_migration_connection()
+    cursor = conn.cursor()
+
+    try:
+        ensure_migrations_table(cursor)
+        applied_versions = get_applied_versions(cursor)
+
+        for version, filename, path in list_migrations():
+            if version in applied_versions:
+                continue
+
+            print(f"Applying {filename}...")
+            apply_migration(conn, cursor, version, filename, path)
+            applied.append(filename)
+
+        return applied
+    finally:
+        cursor.close()
+        conn.close()
+
+def migration_status():
+    """Return the list of (filename, is_applied) for every available migration"""
+    conn = get_migration_connection()
+    cursor = conn.cursor()
+
+    try:
+        ensure_migrations_table(cursor)
+        applied_versions = get_applied_versions(cursor)
+        return [(filename, version in applied_versions) for version, filename, _ in list_migrations()]
+    finally:
+        cursor.close()
+        conn.close()
+
+def export_poster_blobs(keep_blobs=False):
+    """Move the poster images still stored in movieposter.image to the poster store
+
+    Posters are exported one at a time so that only one image is held in
+    memory. Each file is written before its row is updated, so the export can
+    be interrupted and re-run. Returns the number of exported posters.
+    """
+    store = get_poster_store()
+    conn = get_migration_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT id FROM movieposter WHERE content_hash IS NULL AND image IS NOT NULL ORDER BY id")
+        poster_ids = [row[0] for row in cursor.fetchall()]
+
+        for poster_id in poster_ids:
+            cursor.execute("SELECT image FROM movieposter WHERE id = %s", (poster_id,))
+            image = cursor.fetchone()[0]
+            digest = store.put(bytes(image))
+
+            if keep_blobs:
+                cursor.execute("UPDATE movieposter SET content_hash = %s WHERE id = %s", (digest, poster_id))
+            else:
+                cursor.execute(
+                    "UPDATE movieposter SET content_hash = %s, image = NULL WHERE id = %s",
+                    (digest, poster_id)
+                )
+            conn.commit()
+            print(f"Exported poster {poster_id} ({len(image)} bytes) to {store.path(digest)}")
+
+        return len(poster_ids)
+    finally:
+        cursor.close()
+        conn.close()
+
+def rebuild_booking_summary():
+    """Recompute the booking_summary table from the bookings in one transaction, return its row count"""
+    conn = get_migration_connection()
+    cursor = conn.cursor()
+
+    try:
+        count = rebuild_booking_summaries(cursor)
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cinema database migrations')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('apply', help='Apply all pending migrations')
+    subparsers.add_parser('status', help='Show applied and pending migrations')
+    export_parser = subparsers.add_parser('export-posters', help='Move poster images from the database to the poster store')
+    export_parser.add_argument('--keep-blobs', action='store_true', help='Keep the images in the database as well')
+    subparsers.add_parser('rebuild-booking-summary', help='Recompute the booking summary read by the admin listings')
+    args = parser.parse_args(argv)
+
+    if args.command == 'apply':
+        applied = apply_migrations()
+        if applied:
+            print(f"✓ Applied {len(applied)} migration(s)")
+        else:
+            print("✓ Database is up to date")
+    elif args.command == 'status':
+        for filename, is_applied in migration_status():
+            print(f"[{'x' if is_applied else ' '}] {filename}")
+    elif args.command == 'export-posters':
+        exported = export_poster_blobs(keep_blobs=args.keep_blobs)
+        print(f"✓ Exported {exported} poster(s) to {get_poster_store().root}")
+    elif args.command == 'rebuild-booking-summary':
+        count = rebuild_booking_summary()
+        print(f"✓ Rebuilt the booking summary ({count} booking(s))")
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,13 @@
 Email service module for sending booking confirmations with PDF attachments.
 """
 
-import smtplib
 import logging
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from email.utils import formataddr
 from .config import get_config
+from .smtp_transport import SMTPTransport
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +16,19 @@ logger = logging.getLogger(__name__)
 class EmailService:
     """Service for sending emails with booking confirmations."""
     
-    def __init__(self):
+    def __init__(self, transport=None):
         self.config = get_config()
+        self.transport = transport or SMTPTransport(
+            host=self.config.EMAIL_HOST,
+            port=self.config.EMAIL_PORT,
+            use_tls=self.config.EMAIL_USE_TLS,
+            username=self.config.EMAIL_USERNAME,
+            password=self.config.EMAIL_PASSWORD,
+            max_sessions=self.config.EMAIL_POOL_SIZE,
+            idle_seconds=self.config.EMAIL_SESSION_IDLE_SECONDS,
+            max_messages_per_session=self.config.EMAIL_SESSION_MAX_MESSAGES,
+            timeout=self.config.EMAIL_TIMEOUT_SECONDS
+        )
         
     def send_booking_confirmation(self, booking_data, pdf_content, booker_email, booker_name):
         """
@@ -33,42 +44,65 @@ class EmailService:
             bool: True if email sent successfully, False otherwise
         """
         try:
-            # Handle BytesIO objects by extracting bytes
-            from io import BytesIO
-            if isinstance(pdf_content, BytesIO):
-                pdf_content = pdf_content.getvalue()
-            
-            # Create email message
-            msg = MIMEMultipart()
-            
-            # Email headers
-            msg['From'] = formataddr(('Cinemacousas', self.config.EMAIL_FROM))
-            msg['To'] = booker_email
-            msg['Subject'] = f"Confirmation de réservation - {booking_data.get('movie_name', 'Cinéma')}"
-            
-            # Create email body
-            html_body = self._create_email_body(booking_data, booker_name)
-            msg.attach(MIMEText(html_body, 'html', 'utf-8'))
-            
-            # Attach PDF
-            # Create a safe filename using booker name
-            safe_booker_name = "".join(c for c in booker_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_booker_name = safe_booker_name.replace(' ', '_')
-            pdf_attachment = MIMEApplication(pdf_content, _subtype='pdf')
-            pdf_attachment.add_header(
-                'Content-Disposition', 
-                'attachment', 
-                filename=f"tickets_{safe_booker_name}_{booking_data.get('id', 'unknown')}.pdf"
-            )
-            msg.attach(pdf_attachment)
-            
-            # Send email
-            return self._send_email(msg)
-            
+            self.deliver_booking_confirmation(booking_data, pdf_content, booker_email, booker_name)
+            return True
         except Exception as e:
             logger.error(f"Failed to send booking confirmation email: {e}")
             return False
     
+    def deliver_booking_confirmation(self, booking_data, pdf_content, booker_email, booker_name):
+        """
+        Send booking confirmation email, raising the error when it fails.
+        """
+        msg = self.create_booking_message(booking_data, pdf_content, booker_email, booker_name)
+        self._deliver(msg)
+    
+    def deliver_messages(self, messages):
+        """
+        Send several prepared messages over one pooled SMTP session.
+        
+        Returns:
+            list: None for each sent message, or the exception that prevented it
+        """
+        results = self.transport.send_many(messages)
+        for msg, error in zip(messages, results):
+            if error is None:
+                logger.info(f"Booking confirmation email sent successfully to {msg['To']}")
+        return results
+    
+    def create_booking_message(self, booking_data, pdf_content, booker_email, booker_name):
+        """Create the booking confirmation message with its PDF attachment."""
+        # Handle BytesIO objects by extracting bytes
+        from io import BytesIO
+        if isinstance(pdf_content, BytesIO):
+            pdf_content = pdf_content.getvalue()
+        
+        # Create email message
+        msg = MIMEMultipart()
+        
+        # Email headers
+        msg['From'] = formataddr(('Cinemacousas', self.config.EMAIL_FROM))
+        msg['To'] = booker_email
+        msg['Subject'] = f"Confirmation de réservation - {booking_data.get('movie_name', 'Cinéma')}"
+        
+        # Create email body
+        html_body = self._create_email_body(booking_data, booker_name)
+        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+        
+        # Attach PDF
+        # Create a safe filename using booker name
+        safe_booker_name = "".join(c for c in booker_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_booker_name = safe_booker_name.replace(' ', '_')
+        pdf_attachment = MIMEApplication(pdf_content, _subtype='pdf')
+        pdf_attachment.add_header(
+            'Content-Disposition', 
+            'attachment', 
+            filename=f"tickets_{safe_booker_name}_{booking_data.get('id', 'unknown')}.pdf"
+        )
+        msg.attach(pdf_attachment)
+        
+        return msg
+    
     def _create_email_body(self, booking_data, booker_name):
         """Create HTML email body for booking confirmation."""
         
@@ -249,28 +283,24 @@ class EmailService:
     def _send_email(self, msg):
         """Send email using SMTP."""
         try:
-            # Create SMTP session
-            server = smtplib.SMTP(self.config.EMAIL_HOST, self.config.EMAIL_PORT)
-            
-            # Enable TLS encryption
-            if self.config.EMAIL_USE_TLS:
-                server.starttls()
-            
-            # Login to server
-            server.login(self.config.EMAIL_USERNAME, self.config.EMAIL_PASSWORD)
-            
-            # Send email
-            text = msg.as_string()
-            server.sendmail(self.config.EMAIL_FROM, msg['To'], text)
-            server.quit()
-            
-            logger.info(f"Booking confirmation email sent successfully to {msg['To']}")
+            self._deliver(msg)
             return True
-            
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
+    
+    def _deliver(self, msg):
+        """Send email over a pooled SMTP session, raising on failure."""
+        self.transport.send(msg)
+        logger.info(f"Booking confirmation email sent successfully to {msg['To']}")
+
+
+# Shared email service: its SMTP sessions are reused across calls and threads
+email_service = EmailService()
 
+def get_email_service():
+    """Get the shared email service instance."""
+    return email_service
 
 def send_booking_confirmation_email(booking_data, pdf_content, booker_email, booker_name):
     """
@@ -285,5 +315,4 @@ def send_booking_confirmation_email(booking_data, pdf_content, booker_email, boo
     Returns:
         bool: True if email sent successfully, False otherwise
     """
-    email_service = EmailService()
     return email_service.send_booking_confirmation(booking_data, pdf_content, booker_email, booker_name)
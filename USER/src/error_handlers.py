@@ -3,7 +3,7 @@ Error handling module for the Cinema application.
 Provides custom error pages and logging.
 """
 
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, make_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -70,3 +70,24 @@ def init_error_handlers(app):
         
         # Return HTML for regular requests
         return render_template('errors/400.html'), 400
+    
+    @app.errorhandler(503)
+    def service_unavailable_error(error):
+        """Handle 503 errors (e.g. PDF rendering saturated), telling the client when to retry."""
+        logger.warning(f"503 error: {request.url}")
+        
+        # Return JSON for API requests
+        if request.is_json or '/api/' in request.path:
+            response = jsonify({
+                'error': 'Service Unavailable',
+                'message': 'The server is busy. Please try again in a few seconds.'
+            })
+        else:
+            # Return HTML for regular requests
+            response = make_response(render_template('errors/503.html'))
+        
+        response.status_code = 503
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,153 @@
+"""
+Local stand-in SMTP server for development and testing.
+Accepts every message (and any AUTH credentials) without relaying it, keeps
+the received messages in memory and optionally prints them. STARTTLS is not
+supported, so run the application with EMAIL_USE_TLS=False against it.
+
+Usage (from the USER directory):
+    python -m src.local_smtp_server --port 1025
+
+In code:
+    server = LocalSMTPServer(port=0).start()
+    ...  # send mail to server.host, server.port
+    server.messages  # list of (sender, recipients, data)
+    server.stop()
+"""
+
+import argparse
+import socketserver
+import threading
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib: EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def readline(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        return line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def handle(self):
+        self.server.connection_count += 1
+        self.reply("220 localhost Cinemacousas test SMTP server")
+        sender, recipients = None, []
+
+        while True:
+            line = self.readline()
+            if line is None:
+                return
+
+            command, _, argument = line.partition(' ')
+            command = command.upper()
+
+            if command == 'EHLO':
+                self.reply("250-localhost")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif command == 'HELO':
+                self.reply("250 localhost")
+            elif command == 'AUTH':
+                mechanism, _, initial_response = argument.partition(' ')
+                if mechanism.upper() == 'LOGIN':
+                    # Username and password prompts (base64 "Username:" / "Password:")
+                    if not initial_response:
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.readline()
+                elif not initial_response:
+                    self.reply("334 ")
+                    self.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == 'MAIL':
+                sender, recipients = argument.split(':', 1)[1].split()[0].strip('<>'), []
+                self.reply("250 OK")
+            elif command == 'RCPT':
+                recipients.append(argument.split(':', 1)[1].split()[0].strip('<>'))
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data_lines = []
+                while True:
+                    data_line = self.readline()
+                    if data_line is None or data_line == '.':
+                        break
+                    # Undo dot-stuffing
+                    data_lines.append(data_line[1:] if data_line.startswith('..') else data_line)
+                self.server.store(sender, recipients, '\n'.join(data_lines))
+                sender, recipients = None, []
+                self.reply("250 OK: queued")
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == 'NOOP':
+                self.reply("250 OK")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server recording the messages it receives."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=1025, verbose=False):
+        super().__init__((host, port), SMTPHandler)
+        self.verbose = verbose
+        self.messages = []
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def store(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append((sender, recipients, data))
+        if self.verbose:
+            subject = next((line[9:] for line in data.splitlines() if line.startswith('Subject: ')), '')
+            print(f"Received message from {sender} to {', '.join(recipients)}: {subject} ({len(data)} bytes)")
+
+    def start(self):
+        """Serve in a background thread and return the server."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in SMTP server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args(argv)
+
+    server = LocalSMTPServer(args.host, args.port, verbose=True)
+    print(f"✓ SMTP server listening on {server.host}:{server.port} (EMAIL_USE_TLS must be False)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,31 +4,63 @@ Middleware for session validation and security.
 
 from functools import wraps
 from flask import session, request, redirect, url_for, flash, g
-from .database.database_retrieve import validate_session_token
+from werkzeug.local import LocalProxy
+from .session_tokens import validate_session
+from .database.database_retrieve import get_user_by_id
 import logging
 
 logger = logging.getLogger(__name__)
 
-def validate_user_session():
-    """Validate the current user's session."""
+# Profile fields left out of signed session tokens, which the client can read
+PRIVATE_PROFILE_FIELDS = ('email', 'first_name', 'last_name', 'birthday')
+
+class CurrentUser(dict):
+    """The logged-in user; private profile fields missing from the session are loaded on first use."""
+
+    def __missing__(self, key):
+        if key not in PRIVATE_PROFILE_FIELDS:
+            raise KeyError(key)
+        account = get_user_by_id(self['id']) or {}
+        for field in PRIVATE_PROFILE_FIELDS:
+            self[field] = account.get(field)
+        return self[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+def _load_current_user():
+    """Validate the session token and return the logged-in user, or None."""
     if 'session_token' in session and 'user_id' in session:
-        session_data = validate_session_token(session['session_token'])
+        session_data = validate_session(session['session_token'])
         if session_data:
-            # Session is valid, store user info in g for easy access
-            g.current_user = {
+            user = CurrentUser({
                 'id': session_data['account_id'],
                 'username': session_data['username'],
-                'email': session_data['email'],
-                'first_name': session_data.get('first_name'),
-                'last_name': session_data.get('last_name'),
-                'birthday': session_data.get('birthday')
-            }
-            return True
+                'created_at': session_data.get('account_created_at'),
+                'password_modified_at': session_data.get('password_modified_at'),
+                'profile_modified_at': session_data.get('profile_modified_at')
+            })
+            for field in PRIVATE_PROFILE_FIELDS:
+                if field in session_data:
+                    user[field] = session_data[field]
+            return user
         else:
             # Session is invalid, clear it
             session.clear()
-            return False
-    return False
+    return None
+
+def get_current_user():
+    """Get the logged-in user, validating the session at most once per request."""
+    if '_current_user' not in g:
+        g._current_user = _load_current_user()
+    return g._current_user
+
+def validate_user_session():
+    """Validate the current user's session."""
+    return get_current_user() is not None
 
 def login_required(f):
     """Decorator to require login for specific routes."""
@@ -83,13 +115,9 @@ def init_middleware(app):
     
     @app.before_request
     def before_request():
-        """Run before each request to validate session."""
-        # Skip session validation for static files
-        if request.endpoint and request.endpoint.startswith('static'):
-            return
-        
-        # Validate session for all requests
-        validate_user_session()
+        """Run before each request to expose the (lazily validated) user."""
+        # The session is only validated when a route, decorator or template reads the user
+        g.current_user = LocalProxy(get_current_user)
         
         # Log request for debugging (only in development)
         if app.config.get('DEBUG'):
@@ -97,10 +125,9 @@ def init_middleware(app):
     
     @app.context_processor
     def inject_user():
-        """Inject user information into all templates."""
-        user = getattr(g, 'current_user', None)
+        """Inject user information into all templates (resolved only when rendered)."""
         return dict(
-            is_logged_in=user is not None,
-            current_user=user.get('username') if user else None,
-            current_user_id=user.get('id') if user else None
+            is_logged_in=LocalProxy(validate_user_session),
+            current_user=LocalProxy(lambda: (get_current_user() or {}).get('username')),
+            current_user_id=LocalProxy(lambda: (get_current_user() or {}).get('id'))
         )
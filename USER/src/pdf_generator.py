@@ -13,8 +13,25 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from io import BytesIO
 import datetime
-from typing import List, Dict, Any, Optional
+import hashlib
+import json
+from typing import List, Dict, Any, Optional, Tuple
 import os
+from .cache import LRUCache
+from .config import get_config
+from .database.database import get_unit_of_work
+from .pdf_pool import pdf_pool
+from .ticket_renderer import ticket_renderer
+
+# Get configuration
+config = get_config()
+
+# Generated booking PDFs keyed by a hash of their content (see get_booking_pdf)
+pdf_cache = LRUCache(
+    max_entries=config.PDF_CACHE_MAX_ENTRIES,
+    max_bytes=config.PDF_CACHE_MAX_BYTES,
+    sizeof=len
+)
 
 class TicketPDFGenerator:
     """Professional PDF generator for cinema tickets"""
@@ -292,7 +309,8 @@ class TicketPDFGenerator:
         minutes = (seconds % 3600) // 60
         return f"{hours:02d}:{minutes:02d}"
     
-    def _is_booking_expired(self, booking_data: Dict[str, Any]) -> bool:
+    @staticmethod
+    def _is_booking_expired(booking_data: Dict[str, Any]) -> bool:
         """Check if a booking is expired"""
         try:
             booking_date = booking_data.get('date')
@@ -311,7 +329,139 @@ class TicketPDFGenerator:
         except:
             return False
 
+def build_booking_pdf_data(booking: Dict[str, Any], customers: List[Dict[str, Any]],
+                           fallback_user: Optional[Dict[str, Any]] = None):
+    """
+    Convert a booking row and its customers into the PDF generator input
+    
+    Args:
+        booking: Booking dictionary from get_booking_by_id
+        customers: Customer dictionaries from get_customers_for_booking
+        fallback_user: Logged-in user used when the booking has no booker information
+        
+    Returns:
+        Tuple of (booking_data, tickets_data)
+    """
+    booker_name = f"{booking.get('booker_first_name') or ''} {booking.get('booker_last_name') or ''}".strip()
+    booker_email = booking.get('booker_email', '')
+    
+    # Fall back to the current user if the booking doesn't have booker info
+    if not booker_name and fallback_user:
+        booker_name = f"{fallback_user.get('first_name') or ''} {fallback_user.get('last_name') or ''}".strip()
+        if not booker_email:
+            booker_email = fallback_user.get('email', '')
+    
+    # Final fallback
+    if not booker_name:
+        booker_name = "Anonymous User"
+    if not booker_email:
+        booker_email = "N/A"
+    
+    booking_data = {
+        'id': booking['id'],
+        'movie_name': booking['movie_name'],
+        'room_name': booking['room_name'],
+        'date': booking['date'],
+        'starttime': booking['starttime'],
+        'duration': booking['duration'],
+        'price': booking['price'],
+        'booker_name': booker_name,
+        'booker_email': booker_email,
+        'num_spectators': len(customers)
+    }
+    
+    tickets_data = []
+    for customer in customers:
+        tickets_data.append({
+            'id': customer.get('id', 'N/A'),
+            'seat_number': f"{customer.get('seat_row', '')}{customer.get('seat_column', '')}",
+            'seat_type': customer.get('seat_type', 'Standard'),
+            'price': booking['price'] / len(customers) if customers else 0  # Divide total price
+        })
+    
+    return booking_data, tickets_data
+
 # Convenience function for easy import
 def create_pdf_generator() -> TicketPDFGenerator:
     """Create and return a new PDF generator instance"""
     return TicketPDFGenerator()
+
+def booking_pdf_key(booking_data: Dict[str, Any], tickets_data: List[Dict[str, Any]]) -> str:
+    """
+    Hash everything a booking PDF is rendered from
+    
+    Besides the booking id, the key covers the showing and movie details and
+    whether the showing has started, so edits to the showing or movie and the
+    expired notice produce a new key instead of serving a stale PDF.
+    """
+    content = {
+        'booking': booking_data,
+        'tickets': tickets_data,
+        'expired': TicketPDFGenerator._is_booking_expired(booking_data)
+    }
+    serialized = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return f"{booking_data['id']}-{hashlib.sha256(serialized).hexdigest()[:32]}"
+
+def get_booking_pdf(booking_data: Dict[str, Any], tickets_data: List[Dict[str, Any]],
+                    block: bool = False, key: Optional[str] = None) -> Tuple[str, bytes]:
+    """
+    Get the PDF of a booking from the cache, rendering it on a miss
+    
+    Rendering uses the canvas-based ticket renderer, which draws the same
+    layout as TicketPDFGenerator.generate_booking_pdf much faster. It runs in
+    the PDF render pool so request threads never hold the GIL while rendering.
+    
+    Args:
+        block: Wait for a free render slot instead of failing right away
+               (for background callers)
+        key: booking_pdf_key of the same data, when the caller already computed it
+    
+    Returns:
+        Tuple of (content key usable as ETag, PDF bytes)
+        
+    Raises:
+        PDFRenderBusy: The render pool is saturated or the render timed out
+    """
+    if key is None:
+        key = booking_pdf_key(booking_data, tickets_data)
+    pdf_content = pdf_cache.get(key)
+    if pdf_content is None:
+        expired = TicketPDFGenerator._is_booking_expired(booking_data)
+        pdf_content = _run_render_job(_render_booking_job, booking_data, tickets_data, expired, block=block)
+        pdf_cache.set(key, pdf_content)
+    return key, pdf_content
+
+def get_single_ticket_pdf(ticket_data: Dict[str, Any], booking_data: Dict[str, Any], block: bool = False) -> bytes:
+    """
+    Render the PDF of a single ticket in the PDF render pool
+    
+    Raises:
+        PDFRenderBusy: The render pool is saturated or the render timed out
+    """
+    return _run_render_job(_render_single_ticket_job, ticket_data, booking_data, block=block)
+
+def _run_render_job(func, *args, block: bool = False) -> bytes:
+    """
+    Run a render job in the PDF render pool
+    
+    The request's database connection goes back to the pool first: the render
+    can take up to PDF_RENDER_TIMEOUT_SECONDS, and the PDF routes outnumber the
+    pooled connections. A later query of the request takes a new one.
+    """
+    unit_of_work = get_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.release()
+    return pdf_pool.run(func, *args, block=block)
+
+# Render jobs, run in the PDF render pool processes (module-level so they can be pickled)
+_job_generator = None
+
+def _render_booking_job(booking_data: Dict[str, Any], tickets_data: List[Dict[str, Any]], expired: bool) -> bytes:
+    return ticket_renderer.render_booking(booking_data, tickets_data, expired=expired).getvalue()
+
+def _render_single_ticket_job(ticket_data: Dict[str, Any], booking_data: Dict[str, Any]) -> bytes:
+    global _job_generator
+    if _job_generator is None:
+        # Building the stylesheet is not free, keep one generator per process
+        _job_generator = create_pdf_generator()
+    return _job_generator.generate_single_ticket_pdf(ticket_data, booking_data).getvalue()
@@ -0,0 +1,161 @@
+"""
+Process pool for PDF rendering.
+ReportLab rendering is pure-Python CPU work that holds the GIL, so PDFs are
+rendered in separate processes and request threads only wait for the result.
+
+The pool accepts at most PDF_POOL_MAX_PENDING jobs (queued or running). When
+it is saturated, request handlers get PDFRenderBusy right away and answer
+"try again" instead of piling up; background callers may wait for a slot.
+Each job has a timeout. With PDF_POOL_WORKERS set to 0, jobs run inline.
+
+Workers are forked by init_pdf_pool before the scheduler and delivery threads
+start. Spawned workers would re-run app.py (scheduler, database pool), so on
+platforms without fork PDFs are rendered inline. For the same reason the pool
+is never re-forked once threads run: if a worker dies, renders answer
+PDFRenderBusy until the web process is restarted.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from .config import get_config
+
+# Get configuration
+config = get_config()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PDFRenderBusy(Exception):
+    """Raised when the pool is saturated or a render timed out, the client should retry later."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PDFRenderPool:
+    """Bounded process pool running PDF render functions."""
+
+    def __init__(self, workers, max_pending, timeout_seconds, retry_after_seconds):
+        # Without fork (Windows), render inline
+        self.workers = workers if 'fork' in multiprocessing.get_all_start_methods() else 0
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.broken = False
+        self.rejected = 0
+        self.timeouts = 0
+
+    def start(self):
+        """Start the worker processes, forking them all at once."""
+        if self.workers <= 0:
+            logger.info("PDF render pool disabled, PDFs are rendered inline")
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        # Fork the workers now rather than on the first render
+        self._executor.submit(int).result()
+        logger.info(f"PDF render pool started with {self.workers} workers")
+
+    def _mark_broken(self):
+        """Stop using a pool whose worker process died."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.broken = True
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, func, *args, block=False):
+        """Run func(*args) in a worker process and return its result.
+
+        Args:
+            func: Module-level function (it is pickled by reference)
+            block: Wait for a free slot instead of failing when saturated
+
+        Raises:
+            PDFRenderBusy: The pool is saturated, the job timed out or a worker died
+        """
+        if self.workers <= 0:
+            return func(*args)
+
+        executor = self._executor
+        if executor is None:
+            if self.broken:
+                raise PDFRenderBusy("PDF rendering is unavailable", self.retry_after_seconds)
+            # Pool not started (outside the web app)
+            return func(*args)
+
+        if not self._slots.acquire(blocking=block, timeout=self.timeout_seconds if block else None):
+            self.rejected += 1
+            raise PDFRenderBusy("PDF rendering is busy", self.retry_after_seconds)
+
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._mark_broken()
+            raise PDFRenderBusy("PDF rendering is unavailable", self.retry_after_seconds)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is only freed when the job really finishes, even after a timeout
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            logger.warning(f"PDF render {func.__name__} timed out after {self.timeout_seconds}s")
+            raise PDFRenderBusy("PDF rendering timed out", self.retry_after_seconds)
+        except BrokenProcessPool:
+            # Forking again now that threads run could deadlock the new workers
+            logger.error("PDF render worker died, PDF rendering is unavailable until the server restarts")
+            self._mark_broken()
+            raise PDFRenderBusy("PDF rendering is unavailable", self.retry_after_seconds)
+
+    def stats(self):
+        """Return pool counters as a dictionary."""
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'broken': self.broken,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global PDF render pool
+pdf_pool = PDFRenderPool(
+    workers=config.PDF_POOL_WORKERS,
+    max_pending=config.PDF_POOL_MAX_PENDING,
+    timeout_seconds=config.PDF_RENDER_TIMEOUT_SECONDS,
+    retry_after_seconds=config.PDF_RETRY_AFTER_SECONDS
+)
+
+def init_pdf_pool(app):
+    """Start the PDF render pool with the Flask app, before any background thread is started."""
+    try:
+        pdf_pool.start()
+
+        import atexit
+        atexit.register(pdf_pool.shutdown)
+
+    except Exception as e:
+        logger.error(f"Failed to start PDF render pool, rendering inline: {e}")
+        pdf_pool.workers = 0
@@ -0,0 +1,142 @@
+"""
+Poster serving for the Cinema application.
+Poster URLs carry the content hash of the image (?v=<hash>), so a versioned
+response never changes and can be cached by browsers for a long time; the
+hash is also the strong ETag.
+
+Poster metadata is kept in an LRU cache, so that revalidations do not hit
+the database. Poster files are streamed from the poster store with
+send_file (sendfile when available); only hot files, requested
+POSTER_CACHE_HOT_REQUESTS times and not larger than
+POSTER_CACHE_MAX_FILE_BYTES, are kept in a memory-bounded LRU of file bytes.
+
+Pages request resized derivatives (see shared/poster_derivatives.py) by size
+and format; a derivative missing from the poster store is generated on its
+first request.
+"""
+
+import logging
+import os
+from shared.poster_derivatives import derivative_mime_type, derivative_variant, ensure_derivative, has_derivatives
+from shared.poster_store import content_hash, get_poster_store
+from .cache import LRUCache
+from .config import get_config
+from .database.database_retrieve import get_poster_image_data
+
+# Get configuration
+config = get_config()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Poster metadata by poster id. Replacing a poster creates a new row, so the
+# content of a poster id never changes once it is in the poster store
+poster_metadata_cache = LRUCache(max_entries=4096)
+
+# Bytes of hot poster files, by content hash (derivatives by their ETag)
+poster_bytes_cache = LRUCache(
+    max_entries=config.POSTER_CACHE_MAX_ENTRIES,
+    max_bytes=config.POSTER_CACHE_MAX_BYTES,
+    sizeof=len
+)
+
+# Request counts of the poster files not cached yet
+poster_request_counts = LRUCache(max_entries=4096)
+
+def get_poster(poster_id):
+    """Get the metadata of a poster (content_hash, mime_type, name), or None if it doesn't exist
+
+    For posters not yet exported to the poster store, the image blob is
+    returned as image_data and the hash is computed from it.
+    """
+    poster = poster_metadata_cache.get(poster_id)
+    if poster is not None:
+        return poster
+
+    poster = get_poster_image_data(poster_id)
+    if not poster:
+        return None
+
+    if poster['content_hash'] is None:
+        if poster['image_data'] is None:
+            return None
+        poster['image_data'] = bytes(poster['image_data'])
+        poster['etag'] = content_hash(poster['image_data'])
+        return poster
+
+    poster['etag'] = poster['content_hash']
+    poster_metadata_cache.set(poster_id, poster)
+    return poster
+
+def get_hot_file_bytes(key, path):
+    """Get the bytes of a poster file from the cache, or None to stream it from disk
+
+    The file is read into the cache on its POSTER_CACHE_HOT_REQUESTS-th
+    request, unless it is larger than POSTER_CACHE_MAX_FILE_BYTES.
+
+    Raises:
+        FileNotFoundError: The file is missing from the poster store
+    """
+    data = poster_bytes_cache.get(key)
+    if data is not None:
+        return data
+
+    requests = poster_request_counts.get(key, 0) + 1
+    if requests < config.POSTER_CACHE_HOT_REQUESTS or os.path.getsize(path) > config.POSTER_CACHE_MAX_FILE_BYTES:
+        poster_request_counts.set(key, requests)
+        return None
+
+    poster_request_counts.pop(key)
+    with open(path, 'rb') as poster_file:
+        data = poster_file.read()
+    poster_bytes_cache.set(key, data)
+    return data
+
+def get_poster_file(poster):
+    """Get the MIME type, bytes and path of a poster image
+
+    Returns (mime_type, bytes, None) for hot posters and posters not exported
+    to the poster store yet, (mime_type, None, path) for posters to stream
+    from the poster store.
+    """
+    if poster['content_hash'] is None:
+        return poster['mime_type'], poster['image_data'], None
+
+    path = get_poster_store().path(poster['content_hash'])
+    data = get_hot_file_bytes(poster['content_hash'], path)
+    return poster['mime_type'], data, None if data is not None else path
+
+def get_poster_derivative(poster, size, image_format):
+    """Get the ETag, MIME type, bytes and path of a resized derivative of a poster
+
+    The ETag is the original's followed by the variant, e.g. '<hash>.card.webp'.
+    As with get_poster_file, either the bytes (hot derivative) or the path is set.
+
+    Posters that have no derivatives (not exported yet, SVG) are returned as
+    uploaded.
+
+    Raises:
+        ValueError: Unknown size or format
+        FileNotFoundError: The poster file is missing from the poster store
+    """
+    variant = derivative_variant(size, image_format)
+    etag = f"{poster['etag']}.{variant}"
+    if poster['content_hash'] is None or not has_derivatives(poster['mime_type']):
+        return (etag,) + get_poster_file(poster)
+
+    data = poster_bytes_cache.get(etag)
+    if data is not None:
+        return etag, derivative_mime_type(image_format), data, None
+
+    path = ensure_derivative(get_poster_store(), poster['content_hash'], size, image_format)
+    if path is None:
+        return (etag,) + get_poster_file(poster)
+
+    data = get_hot_file_bytes(etag, path)
+    return etag, derivative_mime_type(image_format), data, None if data is not None else path
+
+def get_poster_cache_control(poster, version):
+    """Cache versioned URLs for good, make unversioned ones revalidate with the ETag"""
+    if version and version == poster['etag']:
+        return f'public, max-age={config.POSTER_MAX_AGE}, immutable'
+    return 'public, no-cache'
@@ -8,7 +8,11 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from .config import get_config
-from .database.database_modify import cleanup_expired_sessions
+from .database.database_modify import (
+    cleanup_expired_sessions,
+    cleanup_expired_revocations,
+    release_expired_seat_holds
+)
 
 # Get configuration
 config = get_config()
@@ -22,6 +26,7 @@ class SessionManager:
     def __init__(self):
         self.scheduler = BackgroundScheduler()
         self.cleanup_interval_hours = config.SESSION_CLEANUP_INTERVAL_HOURS
+        self.seat_hold_cleanup_interval_minutes = config.SEAT_HOLD_CLEANUP_INTERVAL_MINUTES
         
     def start_background_tasks(self):
         """Start background tasks for session management."""
@@ -35,9 +40,19 @@ class SessionManager:
                 replace_existing=True
             )
             
+            # Schedule expired seat hold release
+            self.scheduler.add_job(
+                func=self._release_expired_seat_holds,
+                trigger=IntervalTrigger(minutes=self.seat_hold_cleanup_interval_minutes),
+                id='seat_hold_cleanup',
+                name='Release expired seat holds',
+                replace_existing=True
+            )
+            
             # Start the scheduler
             self.scheduler.start()
             logger.info(f"Session cleanup scheduled every {self.cleanup_interval_hours} hours")
+            logger.info(f"Seat hold cleanup scheduled every {self.seat_hold_cleanup_interval_minutes} minutes")
             
         except Exception as e:
             logger.error(f"Failed to start background tasks: {e}")
@@ -60,9 +75,21 @@ class SessionManager:
                 logger.info("Session cleanup completed successfully")
             else:
                 logger.warning("Session cleanup failed")
+            
+            # Signed tokens: revocations are only needed until the tokens expire
+            if config.SESSION_TOKEN_MODE == 'signed':
+                cleanup_expired_revocations()
         except Exception as e:
             logger.error(f"Error during session cleanup: {e}")
     
+    def _release_expired_seat_holds(self):
+        """Release expired seat holds."""
+        try:
+            if not release_expired_seat_holds():
+                logger.warning("Seat hold cleanup failed")
+        except Exception as e:
+            logger.error(f"Error during seat hold cleanup: {e}")
+    
     def force_cleanup(self):
         """Force immediate cleanup of expired sessions."""
         self._cleanup_expired_sessions()
@@ -0,0 +1,298 @@
+"""
+Session token service for the Cinema application.
+Issues, validates and revokes session tokens in one of two modes:
+
+- database: opaque random tokens checked against the account_session table
+- signed: HMAC-signed tokens carrying the account and its expiry, verified in
+  memory; revocations are synced periodically from the session_revocation table.
+  The payload is signed, not encrypted, so it only holds display fields; the
+  other profile fields are loaded from the account when a page needs them.
+
+In both modes the account_session table keeps one row per login as the audit trail.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from datetime import date, datetime
+from .config import get_config
+from .database.database_retrieve import (
+    validate_session_token,
+    get_user_by_id,
+    get_session_revocations_since
+)
+from .database.database_modify import (
+    create_session_token,
+    invalidate_session_token,
+    add_session_revocation
+)
+
+# Get configuration
+config = get_config()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Account fields embedded in signed tokens, with the type used to restore them
+# (the client can read them: no email, name or birthday)
+ACCOUNT_CLAIM_FIELDS = {
+    'username': str,
+    'created_at': datetime,
+    'password_modified_at': datetime,
+    'profile_modified_at': datetime
+}
+
+def is_signed_mode():
+    """Check whether sessions use signed tokens instead of database tokens."""
+    return config.SESSION_TOKEN_MODE == 'signed'
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _signature(payload):
+    return hmac.new(config.SESSION_TOKEN_SECRET.encode('utf-8'), payload.encode('ascii'), hashlib.sha256).digest()
+
+def _serialize_account(account):
+    """Convert an account row into JSON-friendly token claims."""
+    claims = {}
+    for field in ACCOUNT_CLAIM_FIELDS:
+        value = account.get(field)
+        claims[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return claims
+
+def _deserialize_account(claims):
+    """Restore account fields from token claims."""
+    account = {}
+    for field, field_type in ACCOUNT_CLAIM_FIELDS.items():
+        value = claims.get(field)
+        if value is not None and field_type in (date, datetime):
+            value = field_type.fromisoformat(value)
+        account[field] = value
+    return account
+
+def sign_token(claims):
+    """Serialize and sign token claims."""
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{payload}.{_b64encode(_signature(payload))}"
+
+def decode_token(token):
+    """Return the claims of a correctly signed token, or None (expiry is not checked here)."""
+    try:
+        payload, signature = token.split('.')
+        if not hmac.compare_digest(_b64decode(signature), _signature(payload)):
+            return None
+        return json.loads(_b64decode(payload))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+class RevocationList:
+    """In-memory denylist of revoked signed tokens, synced from the database.
+
+    Holds revoked token ids (jti) and per-account "revoked before" timestamps,
+    each kept only until the tokens it targets would have expired anyway.
+    """
+
+    def __init__(self, sync_interval_seconds):
+        self.sync_interval_seconds = sync_interval_seconds
+        self._revoked_tokens = {}
+        self._revoked_accounts = {}
+        self._watermark = 0
+        self._last_sync = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def add(self, expires_at, jti=None, account_id=None, revoked_before=None):
+        """Record a revocation locally (expires_at and revoked_before are unix timestamps)."""
+        with self._lock:
+            if jti:
+                self._revoked_tokens[jti] = expires_at
+            if account_id is not None:
+                current = self._revoked_accounts.get(account_id)
+                if current is None or current[0] < revoked_before:
+                    self._revoked_accounts[account_id] = (revoked_before, expires_at)
+
+    def is_revoked(self, claims):
+        """Check whether the token described by the claims has been revoked."""
+        with self._lock:
+            if claims['jti'] in self._revoked_tokens:
+                return True
+            account_revocation = self._revoked_accounts.get(claims['sub'])
+            # Tokens issued in the second of the revocation are revoked too, the
+            # replacement token is issued the second after (see rotate_session_token)
+            return account_revocation is not None and claims['iat'] <= account_revocation[0]
+
+    def sync_if_stale(self):
+        """Fetch new revocations if the last sync is older than the sync interval."""
+        if self._last_sync is not None and time.monotonic() - self._last_sync < self.sync_interval_seconds:
+            return
+
+        # A single thread syncs, the others keep using the current list
+        if not self._sync_lock.acquire(blocking=self._last_sync is None):
+            return
+        try:
+            self.sync()
+        finally:
+            self._sync_lock.release()
+
+    def sync(self):
+        """Fetch the revocations recorded since the last sync and prune expired ones."""
+        revocations = get_session_revocations_since(self._watermark)
+        if revocations is None:
+            # Database unavailable, keep the current list and retry at the next interval
+            logger.warning("Could not sync session revocations")
+            self._last_sync = time.monotonic()
+            return
+
+        for revocation in revocations:
+            self.add(
+                revocation['expires_at'].timestamp(),
+                jti=revocation['jti'],
+                account_id=revocation['account_id'],
+                revoked_before=revocation['revoked_before']
+            )
+            self._watermark = max(self._watermark, revocation['id'])
+
+        self.prune()
+        self._last_sync = time.monotonic()
+
+    def prune(self):
+        """Forget revocations whose tokens have expired."""
+        now = time.time()
+        with self._lock:
+            self._revoked_tokens = {
+                jti: expires_at for jti, expires_at in self._revoked_tokens.items() if expires_at > now
+            }
+            self._revoked_accounts = {
+                account_id: revocation for account_id, revocation in self._revoked_accounts.items()
+                if revocation[1] > now
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._revoked_tokens) + len(self._revoked_accounts)
+
+revocation_list = RevocationList(config.SESSION_REVOCATION_SYNC_SECONDS)
+
+def _issue_signed_token(account, jti, issued_at, expires_at):
+    """Sign a token for an account."""
+    claims = {
+        'jti': jti,
+        'sub': account['id'],
+        'iat': issued_at,
+        'exp': expires_at,
+        'acc': _serialize_account(account)
+    }
+    return sign_token(claims)
+
+def issue_session_token(account_id, ip_address=None, user_agent=None, issued_at=None):
+    """Create a session token for an account after login or signup.
+
+    issued_at (unix timestamp, signed mode only) defaults to now.
+    """
+    if not is_signed_mode():
+        return create_session_token(account_id, ip_address, user_agent)
+
+    account = get_user_by_id(account_id)
+    if not account:
+        return None
+
+    jti = secrets.token_urlsafe(16)
+    if issued_at is None:
+        issued_at = int(time.time())
+    expires_at = issued_at + config.SESSION_LIFETIME_HOURS * 3600
+
+    # The token id is stored in account_session as the audit trail of the login
+    if not create_session_token(account_id, ip_address, user_agent, session_token=jti,
+                                expires_at=datetime.fromtimestamp(expires_at)):
+        return None
+
+    return _issue_signed_token(account, jti, issued_at, expires_at)
+
+def validate_session(session_token):
+    """Validate a session token, returning the session data or None.
+
+    The returned dictionary has the same shape as validate_session_token.
+    """
+    if not is_signed_mode():
+        return validate_session_token(session_token)
+
+    claims = decode_token(session_token)
+    if not claims or claims['exp'] <= time.time():
+        return None
+
+    revocation_list.sync_if_stale()
+    if revocation_list.is_revoked(claims):
+        return None
+
+    account = _deserialize_account(claims['acc'])
+    session_data = {
+        'account_id': claims['sub'],
+        'session_token': claims['jti'],
+        'expires_at': datetime.fromtimestamp(claims['exp']),
+        'account_created_at': account.pop('created_at')
+    }
+    session_data.update(account)
+    return session_data
+
+def revoke_session(session_token):
+    """Revoke a session token on logout."""
+    if not is_signed_mode():
+        return invalidate_session_token(session_token)
+
+    claims = decode_token(session_token)
+    if not claims:
+        return False
+
+    revocation_list.add(claims['exp'], jti=claims['jti'])
+    add_session_revocation(datetime.fromtimestamp(claims['exp']), jti=claims['jti'])
+
+    # Keep the audit trail consistent with database mode
+    return invalidate_session_token(claims['jti'])
+
+def refresh_session_token(session_token):
+    """Return a token carrying up to date account data after a profile change."""
+    if not is_signed_mode():
+        return session_token
+
+    claims = decode_token(session_token)
+    if not claims:
+        return session_token
+
+    account = get_user_by_id(claims['sub'])
+    if not account:
+        return session_token
+
+    return _issue_signed_token(account, claims['jti'], claims['iat'], claims['exp'])
+
+def rotate_session_token(session_token, ip_address=None, user_agent=None):
+    """Revoke every session of the account after a password change and issue a new token.
+
+    In database mode the current token stays valid and is returned unchanged.
+    """
+    if not is_signed_mode():
+        return session_token
+
+    claims = decode_token(session_token)
+    if not claims:
+        return session_token
+
+    account_id = claims['sub']
+    revoked_before = int(time.time())
+    # Any token issued until now expires at the latest one session lifetime from now
+    expires_at = revoked_before + config.SESSION_LIFETIME_HOURS * 3600
+
+    # Revokes the current token as well
+    revocation_list.add(expires_at, account_id=account_id, revoked_before=revoked_before)
+    add_session_revocation(datetime.fromtimestamp(expires_at), account_id=account_id, revoked_before=revoked_before)
+    invalidate_session_token(claims['jti'])
+
+    # Tokens issued up to revoked_before (included) are revoked, so the new one starts the second after
+    return issue_session_token(account_id, ip_address, user_agent, issued_at=revoked_before + 1)
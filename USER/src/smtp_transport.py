@@ -0,0 +1,182 @@
+"""
+Pooled SMTP transport for the Cinema application.
+Keeps authenticated SMTP sessions open between messages so that the TCP
+connection, STARTTLS and login are paid once per session instead of once
+per email. Sessions are shared safely between threads, dropped when idle
+for too long and transparently reopened when the server disconnects.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the session itself is broken (as opposed to a rejected message)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPSession:
+    """An open SMTP connection with its usage counters."""
+
+    def __init__(self, server):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.sent_count = 0
+
+    def close(self):
+        """Quit politely, or just drop the connection if the server is gone."""
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPTransport:
+    """Thread-safe pool of authenticated SMTP sessions."""
+
+    def __init__(self, host, port, use_tls=True, username='', password='', max_sessions=2,
+                 idle_seconds=60, max_messages_per_session=100, timeout=30, smtp_class=smtplib.SMTP):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.idle_seconds = idle_seconds
+        self.max_messages_per_session = max_messages_per_session
+        self.timeout = timeout
+        self._smtp_class = smtp_class
+        self._idle_sessions = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self.connections_opened = 0
+
+    def _connect(self):
+        """Open, secure and authenticate a new session."""
+        server = self._smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+
+        self.connections_opened += 1
+        logger.debug(f"Opened SMTP session to {self.host}:{self.port}")
+        return SMTPSession(server)
+
+    def _take_idle_session(self):
+        """Return the most recently used idle session that is still fresh, or None."""
+        expired = []
+        session = None
+        now = time.monotonic()
+
+        with self._lock:
+            while self._idle_sessions:
+                candidate = self._idle_sessions.pop()
+                if now - candidate.last_used < self.idle_seconds:
+                    session = candidate
+                    break
+                expired.append(candidate)
+
+        for stale_session in expired:
+            stale_session.close()
+        return session
+
+    @contextmanager
+    def session(self):
+        """Check a session out of the pool, opening one if none is idle.
+
+        The session goes back to the pool unless it failed or reached its message limit.
+        """
+        self._slots.acquire()
+        try:
+            session = self._take_idle_session() or self._connect()
+            try:
+                yield session
+            except CONNECTION_ERRORS:
+                session.server.close()
+                raise
+            except Exception:
+                self._release(session)
+                raise
+            else:
+                self._release(session)
+        finally:
+            self._slots.release()
+
+    def _release(self, session):
+        """Put a healthy session back in the pool."""
+        session.last_used = time.monotonic()
+        if session.sent_count >= self.max_messages_per_session:
+            session.close()
+            return
+        with self._lock:
+            self._idle_sessions.append(session)
+
+    def _send_on(self, session, msg):
+        session.server.send_message(msg)
+        session.sent_count += 1
+
+    def send(self, msg):
+        """Send one message, raising on failure."""
+        error = self.send_many([msg])[0]
+        if error is not None:
+            raise error
+
+    def send_many(self, messages):
+        """Send messages over a single session.
+
+        A message whose session was dropped by the server is retried once on a
+        new session. Returns one entry per message: None when it was sent, or
+        the exception that prevented it.
+        """
+        results = []
+        pending = list(messages)
+
+        while pending:
+            try:
+                with self.session() as session:
+                    while pending:
+                        msg = pending[0]
+                        try:
+                            self._send_on(session, msg)
+                            results.append(None)
+                        except CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            # The server rejected this message, the session is still usable
+                            results.append(e)
+                        pending.pop(0)
+            except CONNECTION_ERRORS as e:
+                # Retry the interrupted message once on a fresh session
+                logger.warning(f"SMTP session lost ({e}), reconnecting")
+                try:
+                    with self.session() as session:
+                        self._send_on(session, pending[0])
+                    results.append(None)
+                    pending.pop(0)
+                except CONNECTION_ERRORS as retry_error:
+                    # The server is unreachable: fail every remaining message
+                    results.extend([retry_error] * len(pending))
+                    pending = []
+                except Exception as retry_error:
+                    results.append(retry_error)
+                    pending.pop(0)
+            except Exception as e:
+                # Could not open a session at all: fail every remaining message
+                results.extend([e] * len(pending))
+                pending = []
+
+        return results
+
+    def close(self):
+        """Close every idle session."""
+        with self._lock:
+            sessions, self._idle_sessions = self._idle_sessions, []
+        for session in sessions:
+            session.close()
@@ -0,0 +1,144 @@
+"""
+Ticket delivery service for the Cinema application.
+Background workers send the ticket emails queued in the ticket_outbox table
+by the booking transaction, so bookings never wait for the SMTP server.
+
+Failed attempts are retried with exponential backoff; after
+TICKET_DELIVERY_MAX_ATTEMPTS attempts a delivery is marked dead and its
+last error is kept for inspection.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from .config import get_config
+from .email_service import get_email_service
+from .pdf_generator import build_booking_pdf_data, get_booking_pdf
+from .database.database_retrieve import get_booking_by_id, get_customers_for_booking
+from .database.database_modify import (
+    claim_ticket_deliveries,
+    mark_ticket_delivery_sent,
+    mark_ticket_delivery_failed
+)
+
+# Get configuration
+config = get_config()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def get_retry_delay(attempts):
+    """Return the delay before the next attempt after a given number of failed attempts."""
+    delay = config.TICKET_DELIVERY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, config.TICKET_DELIVERY_MAX_BACKOFF_SECONDS))
+
+def render_ticket_email(delivery):
+    """Render the tickets of a delivery into an email message, raising on failure."""
+    booking = get_booking_by_id(delivery['booking_id'])
+    customers = get_customers_for_booking(delivery['booking_id'])
+    if not booking or not customers:
+        raise RuntimeError(f"Booking {delivery['booking_id']} could not be loaded")
+
+    booking_data, tickets_data = build_booking_pdf_data(booking, customers)
+    # Wait for a render slot, a timeout is retried like any other failure
+    _, pdf_content = get_booking_pdf(booking_data, tickets_data, block=True)
+
+    return get_email_service().create_booking_message(
+        booking_data=booking_data,
+        pdf_content=pdf_content,
+        booker_email=delivery['recipient_email'],
+        booker_name=delivery['recipient_name']
+    )
+
+class TicketDeliveryWorker:
+    """Pool of threads delivering the queued ticket emails."""
+
+    def __init__(self, num_workers, poll_seconds):
+        self.num_workers = num_workers
+        self.poll_seconds = poll_seconds
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def start(self):
+        """Start the worker threads."""
+        for index in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f'ticket-delivery-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Ticket delivery started with {self.num_workers} workers")
+
+    def stop(self):
+        """Ask the worker threads to stop after their current delivery."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def notify(self):
+        """Wake the workers up after a delivery was queued, instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            processed = self.process_due_deliveries()
+            if processed:
+                # More deliveries may be due, keep going without waiting
+                continue
+
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+    def process_due_deliveries(self):
+        """Claim and deliver a batch of due deliveries, return how many were processed.
+
+        The whole batch is sent over one pooled SMTP session.
+        """
+        deliveries = claim_ticket_deliveries(config.TICKET_DELIVERY_BATCH_SIZE, config.TICKET_DELIVERY_LEASE_SECONDS)
+
+        rendered = []
+        for delivery in deliveries:
+            try:
+                rendered.append((delivery, render_ticket_email(delivery)))
+            except Exception as e:
+                self._record_failure(delivery, e)
+
+        if rendered:
+            results = get_email_service().deliver_messages([msg for _, msg in rendered])
+            for (delivery, _), error in zip(rendered, results):
+                if error is None:
+                    mark_ticket_delivery_sent(delivery['id'], delivery['claim_token'])
+                else:
+                    self._record_failure(delivery, error)
+
+        return len(deliveries)
+
+    def _record_failure(self, delivery, error):
+        """Schedule a retry, or dead-letter the delivery after the last attempt."""
+        if delivery['attempts'] >= config.TICKET_DELIVERY_MAX_ATTEMPTS:
+            logger.error(f"Ticket delivery {delivery['id']} for booking {delivery['booking_id']} "
+                         f"failed {delivery['attempts']} times, giving up: {error}")
+            mark_ticket_delivery_failed(delivery['id'], delivery['claim_token'], error)
+            return
+
+        next_attempt_at = datetime.now() + get_retry_delay(delivery['attempts'])
+        logger.warning(f"Ticket delivery {delivery['id']} for booking {delivery['booking_id']} failed "
+                       f"(attempt {delivery['attempts']}), retrying at {next_attempt_at:%H:%M:%S}: {error}")
+        mark_ticket_delivery_failed(delivery['id'], delivery['claim_token'], error, next_attempt_at)
+
+# Global ticket delivery worker instance
+ticket_delivery_worker = TicketDeliveryWorker(config.TICKET_DELIVERY_WORKERS, config.TICKET_DELIVERY_POLL_SECONDS)
+
+def init_ticket_delivery(app):
+    """Start the ticket delivery workers with the Flask app."""
+    try:
+        ticket_delivery_worker.start()
+
+        import atexit
+        atexit.register(ticket_delivery_worker.stop)
+        atexit.register(get_email_service().transport.close)
+
+    except Exception as e:
+        logger.error(f"Failed to start ticket delivery: {e}")
+
+def notify_ticket_delivery():
+    """Signal that a ticket delivery was queued."""
+    ticket_delivery_worker.notify()
@@ -0,0 +1,320 @@
+"""
+Fast booking PDF renderer for cinema tickets.
+Draws the same layout as TicketPDFGenerator.generate_booking_pdf directly on
+a reportlab canvas instead of building a platypus story for every request.
+
+Everything that does not depend on the booking (fonts, colors, static
+labels and their widths, the legal text, the vertical layout) is computed
+once when the renderer is created. The static parts of each ticket box are
+stored as a form in the document and reused for every ticket, so only the
+variable fields are drawn per ticket.
+"""
+
+import datetime
+from io import BytesIO
+from typing import Any, Dict, List
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Page frame of the platypus generator: 0.75in side and 1in top/bottom margins, 6pt frame padding
+PAGE_WIDTH, PAGE_HEIGHT = A4
+FRAME_LEFT = 0.75 * inch + 6
+FRAME_WIDTH = PAGE_WIDTH - 1.5 * inch - 12
+FRAME_TOP = PAGE_HEIGHT - 1 * inch - 6
+FRAME_BOTTOM = 1 * inch + 6
+
+PRIMARY = colors.HexColor('#0d6efd')
+DARK = colors.HexColor('#212529')
+SUCCESS = colors.HexColor('#198754')
+LIGHT = colors.HexColor('#f8f9fa')
+BORDER = colors.HexColor('#dee2e6')
+
+# The ticket emoji has no Helvetica glyph, reportlab falls back to this ZapfDingbats glyph
+SYMBOL_FONT = 'ZapfDingbats'
+SYMBOL_GLYPH = 'n'
+
+
+class TextStyle:
+    """Font, metrics and spacing of a paragraph style (values of the platypus styles)."""
+
+    def __init__(self, font, size, leading, space_before, space_after, color, centered=False):
+        self.font = font
+        self.size = size
+        self.leading = leading
+        self.space_before = space_before
+        self.space_after = space_after
+        self.color = color
+        self.centered = centered
+
+
+TITLE = TextStyle('Helvetica-Bold', 24, 22, 0, 20, PRIMARY, centered=True)
+MOVIE_TITLE = TextStyle('Helvetica-Bold', 18, 18, 12, 12, DARK)
+SECTION_HEADER = TextStyle('Helvetica-BoldOblique', 14, 14, 12, 8, PRIMARY)
+INFO_TEXT = TextStyle('Helvetica', 11, 12, 0, 6, colors.black)
+HIGHLIGHT = TextStyle('Helvetica-Bold', 12, 12, 0, 8, SUCCESS)
+FOOTER = TextStyle('Helvetica', 9, 12, 0, 0, colors.grey, centered=True)
+
+
+class KeyValueTable:
+    """Static geometry of a two-column label/value table, centered in the frame like platypus tables."""
+
+    def __init__(self, labels, col_widths, font_size, top_padding, bottom_padding, boxed=False):
+        self.labels = labels
+        self.col_widths = col_widths
+        self.font_size = font_size
+        self.row_height = top_padding + 12 + bottom_padding
+        self.baseline_offset = bottom_padding + 12 - font_size
+        self.width = sum(col_widths)
+        self.height = self.row_height * len(labels)
+        self.x = FRAME_LEFT + (FRAME_WIDTH - self.width) / 2
+        self.value_x = col_widths[0] + 6
+        self.boxed = boxed
+
+    def draw_labels(self, c):
+        """Draw the background, grid and labels, relative to the table bottom left corner."""
+        if self.boxed:
+            c.setFillColor(LIGHT)
+            c.rect(0, 0, self.width, self.height, stroke=0, fill=1)
+            c.setStrokeColor(BORDER)
+            c.setLineWidth(1)
+            c.rect(0, 0, self.width, self.height, stroke=1, fill=0)
+            for row in range(1, len(self.labels)):
+                c.line(0, row * self.row_height, self.width, row * self.row_height)
+            c.line(self.col_widths[0], 0, self.col_widths[0], self.height)
+
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica-Bold', self.font_size)
+        for row, label in enumerate(self.labels):
+            c.drawString(6, self._baseline(row), label)
+
+    def draw_values(self, c, values):
+        """Draw the values, relative to the table bottom left corner."""
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica', self.font_size)
+        for row, value in enumerate(values):
+            c.drawString(self.value_x, self._baseline(row), str(value))
+
+    def _baseline(self, row):
+        return self.height - (row + 1) * self.row_height + self.baseline_offset
+
+
+class TicketRenderer:
+    """Reusable canvas renderer for booking PDFs, safe to share between threads."""
+
+    LEGAL_TEXT = [
+        "• Please arrive at least 15 minutes before the showing time",
+        "• Tickets are non-refundable and non-transferable",
+        "• Food and beverages purchased outside are not permitted",
+        "• Mobile phones should be silenced during the movie",
+        "• For assistance, contact our customer service"
+    ]
+
+    EXPIRED_TEXT = (
+        "This booking has expired. The movie showing has already taken place. "
+        "This document serves as a record of your past booking."
+    )
+
+    def __init__(self):
+        self.booking_table = KeyValueTable(
+            ['Booking ID:', 'Customer:', 'Email:', 'Booking Date:', 'Total Amount:', 'Number of Tickets:'],
+            [2 * inch, 3 * inch], font_size=11, top_padding=4, bottom_padding=8
+        )
+        self.movie_table = KeyValueTable(
+            ['Theater:', 'Date:', 'Time:', 'Duration:'],
+            [2 * inch, 3 * inch], font_size=11, top_padding=4, bottom_padding=8
+        )
+        self.ticket_table = KeyValueTable(
+            ['Seat Number:', 'Seat Type:', 'Ticket ID:', 'Price:'],
+            [1.5 * inch, 2 * inch], font_size=10, top_padding=2, bottom_padding=6, boxed=True
+        )
+        self.separator = "- " * 50
+        self.expired_lines = simpleSplit(self.EXPIRED_TEXT, INFO_TEXT.font, INFO_TEXT.size, FRAME_WIDTH)
+        # Height of a ticket header with its table, kept together on one page
+        self.ticket_block_height = HIGHLIGHT.leading + HIGHLIGHT.space_after + self.ticket_table.height
+
+    def render_booking(self, booking_data: Dict[str, Any], tickets_data: List[Dict[str, Any]],
+                       expired: bool = False) -> BytesIO:
+        """Render the booking PDF, with the expired notice when expired is True."""
+        buffer = BytesIO()
+        booker_name = booking_data.get('booker_name', 'Anonymous User')
+
+        c = canvas.Canvas(buffer, pagesize=A4)
+        c.setTitle(f"{booker_name} - Tickets")
+        c.setAuthor("Cinemacousas")
+        c.setSubject(f"Movie Tickets for {booking_data.get('movie_name', 'Movie')}")
+        c.setCreator("Cinemacousas Booking System")
+
+        layout = _PageFlow(c)
+        now = datetime.datetime.now().strftime('%B %d, %Y at %I:%M %p')
+
+        # Header
+        layout.symbol_paragraph(' CINEMACOUSAS', TITLE)
+        layout.space(20)
+
+        # Booking information
+        layout.paragraph("Booking Confirmation", SECTION_HEADER)
+        layout.table(self.booking_table, [
+            f"#{booking_data.get('id', 'N/A')}",
+            booking_data.get('booker_name', 'N/A'),
+            booking_data.get('booker_email', 'N/A'),
+            now,
+            f"€{booking_data.get('price', 0):.2f}",
+            str(len(tickets_data))
+        ])
+        layout.space(20)
+
+        # Movie information
+        show_date = booking_data.get('date', datetime.date.today())
+        starttime = int(booking_data.get('starttime', 0))
+        layout.paragraph("Movie Details", SECTION_HEADER)
+        layout.paragraph(booking_data.get('movie_name', 'Unknown Movie'), MOVIE_TITLE)
+        layout.table(self.movie_table, [
+            booking_data.get('room_name', 'N/A'),
+            show_date.strftime('%A, %B %d, %Y'),
+            f"{starttime // 3600:02d}:{(starttime % 3600) // 60:02d}",
+            f"{booking_data.get('duration', 0)} minutes"
+        ])
+        layout.space(20)
+
+        # Expired notice
+        if expired:
+            layout.paragraph("⚠️ EXPIRED TICKET NOTICE", SECTION_HEADER)
+            layout.lines(self.expired_lines, INFO_TEXT)
+            layout.space(20)
+
+        # Individual tickets, the static part of each box is a form drawn once per document
+        layout.paragraph("Individual Tickets", SECTION_HEADER)
+        layout.space(10)
+
+        c.beginForm('ticket_box')
+        self.ticket_table.draw_labels(c)
+        c.endForm()
+
+        for i, ticket in enumerate(tickets_data, 1):
+            if i > 1:
+                layout.space(15)
+                layout.paragraph(self.separator, FOOTER)
+                layout.space(15)
+
+            layout.keep_together(self.ticket_block_height)
+            layout.symbol_paragraph(f" TICKET #{i}", HIGHLIGHT)
+            layout.table(self.ticket_table, [
+                ticket.get('seat_number', 'N/A'),
+                ticket.get('seat_type', 'Standard'),
+                f"#{ticket.get('id', 'N/A')}",
+                f"€{ticket.get('price', 0):.2f}"
+            ], form='ticket_box')
+
+        # Legal information
+        layout.space(30)
+        layout.paragraph("Important Information", SECTION_HEADER)
+        for line in self.LEGAL_TEXT:
+            layout.paragraph(line, INFO_TEXT)
+
+        layout.space(20)
+        layout.paragraph(f"Generated on {now} | Cinemacousas Cinema", FOOTER)
+
+        c.showPage()
+        c.save()
+        buffer.seek(0)
+        return buffer
+
+
+class _PageFlow:
+    """Top-down flow of blocks on the canvas, with the spacing rules of a platypus frame."""
+
+    def __init__(self, c):
+        self.c = c
+        self.y = FRAME_TOP
+        self.at_top = True
+        self.pending_space = 0
+
+    def _place(self, height, space_before=0):
+        """Reserve height below the previous block, starting a new page when it does not fit.
+
+        Returns the bottom of the reserved block.
+        """
+        gap = 0 if self.at_top else max(self.pending_space, space_before)
+        if not self.at_top and self.y - gap - height < FRAME_BOTTOM:
+            self.new_page()
+            gap = 0
+
+        self.y -= gap + height
+        self.at_top = False
+        self.pending_space = 0
+        return self.y
+
+    def new_page(self):
+        self.c.showPage()
+        self.y = FRAME_TOP
+        self.at_top = True
+        self.pending_space = 0
+
+    def keep_together(self, height):
+        """Start a new page unless a block of this height fits below."""
+        if not self.at_top and self.y - self.pending_space - height < FRAME_BOTTOM:
+            self.new_page()
+
+    def space(self, height):
+        """Vertical spacer, dropped at the top of a page."""
+        if self.at_top:
+            return
+        self.y -= self.pending_space + height
+        self.pending_space = 0
+        if self.y < FRAME_BOTTOM:
+            self.new_page()
+
+    def paragraph(self, text, style):
+        """Draw a paragraph, wrapped to the frame width."""
+        self.lines(simpleSplit(text, style.font, style.size, FRAME_WIDTH), style)
+
+    def lines(self, lines, style):
+        bottom = self._place(style.leading * len(lines), style.space_before)
+        c = self.c
+        c.setFillColor(style.color)
+        c.setFont(style.font, style.size)
+        for index, line in enumerate(lines):
+            baseline = bottom + style.leading * (len(lines) - index) - style.size
+            if style.centered:
+                c.drawCentredString(FRAME_LEFT + FRAME_WIDTH / 2, baseline, line)
+            else:
+                c.drawString(FRAME_LEFT, baseline, line)
+        self.pending_space = style.space_after
+
+    def symbol_paragraph(self, text, style):
+        """Draw a one-line paragraph preceded by the ticket symbol."""
+        bottom = self._place(style.leading, style.space_before)
+        symbol_width = stringWidth(SYMBOL_GLYPH, SYMBOL_FONT, style.size)
+        x = FRAME_LEFT
+        if style.centered:
+            x += (FRAME_WIDTH - symbol_width - stringWidth(text, style.font, style.size)) / 2
+
+        c = self.c
+        baseline = bottom + style.leading - style.size
+        c.setFillColor(style.color)
+        c.setFont(SYMBOL_FONT, style.size)
+        c.drawString(x, baseline, SYMBOL_GLYPH)
+        c.setFont(style.font, style.size)
+        c.drawString(x + symbol_width, baseline, text)
+        self.pending_space = style.space_after
+
+    def table(self, table, values, form=None):
+        """Draw a label/value table, reusing a form for its static part when given."""
+        bottom = self._place(table.height)
+        c = self.c
+        c.saveState()
+        c.translate(table.x, bottom)
+        if form:
+            c.doForm(form)
+        else:
+            table.draw_labels(c)
+        table.draw_values(c, values)
+        c.restoreState()
+
+
+# Shared renderer instance
+ticket_renderer = TicketRenderer()
@@ -0,0 +1,4 @@
+"""
+Code shared by the ADMIN and USER applications.
+Both apps put the repository root on sys.path to import it.
+"""
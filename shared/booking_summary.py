@@ -0,0 +1,86 @@
+"""
+Booking summary read model.
+The booking_summary table holds one denormalized row per booking (movie, room,
+start time, booker account, seat count and seat labels) so that the admin
+listings are a single indexed scan instead of a join and GROUP BY over the
+whole booking history.
+
+Rows are written in the same transaction as the change they reflect: the
+booking itself (USER create_complete_booking_secure), its cancellation and the
+edits of the showing, movie, room or account it copies. rebuild_booking_summaries
+recomputes the whole table (python -m src.database.migrations rebuild-booking-summary).
+"""
+
+# Room seat counts stay far below this; GROUP_CONCAT truncation is a warning,
+# which the USER pool raises as an error and would abort the booking
+GROUP_CONCAT_MAX_LEN = 65536
+
+# Statement computing the summary rows of the bookings matching a condition
+# on booking b, showing s or account a. Seat labels are sorted by row length
+# first so that row AA comes after Z (see shared/seatmap.py)
+SUMMARY_SELECT = """
+    SELECT b.id, b.account_id, b.showing_id, s.movie_id, s.room_id,
+           m.name, r.name, s.starts_at, b.price,
+           a.username, a.email, b.first_name, b.last_name, b.email,
+           COUNT(st.id),
+           COALESCE(GROUP_CONCAT(CONCAT(st.seat_row, st.seat_column)
+                                 ORDER BY CHAR_LENGTH(st.seat_row), st.seat_row, st.seat_column SEPARATOR ','), '')
+    FROM booking b
+    JOIN showing s ON b.showing_id = s.id
+    JOIN movie m ON s.movie_id = m.id
+    JOIN room r ON s.room_id = r.id
+    JOIN account a ON b.account_id = a.id
+    LEFT JOIN customer c ON c.booking_id = b.id
+    LEFT JOIN seatreservation sr ON sr.customer_id = c.id
+    LEFT JOIN seat st ON sr.seat_id = st.id
+    {where}
+    GROUP BY b.id
+"""
+
+SUMMARY_COLUMNS = """
+    booking_id, account_id, showing_id, movie_id, room_id,
+    movie_name, room_name, starts_at, price,
+    username, account_email, booker_first_name, booker_last_name, booker_email,
+    seat_count, seat_labels
+"""
+
+# Columns a refresh can select bookings by (renames of a movie, room or
+# account only update the copied name columns)
+REFRESH_KEYS = {
+    'booking_id': 'b.id',
+    'showing_id': 'b.showing_id',
+}
+
+
+def set_group_concat_max_len(cursor):
+    """Raise the GROUP_CONCAT length limit of the session for the seat labels."""
+    cursor.execute(f"SET SESSION group_concat_max_len = {GROUP_CONCAT_MAX_LEN}")
+
+
+def refresh_booking_summaries(cursor, key, value):
+    """Recompute the summary rows of the bookings whose key (see REFRESH_KEYS) equals value.
+
+    Runs on the caller's cursor, inside its transaction.
+    """
+    set_group_concat_max_len(cursor)
+    where = f"WHERE {REFRESH_KEYS[key]} = %s"
+    cursor.execute(
+        f"REPLACE INTO booking_summary ({SUMMARY_COLUMNS}) {SUMMARY_SELECT.format(where=where)}",
+        (value,)
+    )
+
+
+def delete_booking_summary(cursor, booking_id):
+    """Remove the summary row of a booking."""
+    cursor.execute("DELETE FROM booking_summary WHERE booking_id = %s", (booking_id,))
+
+
+def rebuild_booking_summaries(cursor):
+    """Recompute the whole table from the bookings, return the number of rows.
+
+    Does not commit; DELETE keeps the rebuild transactional where TRUNCATE would not.
+    """
+    set_group_concat_max_len(cursor)
+    cursor.execute("DELETE FROM booking_summary")
+    cursor.execute(f"INSERT INTO booking_summary ({SUMMARY_COLUMNS}) {SUMMARY_SELECT.format(where='')}")
+    return cursor.rowcount
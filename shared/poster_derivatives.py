@@ -0,0 +1,137 @@
+"""
+Resized poster derivatives.
+Pages show posters far smaller than the uploaded originals, so every poster
+gets smaller copies in each size of DERIVATIVE_SIZES and each format of
+DERIVATIVE_FORMATS, stored in the poster store next to the original.
+
+The admin app generates them in the background right after an upload; the
+user app generates a missing one when it is first requested. Images Pillow
+cannot read (SVG) have no derivatives and are served as uploaded.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Width in pixels of each derivative size, height follows the aspect ratio.
+# Cards are displayed 140 CSS pixels wide, 'card' covers them on 2x screens
+DERIVATIVE_SIZES = {
+    'card': 280,
+    'detail': 600
+}
+
+# Pillow format, MIME type and encoder options of each derivative format
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True})
+}
+
+# MIME types of the originals Pillow can resize
+RESIZABLE_MIME_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif'}
+
+# One background thread is enough for the rare uploads
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='poster-derivatives')
+_generation_lock = threading.Lock()
+
+
+def has_derivatives(mime_type):
+    """Whether posters of this MIME type get resized derivatives."""
+    return mime_type in RESIZABLE_MIME_TYPES
+
+
+def derivative_variant(size, image_format):
+    """Return the variant name of a derivative, e.g. 'card.webp'."""
+    if size not in DERIVATIVE_SIZES or image_format not in DERIVATIVE_FORMATS:
+        raise ValueError(f"Unknown poster derivative: {size}.{image_format}")
+    return f"{size}.{image_format}"
+
+
+def derivative_mime_type(image_format):
+    return DERIVATIVE_FORMATS[image_format][1]
+
+
+def render_derivative(image, size, image_format):
+    """Resize an opened original and encode it, return the encoded bytes."""
+    pil_format, _, options = DERIVATIVE_FORMATS[image_format]
+    width = DERIVATIVE_SIZES[size]
+
+    resized = image.copy()
+    if resized.width > width:
+        resized.thumbnail((width, round(resized.height * width / resized.width)), Image.LANCZOS)
+
+    if pil_format == 'JPEG' and resized.mode != 'RGB':
+        # JPEG has no alpha channel, flatten transparent posters on white
+        background = Image.new('RGB', resized.size, 'white')
+        rgba = resized.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        resized = background
+    elif resized.mode not in ('RGB', 'RGBA'):
+        resized = resized.convert('RGBA' if 'transparency' in resized.info else 'RGB')
+
+    output = BytesIO()
+    resized.save(output, pil_format, **options)
+    return output.getvalue()
+
+
+def _open_original(store, digest):
+    image = Image.open(store.path(digest))
+    # Apply the camera orientation, thumbnails lose the EXIF data
+    return ImageOps.exif_transpose(image)
+
+
+def generate_derivatives(store, digest, variants=None):
+    """Generate the derivatives of a stored poster, return the paths of the generated files.
+
+    Args:
+        variants: (size, format) pairs to generate, all of them by default
+
+    Returns an empty list for images Pillow cannot read.
+    """
+    if variants is None:
+        variants = [(size, image_format) for size in DERIVATIVE_SIZES for image_format in DERIVATIVE_FORMATS]
+
+    try:
+        with _open_original(store, digest) as image:
+            image.load()
+            return [
+                store.put_derivative(digest, derivative_variant(size, image_format),
+                                     render_derivative(image, size, image_format))
+                for size, image_format in variants
+            ]
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"No derivatives for poster {digest}: {e}")
+        return []
+
+
+def ensure_derivative(store, digest, size, image_format):
+    """Return the path of a derivative, generating it first if it is missing.
+
+    Returns None when the original cannot be resized.
+    """
+    path = store.derivative_path(digest, derivative_variant(size, image_format))
+    if os.path.isfile(path):
+        return path
+
+    # Several requests for a fresh poster should not all resize it
+    with _generation_lock:
+        if not os.path.isfile(path):
+            generate_derivatives(store, digest, [(size, image_format)])
+    return path if os.path.isfile(path) else None
+
+
+def schedule_derivatives(store, digest):
+    """Generate all derivatives of a poster in the background, off the request thread."""
+    future = _executor.submit(generate_derivatives, store, digest)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Poster derivative generation failed: {error}")
@@ -0,0 +1,106 @@
+"""
+Content-addressed file store for movie posters.
+Poster images are stored on the local filesystem under the SHA-256 of their
+content; the movieposter table only keeps metadata and the content_hash.
+
+Files are laid out as <root>/ab/cd/<hash> and written atomically, so both
+applications can serve them directly with send_file. Identical uploads share
+one file. Resized derivatives are stored next to their original as
+<hash>.<variant> (see poster_derivatives.py).
+"""
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default location, relative paths are resolved against the repository root
+# so that both applications use the same directory whatever their working directory
+DEFAULT_POSTER_STORE_DIR = os.path.join('media', 'posters')
+
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest identifying some content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PosterStore:
+    """Poster files keyed by content hash."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        """Return the path of the file holding some content hash."""
+        if not CONTENT_HASH_PATTERN.match(digest or ''):
+            raise ValueError(f"Invalid content hash: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.isfile(self.path(digest))
+
+    def derivative_path(self, digest, variant):
+        """Return the path of a derivative (e.g. 'card.webp') stored next to its original."""
+        return f"{self.path(digest)}.{variant}"
+
+    def put(self, data):
+        """Store some content and return its hash, writing nothing if it is already stored."""
+        digest = content_hash(data)
+        path = self.path(digest)
+        if not os.path.isfile(path):
+            self._write_atomic(path, data)
+        return digest
+
+    def put_derivative(self, digest, variant, data):
+        """Store a derivative of some stored content, return its path."""
+        path = self.derivative_path(digest, variant)
+        self._write_atomic(path, data)
+        return path
+
+    def _write_atomic(self, path, data):
+        """Write to a temporary file and rename it, so readers never see a partial file."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def read(self, digest):
+        with open(self.path(digest), 'rb') as stored_file:
+            return stored_file.read()
+
+    def delete(self, digest):
+        """Remove a stored file and its derivatives, return whether it existed."""
+        for derivative in glob.glob(glob.escape(self.path(digest)) + '.*'):
+            os.unlink(derivative)
+        try:
+            os.unlink(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+_poster_store = None
+
+
+def get_poster_store():
+    """Return the poster store configured by POSTER_STORE_DIR."""
+    global _poster_store
+    if _poster_store is None:
+        root = os.getenv('POSTER_STORE_DIR', DEFAULT_POSTER_STORE_DIR)
+        _poster_store = PosterStore(os.path.join(REPOSITORY_ROOT, root))
+    return _poster_store
@@ -0,0 +1,117 @@
+"""
+Seat maps of the rooms, shared by the ADMIN and USER applications.
+Rows are labelled A..Z, then AA, AB, ... (like spreadsheet columns) and seats
+are ordered by row number then column, so a room keeps a stable seat order
+beyond 26 rows; sorting the labels as strings would put AA between A and B.
+
+A room layout can be serialized compactly for the browser:
+    {
+        'rows': 3, 'columns': 4,
+        'row_labels': ['A', 'B', 'C'],
+        'types': 'nnnnnppn.nnn',          # one character per cell, row by row
+        'id_runs': [[101, 7], [120, 4]]   # seat ids of the cells with a seat, as runs
+    }
+Each character of types is the code of the seat type (SEAT_TYPE_CODES), or
+NO_SEAT when the cell has no seat. Seat ids are assigned to the cells with a
+seat in the same order; runs of consecutive ids ([first id, count]) keep this
+short, since the seats of a room are created row by row.
+"""
+
+from functools import lru_cache
+
+SEAT_TYPE_CODES = {'normal': 'n', 'pmr': 'p', 'stair': 's', 'empty': 'e'}
+SEAT_TYPES_BY_CODE = {code: seat_type for seat_type, code in SEAT_TYPE_CODES.items()}
+NO_SEAT = '.'
+
+
+def row_label(row_number):
+    """Return the label of a row from its number (1 -> A, 26 -> Z, 27 -> AA)."""
+    if row_number < 1:
+        raise ValueError(f"Invalid row number: {row_number}")
+    label = ''
+    while row_number:
+        row_number, remainder = divmod(row_number - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+@lru_cache(maxsize=1024)
+def row_number(label):
+    """Return the number of a row from its label (A -> 1, AA -> 27)."""
+    if not label or not label.isascii() or not label.isalpha():
+        raise ValueError(f"Invalid row label: {label!r}")
+    number = 0
+    for char in label.upper():
+        number = number * 26 + ord(char) - 64
+    return number
+
+
+def seat_sort_key(seat):
+    """Sort key of a seat dictionary (seat_row, seat_column): row number, then column."""
+    return row_number(seat['seat_row']), int(seat['seat_column'])
+
+
+def sort_seats(seats):
+    """Return the seats in seat order (row number, then column)."""
+    return sorted(seats, key=seat_sort_key)
+
+
+def build_grid(nb_rows, nb_columns, seats):
+    """Place seats in a nb_rows x nb_columns grid (list of rows), None where there is no seat.
+
+    Every seat is placed directly at its cell, so the cost is one pass over
+    the cells and one over the seats. Seats outside the grid are left out.
+    """
+    grid = [[None] * nb_columns for _ in range(nb_rows)]
+    for seat in seats:
+        row_index = row_number(seat['seat_row']) - 1
+        column_index = int(seat['seat_column']) - 1
+        if 0 <= row_index < nb_rows and 0 <= column_index < nb_columns:
+            grid[row_index][column_index] = seat
+    return grid
+
+
+def serialize_layout(nb_rows, nb_columns, seats):
+    """Serialize the seats (id, type, seat_row, seat_column) of a room in the compact format."""
+    types = []
+    id_runs = []
+    for grid_row in build_grid(nb_rows, nb_columns, seats):
+        for seat in grid_row:
+            if seat is None:
+                types.append(NO_SEAT)
+                continue
+
+            types.append(SEAT_TYPE_CODES.get(seat['type'], SEAT_TYPE_CODES['normal']))
+            if id_runs and id_runs[-1][0] + id_runs[-1][1] == seat['id']:
+                id_runs[-1][1] += 1
+            else:
+                id_runs.append([seat['id'], 1])
+
+    return {
+        'rows': nb_rows,
+        'columns': nb_columns,
+        'row_labels': [row_label(number) for number in range(1, nb_rows + 1)],
+        'types': ''.join(types),
+        'id_runs': id_runs
+    }
+
+
+def deserialize_layout(layout):
+    """Return the seats (id, type, seat_row, seat_column) of a compact layout, in seat order."""
+    seat_ids = (
+        seat_id
+        for first_id, count in layout['id_runs']
+        for seat_id in range(first_id, first_id + count)
+    )
+    columns = layout['columns']
+    seats = []
+    for index, code in enumerate(layout['types']):
+        if code == NO_SEAT:
+            continue
+        seats.append({
+            'id': next(seat_ids),
+            'type': SEAT_TYPES_BY_CODE[code],
+            'seat_row': layout['row_labels'][index // columns],
+            'seat_column': index % columns + 1
+        })
+    return seats